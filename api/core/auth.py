@@ -2,15 +2,21 @@
 Authentication and authorization system for Sign Glove API.
 Handles JWT tokens, password hashing, and role-based access control.
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+from jose.exceptions import ExpiredSignatureError
 from passlib.context import CryptContext
 from pydantic import BaseModel
+import hashlib
 import os
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,9 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified tokens kept in memory (LRU)
+TOKEN_CACHE_SIZE = 4096
+
 # HTTP Bearer token scheme (do not auto-error so we can return 401 consistently)
 security = HTTPBearer(auto_error=False)
 
@@ -85,31 +94,80 @@ def get_required_role_for_path(path: str) -> str:
             return role
     return UserRole.VIEWER  # Default to viewer for unknown routes
 
-# Default users (in production, these should be in database)
+# Default users (in production, these should be in database).
+# Passwords are hashed on first use, not at import (bcrypt is deliberately slow).
 DEFAULT_USERS = {
     "admin": {
         "username": "admin",
         "email": "admin@signglove.com",
         "role": UserRole.ADMIN,
-        "hashed_password": pwd_context.hash("admin123"),
+        "password": "admin123",
         "disabled": False
     },
     "user": {
         "username": "user",
         "email": "user@signglove.com", 
         "role": UserRole.USER,
-        "hashed_password": pwd_context.hash("user123"),
+        "password": "user123",
         "disabled": False
     },
     "viewer": {
         "username": "viewer",
         "email": "viewer@signglove.com",
         "role": UserRole.VIEWER,
-        "hashed_password": pwd_context.hash("viewer123"),
+        "password": "viewer123",
         "disabled": False
     }
 }
 
+@lru_cache(maxsize=None)
+def _default_password_hash(username: str) -> str:
+    return pwd_context.hash(DEFAULT_USERS[username]["password"])
+
+class TokenCache:
+    """
+    Bounded LRU of verified JWTs -> claims. Entries are keyed by a hash of the
+    signing secret and token (no raw tokens kept) and stop being served at `exp`.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        # Sync dependencies run in the threadpool
+        self._lock = threading.Lock()
+
+    def decode(self, token: str, secret: str, algorithms: List[str]) -> Dict[str, Any]:
+        """Verified claims of `token`; raises JWTError (incl. ExpiredSignatureError) like jwt.decode."""
+        key = hashlib.sha256(f"{secret}\0{','.join(algorithms)}\0{token}".encode()).digest()
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None:
+                self._entries.move_to_end(key)
+        if claims is not None:
+            exp = claims.get("exp")
+            if exp is None or exp > time.time():
+                return dict(claims)
+            with self._lock:
+                self._entries.pop(key, None)
+            raise ExpiredSignatureError("Signature has expired.")
+
+        claims = jwt.decode(token, secret, algorithms=algorithms)
+        with self._lock:
+            self._entries[key] = claims
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return dict(claims)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache()
+
+def decode_token(token: str, secret: Optional[str] = None, algorithms: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Cached JWT verification (defaults to this module's secret/algorithm)."""
+    return token_cache.decode(token, secret or SECRET_KEY, algorithms or [ALGORITHM])
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -121,8 +179,8 @@ def get_password_hash(password: str) -> str:
 def get_user(username: str) -> Optional[UserInDB]:
     """Get user from database (or default users for now)."""
     if username in DEFAULT_USERS:
-        user_dict = DEFAULT_USERS[username]
-        return UserInDB(**user_dict)
+        user_dict = {k: v for k, v in DEFAULT_USERS[username].items() if k != "password"}
+        return UserInDB(**user_dict, hashed_password=_default_password_hash(username))
     return None
 
 def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
@@ -169,7 +227,7 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
         raise credentials_exception
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials)
         username: str = payload.get("sub")
         token_type: str = payload.get("type")
         
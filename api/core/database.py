@@ -1,7 +1,7 @@
 """
 Database connection and collection setup for the sign glove system.
 
-- Sets up MongoDB client and main collections (predictions, sensor_data, model_results, gestures, training_sessions).
+- Sets up MongoDB client and main collections (predictions, sensor_data, sensor_samples, model_results, gestures, training_sessions).
 - Sets up SQLAlchemy engine for PostgreSQL (users, metadata).
 - Provides async test functions to verify both MongoDB and PostgreSQL connectivity.
 """
@@ -22,13 +22,16 @@ else:
     db = client[settings.DB_NAME]
 
 # Collections (ML/Sensor Data)
-sensor_collection = db.sensor_data
+sensor_collection = db.sensor_data  # Legacy batches; drained into sensor_samples by migration
+sensor_samples_collection = db.sensor_samples  # Time-series: one measurement per sample
 prediction_collection = db.predictions
 model_collection = db.model_results # Legacy
 gestures_collection = db.gestures
 training_collection = db.training_sessions
 voice_collection = db.voice_data
 feedback_collection = db.feedback
+label_stats_collection = db.label_stats  # Materialized per-label summary, see services.label_stats_service
+monitoring_rollup_collection = db.monitoring_rollups  # Minute buckets, see services.dashboard.monitoring_rollups
 
 # --- Connection Tests ---
 
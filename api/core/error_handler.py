@@ -2,6 +2,7 @@
 Centralized error handling and logging system.
 """
 import logging
+import math
 import traceback
 import uuid
 import time
@@ -188,40 +189,177 @@ def handle_model_error(request: Request, exc: Exception) -> JSONResponse:
     )
 
 # Performance monitoring
+
+# Log-bucketed latency sketch: bucket i holds durations in (GAMMA^(i-1), GAMMA^i] ms, so any
+# percentile is reported within SKETCH_RELATIVE_ACCURACY of the true value. Recording is O(1)
+# and sketches merge by adding bucket counts (time windows, routes, processes).
+SKETCH_RELATIVE_ACCURACY = 0.01
+_SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_SKETCH_LOG_GAMMA = math.log(_SKETCH_GAMMA)
+# Durations at or below this land in bucket 0
+SKETCH_MIN_MS = 0.01
+# Request sketches are kept per route/status in time slots covering the retention period
+SKETCH_SLOT_SECONDS = 10
+SKETCH_RETENTION_SECONDS = 900
+# Minute counters kept in memory if no aggregator drains them
+MAX_PENDING_MINUTES = 120
+
+
+def sketch_index(duration_ms: float) -> int:
+    if duration_ms <= SKETCH_MIN_MS:
+        return 0
+    return max(0, math.ceil(math.log(duration_ms / SKETCH_MIN_MS) / _SKETCH_LOG_GAMMA))
+
+
+def sketch_value(index: int) -> float:
+    """Representative duration (ms) of a bucket: relative error <= SKETCH_RELATIVE_ACCURACY."""
+    if index <= 0:
+        return SKETCH_MIN_MS
+    return SKETCH_MIN_MS * 2 * _SKETCH_GAMMA ** index / (_SKETCH_GAMMA + 1)
+
+
+class LatencySketch:
+    """Mergeable latency distribution with bounded relative error (DDSketch-style)."""
+
+    __slots__ = ("counts", "count", "total_ms", "min_ms", "max_ms")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    @classmethod
+    def from_counts(cls, counts: Dict[Any, int]) -> "LatencySketch":
+        """Rebuilds a sketch from stored bucket counts (keys may be strings, e.g. from Mongo)."""
+        sketch = cls()
+        for index, n in counts.items():
+            if n:
+                index = int(index)
+                sketch.counts[index] = sketch.counts.get(index, 0) + int(n)
+                sketch.count += int(n)
+                value = sketch_value(index)
+                sketch.total_ms += value * int(n)
+                sketch.min_ms = min(sketch.min_ms, value)
+                sketch.max_ms = max(sketch.max_ms, value)
+        return sketch
+
+    def record(self, duration_ms: float):
+        index = sketch_index(duration_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms < self.min_ms:
+            self.min_ms = duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        return self
+
+    def percentile(self, q: float) -> float:
+        """Duration (ms) at quantile q in [0, 1]; 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        if q <= 0:
+            return self.min_ms
+        if q >= 1:
+            return self.max_ms
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen > rank:
+                return min(max(sketch_value(index), self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": (self.total_ms / self.count) if self.count else 0.0,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+def _status_class(status_code: int) -> str:
+    return f"{int(status_code) // 100}xx"
+
+
 class PerformanceMonitor:
     """Monitor API performance and response times."""
     
     def __init__(self):
-        self.request_times: Dict[str, list] = {}
+        # Lifetime sketch per "METHOD route"
+        self.route_sketches: Dict[str, LatencySketch] = {}
         self.error_counts: Dict[str, int] = {}
-        # Rolling request telemetry used by monitoring dashboards.
-        self.request_events = deque(maxlen=5000)
+        # Rolling telemetry for monitoring dashboards: (slot, {(method, route, status class): sketch})
+        self._slots: deque = deque(maxlen=SKETCH_RETENTION_SECONDS // SKETCH_SLOT_SECONDS + 1)
+        # Per-minute request counters, drained into Mongo by the monitoring rollup aggregator.
+        self.minute_counters: Dict[int, Dict[str, Any]] = {}
+        self.rollup_exclude_paths: set = set()
     
     def record_request_time(self, path: str, method: str, duration: float):
         """Record request duration."""
         self.record_request(path, method, duration, status_code=200)
 
     def record_request(self, path: str, method: str, duration: float, status_code: int):
-        """Record request duration with status code and timestamp."""
+        """Record request duration (seconds) with status code. O(1), no raw events are kept."""
         key = f"{method} {path}"
-        if key not in self.request_times:
-            self.request_times[key] = []
-        self.request_times[key].append(duration)
-        
-        # Keep only last 1000 requests
-        if len(self.request_times[key]) > 1000:
-            self.request_times[key] = self.request_times[key][-1000:]
+        duration_ms = float(duration) * 1000.0
+        sketch = self.route_sketches.get(key)
+        if sketch is None:
+            sketch = self.route_sketches[key] = LatencySketch()
+        sketch.record(duration_ms)
 
         if status_code >= 500:
             self.error_counts[key] = self.error_counts.get(key, 0) + 1
 
-        self.request_events.append({
-            "timestamp": time.time(),
-            "path": path,
-            "method": method,
-            "duration_ms": float(duration) * 1000.0,
-            "status_code": int(status_code),
-        })
+        now_ts = time.time()
+        slot = int(now_ts // SKETCH_SLOT_SECONDS)
+        if not self._slots or self._slots[-1][0] != slot:
+            self._slots.append((slot, {}))
+        slot_sketches = self._slots[-1][1]
+        slot_key = (method, path, _status_class(status_code))
+        slot_sketch = slot_sketches.get(slot_key)
+        if slot_sketch is None:
+            slot_sketch = slot_sketches[slot_key] = LatencySketch()
+        slot_sketch.record(duration_ms)
+
+        if path not in self.rollup_exclude_paths:
+            self._count_minute(now_ts, duration_ms, status_code)
+
+    def _count_minute(self, now_ts: float, duration_ms: float, status_code: int):
+        minute = int(now_ts // 60)
+        counters = self.minute_counters.get(minute)
+        if counters is None:
+            if len(self.minute_counters) >= MAX_PENDING_MINUTES:
+                self.minute_counters.pop(min(self.minute_counters))
+            counters = self.minute_counters[minute] = {"requests": 0, "errors": 0, "latency": LatencySketch()}
+        counters["requests"] += 1
+        if status_code >= 500:
+            counters["errors"] += 1
+        counters["latency"].record(duration_ms)
+
+    def drain_minute_counters(self, before_minute: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """Removes and returns counters for minutes (epoch // 60) before `before_minute` (all if None)."""
+        drained = {
+            minute: counters for minute, counters in self.minute_counters.items()
+            if before_minute is None or minute < before_minute
+        }
+        for minute in drained:
+            del self.minute_counters[minute]
+        return drained
     
     def record_error(self, path: str, method: str):
         """Record error occurrence."""
@@ -232,48 +370,81 @@ class PerformanceMonitor:
         """Get performance statistics."""
         stats = {}
         
-        for key, times in self.request_times.items():
-            if times:
+        for key, sketch in self.route_sketches.items():
+            if sketch.count:
+                summary = sketch.summary()
                 stats[key] = {
-                    "avg_response_time": sum(times) / len(times),
-                    "min_response_time": min(times),
-                    "max_response_time": max(times),
-                    "request_count": len(times),
+                    "avg_response_time": summary["avg_ms"] / 1000.0,
+                    "min_response_time": summary["min_ms"] / 1000.0,
+                    "max_response_time": summary["max_ms"] / 1000.0,
+                    "p50_ms": summary["p50_ms"],
+                    "p95_ms": summary["p95_ms"],
+                    "p99_ms": summary["p99_ms"],
+                    "request_count": sketch.count,
                     "error_count": self.error_counts.get(key, 0)
                 }
         
         return stats
 
-    def get_window_stats(self, window_seconds: int = 300, exclude_paths: Optional[set] = None) -> Dict[str, Any]:
-        """Get recent request stats for a fixed time window."""
-        now_ts = time.time()
-        cutoff = now_ts - max(1, int(window_seconds))
+    def get_window_stats(
+        self,
+        window_seconds: int = 300,
+        exclude_paths: Optional[set] = None,
+        per_route: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Recent request stats for a fixed time window (at most SKETCH_RETENTION_SECONDS),
+        merged from the slot sketches; window edges are rounded to SKETCH_SLOT_SECONDS.
+        """
+        window_seconds = max(1, int(window_seconds))
+        first_slot = int((time.time() - window_seconds) // SKETCH_SLOT_SECONDS)
         excluded = exclude_paths or set()
 
-        recent = [
-            event for event in self.request_events
-            if event.get("timestamp", 0) >= cutoff and event.get("path") not in excluded
-        ]
-        durations_ms = [float(event.get("duration_ms", 0.0)) for event in recent]
-        request_count = len(recent)
-        error_count = sum(1 for event in recent if int(event.get("status_code", 0)) >= 500)
+        overall = LatencySketch()
+        error_count = 0
+        routes: Dict[str, Dict[str, Any]] = {}
+        for slot, sketches in reversed(self._slots):
+            if slot < first_slot:
+                break
+            for (method, path, status), sketch in sketches.items():
+                if path in excluded:
+                    continue
+                overall.merge(sketch)
+                if status == "5xx":
+                    error_count += sketch.count
+                if per_route:
+                    route = routes.setdefault(f"{method} {path}", {"sketch": LatencySketch(), "status": {}})
+                    route["sketch"].merge(sketch)
+                    route["status"][status] = route["status"].get(status, 0) + sketch.count
 
-        return {
-            "window_seconds": int(window_seconds),
+        request_count = overall.count
+        stats = {
+            "window_seconds": window_seconds,
             "request_count": request_count,
             "error_count": error_count,
             "error_rate_pct": (float(error_count) / request_count * 100.0) if request_count else 0.0,
-            "durations_ms": durations_ms,
+            "latency_p50_ms": overall.percentile(0.50),
+            "latency_p95_ms": overall.percentile(0.95),
+            "latency_p99_ms": overall.percentile(0.99),
         }
+        if per_route:
+            stats["routes"] = {
+                key: {**route["sketch"].summary(), "status": route["status"]}
+                for key, route in sorted(routes.items())
+            }
+        return stats
 
 # Global performance monitor
 performance_monitor = PerformanceMonitor()
 
-def log_request_performance(request: Request, duration: float, status_code: int = 200):
-    """Log request performance metrics."""
+def log_request_performance(scope: Dict[str, Any], duration: float, status_code: int = 200):
+    """Log request performance metrics for an HTTP ASGI scope."""
+    method, path = scope["method"], scope["path"]
+    # Key by route template ("/gestures/{session_id}") so per-route sketches stay bounded
+    route = scope.get("route")
     performance_monitor.record_request(
-        request.url.path,
-        request.method,
+        getattr(route, "path", None) or "<unmatched>",
+        method,
         duration,
         status_code=status_code,
     )
@@ -281,10 +452,10 @@ def log_request_performance(request: Request, duration: float, status_code: int
     # Log slow requests
     if duration > 1.0:  # Log requests taking more than 1 second
         logger.warning(
-            f"Slow request: {request.method} {request.url.path} took {duration:.2f}s",
+            f"Slow request: {method} {path} took {duration:.2f}s",
             extra={
                 "duration": duration,
-                "path": request.url.path,
-                "method": request.method
+                "path": path,
+                "method": method
             }
-        ) 
+        )
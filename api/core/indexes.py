@@ -1,31 +1,216 @@
 """
-Indexes setup for MongoDB collections in the sign glove system.
+Index management for MongoDB collections in the sign glove system.
 
-- create_indexes: Ensures indexes exist for efficient queries on sensor, model, training, and gesture collections.
+- INDEX_SPECS: Declared indexes per collection, each tied to the query shape it serves.
+- _hot_queries: Representative hot-path query shapes whose plans are audited with explain().
+- create_indexes: Ensures the sensor time-series collection and all declared indexes exist.
+- audit_query_plans: Explains every hot query and reports those that fall back to a COLLSCAN.
+- index_usage_stats: Per-index access counters ($indexStats) for the admin endpoint.
 """
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
 from api.core.database import (
     sensor_collection,
+    sensor_samples_collection,
     model_collection,
     gestures_collection,
-    training_collection
+    training_collection,
+    feedback_collection,
+    label_stats_collection,
 )
+from services.sensor_store import EXPORT_SORT, sensor_store
+
+logger = logging.getLogger("signglove.indexes")
+
+# (collection, keys, query shape served)
+INDEX_SPECS = [
+    # Sensor samples (time-series)
+    (sensor_samples_collection, [("meta.session_id", ASCENDING), ("timestamp", ASCENDING)], "session reads, relabel/delete"),
+    (sensor_samples_collection, [("meta.label", ASCENDING), ("timestamp", DESCENDING)], "label-filtered export"),
+    (sensor_samples_collection, [("seq", ASCENDING), ("timestamp", DESCENDING)], "monitoring batch counts by time range"),
+    # Also walked backwards for latest-sample and descending range reads
+    (sensor_samples_collection, EXPORT_SORT, "latest sample, range/full export, delete"),
+    # Legacy sensor batches awaiting migration
+    (sensor_collection, [("session_id", ASCENDING)], "legacy session lookups"),
+    (sensor_collection, [("gesture_label", ASCENDING)], "legacy label summary"),
+    (sensor_collection, [("timestamp", DESCENDING)], "legacy latest/range queries"),
+    # Feedback: $match model_id, $group true_label over is_correct (covered)
+    (feedback_collection, [("model_id", ASCENDING), ("true_label", ASCENDING), ("is_correct", ASCENDING)], "per-model feedback stats"),
+    (feedback_collection, [("timestamp", DESCENDING)], "recent feedback"),
+    # Materialized per-label stats: summary reads all "samples" docs plus one model's "feedback" docs
+    (label_stats_collection, [("kind", ASCENDING), ("model_id", ASCENDING)], "gesture summary / feedback stats"),
+    # Model results
+    (model_collection, [("model_name", ASCENDING)], "model lookups"),
+    (model_collection, [("timestamp", DESCENDING)], "latest model result"),
+    # Training sessions
+    (training_collection, [("model_name", ASCENDING)], "training history per model"),
+    (training_collection, [("started_at", ASCENDING)], "training timeline"),
+    # Gestures
+    (gestures_collection, [("session_id", ASCENDING)], "gesture session lookups"),
+    (gestures_collection, [("label", ASCENDING)], "gesture label lookups"),
+]
+
+AUDIT_PLACEHOLDER = "__index_audit__"
+
+
+def _hot_queries() -> List[Dict[str, Any]]:
+    since = datetime.now(timezone.utc) - timedelta(minutes=5)
+    return [
+        {
+            "name": "feedback_stats_by_model",
+            "collection": feedback_collection,
+            "pipeline": [
+                {"$match": {"model_id": AUDIT_PLACEHOLDER}},
+                {"$group": {"_id": "$true_label", "total": {"$sum": 1}}},
+            ],
+        },
+        {
+            "name": "label_stats_summary",
+            "collection": label_stats_collection,
+            "filter": {"$or": [{"kind": "samples"}, {"kind": "feedback", "model_id": AUDIT_PLACEHOLDER}]},
+        },
+        {
+            "name": "sensor_session_samples",
+            "collection": sensor_samples_collection,
+            "filter": {"meta.session_id": AUDIT_PLACEHOLDER},
+            "sort": {"timestamp": 1},
+        },
+        {
+            "name": "sensor_label_export",
+            "collection": sensor_samples_collection,
+            "filter": {"meta.label": AUDIT_PLACEHOLDER},
+            "sort": {"timestamp": -1},
+        },
+        {
+            "name": "sensor_full_export",
+            "collection": sensor_samples_collection,
+            "filter": {},
+            "sort": dict(EXPORT_SORT),
+        },
+        {
+            "name": "monitoring_batch_count",
+            "collection": sensor_samples_collection,
+            "filter": {"seq": 0, "timestamp": {"$gte": since}},
+        },
+        {
+            "name": "legacy_session_lookup",
+            "collection": sensor_collection,
+            "filter": {"session_id": AUDIT_PLACEHOLDER},
+        },
+        {
+            "name": "latest_model_result",
+            "collection": model_collection,
+            "filter": {},
+            "sort": {"timestamp": -1},
+            "limit": 1,
+        },
+    ]
+
+
+_last_audit: Dict[str, Any] = {}
+
 
 async def create_indexes():
     """
-    Create indexes on key fields for all main collections to optimize query performance.
+    Create the sensor time-series collection and every index declared in INDEX_SPECS.
     """
-    # Sensor data
-    await sensor_collection.create_index("session_id")
-    await sensor_collection.create_index("gesture_label")
-    await sensor_collection.create_index("timestamp")
+    await sensor_store.ensure_collection()
+    for collection, keys, purpose in INDEX_SPECS:
+        try:
+            await collection.create_index(keys)
+        except Exception as e:
+            logger.warning(f"Could not create index {keys} on {collection.name} ({purpose}): {e}")
 
-    # Model results
-    await model_collection.create_index("model_name")
 
-    # Training sessions
-    await training_collection.create_index("model_name")
-    await training_collection.create_index("started_at")
+def _plan_stages(node: Any) -> List[str]:
+    """
+    Stage names of the winning plan(s) in an explain document, however deeply nested
+    (find, aggregate $cursor stages, SBE queryPlan). Rejected plans are ignored.
+    """
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                stages += _plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            stages += _plan_stages(item)
+    return stages
+
+
+async def _explain(query: Dict[str, Any]) -> Dict[str, Any]:
+    collection = query["collection"]
+    if "pipeline" in query:
+        command = {"aggregate": collection.name, "pipeline": query["pipeline"], "cursor": {}}
+    else:
+        command = {"find": collection.name, "filter": query.get("filter", {})}
+        if query.get("sort"):
+            command["sort"] = query["sort"]
+        if query.get("limit"):
+            command["limit"] = query["limit"]
+    return await collection.database.command("explain", command, verbosity="queryPlanner")
+
+
+async def audit_query_plans() -> Dict[str, Any]:
+    """
+    Runs explain() on every registered hot query. Queries whose winning plan contains a
+    COLLSCAN are reported (and logged) so missing indexes show up at startup.
+    """
+    results = []
+    for query in _hot_queries():
+        entry = {"name": query["name"], "collection": query["collection"].name}
+        try:
+            stages = _plan_stages(await _explain(query))
+            entry.update({"stages": stages, "collscan": "COLLSCAN" in stages})
+        except Exception as e:
+            entry.update({"error": str(e), "collscan": None})
+        results.append(entry)
+
+    collscans = [r["name"] for r in results if r.get("collscan")]
+    if collscans:
+        logger.warning(f"Index audit: COLLSCAN in hot queries {collscans}")
+    else:
+        logger.info(f"Index audit: {len(results)} hot queries use indexes")
+
+    _last_audit.clear()
+    _last_audit.update({
+        "audited_at": datetime.now(timezone.utc).isoformat(),
+        "collscans": collscans,
+        "queries": results,
+    })
+    return dict(_last_audit)
+
+
+def last_audit() -> Optional[Dict[str, Any]]:
+    return dict(_last_audit) if _last_audit else None
+
 
-    # Gestures (optional — only if needed)
-    await gestures_collection.create_index("session_id")
-    await gestures_collection.create_index("label")
+async def index_usage_stats() -> Dict[str, List[Dict[str, Any]]]:
+    """$indexStats per collection in INDEX_SPECS: index name, key, ops since the server started tracking."""
+    stats: Dict[str, List[Dict[str, Any]]] = {}
+    seen = []
+    for collection, _, _ in INDEX_SPECS:
+        if collection.name in seen:
+            continue
+        seen.append(collection.name)
+        try:
+            rows = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+        except Exception as e:
+            stats[collection.name] = [{"error": str(e)}]
+            continue
+        stats[collection.name] = [
+            {
+                "name": row.get("name"),
+                "key": row.get("key"),
+                "ops": int((row.get("accesses") or {}).get("ops", 0)),
+                "since": (row.get("accesses") or {}).get("since"),
+            }
+            for row in rows
+        ]
+    return stats
@@ -1,195 +1,225 @@
 """
 Middleware for performance monitoring, logging, and security.
+
+Both middlewares are pure ASGI: they wrap `send` instead of going through
+BaseHTTPMiddleware, so a request costs no extra task hop or response wrapping.
+- RequestMiddleware: timing (X-Response-Time), security headers, request/response
+  logging, error responses and the route role debug log in a single pass.
+- RateLimitMiddleware: O(1) sliding-window limits per client and route/role,
+  shared through Redis when available (see api.core.rate_limit).
+
+scripts/bench_middleware.py measures the per-request overhead of the stack.
 """
 import time
 import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from api.core.error_handler import performance_monitor, log_request_performance
-from api.core.auth import get_required_role_for_path
+from http.cookies import SimpleCookie
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request
+from jose import JWTError
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from api.core.error_handler import log_request_performance, create_error_response
+from api.core.auth import decode_token, get_required_role_for_path
+from api.core.rate_limit import WINDOW_SECONDS, MemoryRateLimiter, RedisRateLimiter
+from api.core.settings import settings
+import redis.asyncio
 
 logger = logging.getLogger("signglove")
 
-class PerformanceMiddleware(BaseHTTPMiddleware):
-    """Middleware to monitor request performance."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log performance metrics
-        log_request_performance(request, duration, status_code=response.status_code)
-        
-        # Add performance headers
-        response.headers["X-Response-Time"] = f"{duration:.3f}s"
-        
-        return response
-
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        return response
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for request/response logging."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Log incoming request
-        logger.info(
-            f"Request: {request.method} {request.url.path}",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "client_ip": request.client.host if request.client else None,
-                "user_agent": request.headers.get("user-agent")
-            }
-        )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Log response
+SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+)
+PUBLIC_ROUTES = ("/auth/login", "/auth/refresh", "/health", "/docs", "/redoc", "/openapi.json")
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class RequestMiddleware:
+    """Performance, security headers, logging and error handling for HTTP requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method, path = scope["method"], scope["path"]
         logger.info(
-            f"Response: {request.method} {request.url.path} - {response.status_code}",
+            f"Request: {method} {path}",
             extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "content_length": response.headers.get("content-length", 0)
+                "method": method,
+                "path": path,
+                "client_ip": _client_ip(scope),
+                "user_agent": _header(scope, b"user-agent"),
             }
         )
-        
-        return response
+        if logger.isEnabledFor(logging.DEBUG) and not (path in PUBLIC_ROUTES or path.startswith("/static")):
+            # Actual auth is handled by FastAPI dependencies
+            logger.debug(f"Route {path} requires role: {get_required_role_for_path(path)}")
 
-import time
-import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from api.core.error_handler import performance_monitor, log_request_performance
-from api.core.auth import get_required_role_for_path
-from api.core.settings import settings
-import redis
+        response_started = False
 
-logger = logging.getLogger("signglove")
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                duration = time.perf_counter() - start_time
+                status_code = message["status"]
+                log_request_performance(scope, duration, status_code=status_code)
 
-# --- Redis Rate Limiting ---
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Response-Time", f"{duration:.3f}s")
+                for name, value in SECURITY_HEADERS:
+                    headers.append(name, value)
+
+                logger.info(
+                    f"Response: {method} {path} - {status_code}",
+                    extra={
+                        "method": method,
+                        "path": path,
+                        "status_code": status_code,
+                        "content_length": headers.get("content-length", 0)
+                    }
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started:
+                raise
+            response = create_error_response(e, Request(scope))
+            await response(scope, receive, send_wrapper)
+
+# --- Rate Limiting ---
 
 def get_redis_client():
-    """Create a Redis client for rate limiting (DB 1)."""
+    """Create an asyncio Redis client for rate limiting (DB 1)."""
     try:
         # Construct DB-specific URL for rate limiting
         base_url = settings.REDIS_URL.rsplit('/', 1)[0]
         rate_limit_url = f"{base_url}/{settings.REDIS_RATE_LIMIT_DB}"
-        return redis.from_url(rate_limit_url, decode_responses=True)
+        return redis.asyncio.from_url(rate_limit_url, decode_responses=True)
     except Exception as e:
         logger.error(f"Failed to connect to Redis for rate limiting: {e}")
         return None
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Redis-backed rate limiting middleware."""
-    
-    def __init__(self, app, requests_per_minute: int = 60, exclude_prefixes=None):
-        super().__init__(app)
+
+def _token_claims(scope: Scope) -> Optional[Dict[str, Any]]:
+    """Claims of a valid bearer/cookie access token, else None."""
+    token = None
+    auth = _header(scope, b"authorization")
+    if auth and auth.lower().startswith("bearer "):
+        token = auth.split(" ", 1)[1].strip()
+    if not token:
+        cookie = _header(scope, b"cookie")
+        if cookie and "access_token=" in cookie:
+            token = SimpleCookie(cookie).get("access_token")
+            token = token.value if token else None
+    if not token:
+        return None
+    try:
+        return decode_token(token, settings.SECRET_KEY, [settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+
+
+class RateLimitMiddleware:
+    """
+    Sliding-window rate limiting per client (JWT subject, else IP). Limits come from
+    the first matching route prefix, else the client's role, else the default.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        exclude_prefixes=None,
+        route_limits: Optional[Dict[str, int]] = None,
+        role_limits: Optional[Dict[str, int]] = None,
+        backend: str = "memory",
+    ):
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.exclude_prefixes = exclude_prefixes or []
-        self.redis = get_redis_client()
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Skip if Redis is unavailable
-        if not self.redis:
-            return await call_next(request)
-
-        client_ip = request.client.host if request.client else "unknown"
-        path = request.url.path or ""
-        
-        # Skip excluded paths
-        for prefix in self.exclude_prefixes:
+        self.exclude_prefixes = tuple(exclude_prefixes or ())
+        # Longest prefix first so "/sensor-data/batch" can override "/sensor-data"
+        self.route_limits = sorted((route_limits or {}).items(), key=lambda item: -len(item[0]))
+        self.role_limits = role_limits or {}
+        self.memory = MemoryRateLimiter()
+        self.redis = None
+        if backend == "redis":
+            client = get_redis_client()
+            self.redis = RedisRateLimiter(client) if client else None
+        self._redis_retry_at = 0.0
+
+    def _limit_for(self, scope: Scope) -> Tuple[str, str, int]:
+        """(client key, bucket, limit) for a request."""
+        claims = _token_claims(scope) if self.role_limits else None
+        subject = claims.get("sub") if claims else None
+        client = f"user:{subject}" if subject else f"ip:{_client_ip(scope) or 'unknown'}"
+        path = scope["path"]
+        for prefix, limit in self.route_limits:
             if path.startswith(prefix):
-                return await call_next(request)
-        
-        try:
-            # Use Redis INCR and EXPIRE for sliding window (1 minute)
-            key = f"ratelimit:{client_ip}"
-            current_count = self.redis.incr(key)
-            
-            if current_count == 1:
-                self.redis.expire(key, 60)
-            
-            if current_count % 10 == 0:
-                logger.debug(f"Rate limit check for {client_ip}: {current_count}/{self.requests_per_minute}")
-            
-            if current_count > self.requests_per_minute:
-                logger.warning(f"Rate limit exceeded for IP: {client_ip} (count: {current_count}, limit: {self.requests_per_minute})")
-                return Response(
-                    content='{"error": "Rate limit exceeded"}',
-                    status_code=429,
-                    media_type="application/json"
-                )
-        except Exception as e:
-            logger.error(f"Rate limiting error: {e}")
-            # Fail open if Redis fails during request
-            return await call_next(request)
-        
-        return await call_next(request)
-
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    """Middleware for centralized error handling."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
-            from api.core.error_handler import create_error_response
-            return create_error_response(e, request)
-
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    """Middleware to check authentication for protected routes."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Skip authentication for public routes
-        public_routes = ["/auth/login", "/auth/refresh", "/health", "/docs", "/redoc", "/openapi.json"]
-        
-        if request.url.path in public_routes or request.url.path.startswith("/static"):
-            return await call_next(request)
-        
-        # Check if route requires authentication
-        required_role = get_required_role_for_path(request.url.path)
-        
-        # For now, just log the required role (actual auth is handled by FastAPI dependencies)
-        logger.debug(f"Route {request.url.path} requires role: {required_role}")
-        
-        return await call_next(request)
+                return client, prefix, limit
+        role = claims.get("role") if claims else None
+        return client, "*", self.role_limits.get(role, self.requests_per_minute)
+
+    async def _hit(self, key: str, limit: int) -> Tuple[bool, int]:
+        if self.redis is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                return await self.redis.hit(key, limit)
+            except Exception as e:
+                # Per-process limits while Redis is unavailable; retry it after a pause
+                self._redis_retry_at = time.monotonic() + settings.REDIS_RETRY_SECONDS
+                logger.error(f"Rate limiting error, using in-memory limits for {settings.REDIS_RETRY_SECONDS}s: {e}")
+        return self.memory.hit_sync(key, limit)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        client, bucket, limit = self._limit_for(scope)
+        allowed, count = await self._hit(f"{client}|{bucket}", limit)
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {client} on {bucket} (count: {count}, limit: {limit})")
+            response = Response(
+                content='{"error": "Rate limit exceeded"}',
+                status_code=429,
+                media_type="application/json",
+                headers={"Retry-After": str(WINDOW_SECONDS), "X-RateLimit-Limit": str(limit)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
 
 def setup_middleware(app):
     """Setup all middleware for the FastAPI app."""
-    app.add_middleware(ErrorHandlingMiddleware)
-    app.add_middleware(PerformanceMiddleware)
-    app.add_middleware(SecurityMiddleware)
-    app.add_middleware(LoggingMiddleware)
-    from api.core.settings import settings
+    app.add_middleware(RequestMiddleware)
     app.add_middleware(
         RateLimitMiddleware,
         requests_per_minute=settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
-        exclude_prefixes=settings.RATE_LIMIT_EXCLUDE_PREFIXES
+        exclude_prefixes=settings.RATE_LIMIT_EXCLUDE_PREFIXES,
+        route_limits=settings.RATE_LIMIT_ROUTE_LIMITS,
+        role_limits=settings.RATE_LIMIT_ROLE_LIMITS,
+        backend=settings.RATE_LIMIT_BACKEND,
     )
-    app.add_middleware(AuthenticationMiddleware) 
@@ -12,24 +12,23 @@ preserved as a fallback.
 import numpy as np
 import os
 import logging
+import threading
 import httpx
 from api.core.settings import settings
+from api.utils.lazy_imports import optional_import
 
 logger = logging.getLogger("signglove")
 
-# ---------------------------------------------------------------------------
-# Try importing TensorFlow, but it may not be available in the API-only image.
-# ---------------------------------------------------------------------------
-try:
-    import tensorflow as tf  # type: ignore
-except Exception as exc:  # pragma: no cover
-    tf = None
-    logger.info("TensorFlow unavailable in this container (expected for API-only image): %s", exc)
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
 
 
 def load_model():
     """Loads the TFLite model and returns the interpreter (local fallback only)."""
     try:
+        # TensorFlow may not be available in the API-only image
+        tf = optional_import("tensorflow")
         if tf is None:
             logger.info("Skipping local TFLite model load; will forward to ml-tensorflow service")
             return None
@@ -45,8 +44,15 @@ def load_model():
         return None
 
 
-# Load the model once at import time (will be None when TF is unavailable).
-model = load_model()
+def get_model():
+    """The TFLite interpreter, loaded on the first local prediction (None when TF is unavailable)."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                _model = load_model()
+                _model_loaded = True
+    return _model
 
 LABEL_MAP = {0: "Hello", 1: "Yes", 2: "No", 3: "We", 4: "Are", 5: "Students", 6: "Rest"}
 
@@ -71,7 +77,10 @@ def predict_gesture(values: list) -> dict:
     Delegates to local TFLite interpreter or external ml-tensorflow service.
     """
     # Prefer remote service when runtime services are enabled or TF is not installed.
-    if settings.USE_RUNTIME_SERVICES or model is None:
+    if settings.USE_RUNTIME_SERVICES:
+        return _predict_remote(values)
+    model = get_model()
+    if model is None:
         return _predict_remote(values)
 
     # Local TFLite fallback (native dev without Docker)
@@ -0,0 +1,99 @@
+"""
+Sliding-window-counter rate limiting.
+
+A client's rate is estimated from two fixed-window counters: the current window's
+count plus the previous window's count weighted by how much of it still overlaps
+the sliding window. Each request is O(1) in time and memory per key.
+
+- MemoryRateLimiter: per-process counters (single replica, or Redis fallback).
+- RedisRateLimiter: the same algorithm as one atomic Lua script, so limits hold
+  across API replicas.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger("signglove.rate_limit")
+
+WINDOW_SECONDS = 60
+MAX_MEMORY_KEYS = 100_000
+
+# KEYS: current window counter, previous window counter
+# ARGV: previous window weight, limit, counter TTL (s)
+# Returns {allowed (0/1), estimated count including this request if allowed}
+SLIDING_WINDOW_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimated = previous * tonumber(ARGV[1]) + current
+if estimated >= tonumber(ARGV[2]) then
+    return {0, math.floor(estimated)}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+end
+return {1, math.floor(estimated + 1)}
+"""
+
+
+def window_position(now: float, window_seconds: int = WINDOW_SECONDS) -> Tuple[int, float]:
+    """(current window index, weight of the previous window in the sliding window)."""
+    index = int(now // window_seconds)
+    return index, 1.0 - (now - index * window_seconds) / window_seconds
+
+
+class MemoryRateLimiter:
+    def __init__(self, window_seconds: int = WINDOW_SECONDS, max_keys: int = MAX_MEMORY_KEYS):
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        # key -> [window index, current count, previous count], least recently used first
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    async def hit(self, key: str, limit: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        return self.hit_sync(key, limit, now)
+
+    def hit_sync(self, key: str, limit: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        """Counts a request for `key` if under `limit`. Returns (allowed, estimated count)."""
+        index, weight = window_position(time.time() if now is None else now, self.window_seconds)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [index, 0, 0]
+        else:
+            self._entries.move_to_end(key)
+            if entry[0] != index:
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[0], entry[1] = index, 0
+        self._evict(index)
+
+        estimated = entry[2] * weight + entry[1]
+        if estimated >= limit:
+            return False, int(estimated)
+        entry[1] += 1
+        return True, int(estimated + 1)
+
+    def _evict(self, index: int):
+        # Keys untouched for two windows carry no weight; the LRU end holds the stalest
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest[0] >= index - 1 and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisRateLimiter:
+    def __init__(self, client, window_seconds: int = WINDOW_SECONDS, prefix: str = "ratelimit"):
+        self.window_seconds = window_seconds
+        self.prefix = prefix
+        self._script = client.register_script(SLIDING_WINDOW_LUA)
+
+    async def hit(self, key: str, limit: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        index, weight = window_position(time.time() if now is None else now, self.window_seconds)
+        allowed, estimated = await self._script(
+            keys=[f"{self.prefix}:{key}:{index}", f"{self.prefix}:{key}:{index - 1}"],
+            args=[weight, limit, self.window_seconds * 2],
+        )
+        return bool(allowed), int(estimated)
@@ -31,6 +31,8 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field("HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(60)
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(7)
+    # How long an authenticated user record is reused before re-reading it (0 disables)
+    AUTH_USER_CACHE_TTL_SECONDS: int = Field(30)
     
     # Database
     MONGO_URI: str = Field("mongodb://localhost:27017")
@@ -42,6 +44,9 @@ class Settings(BaseSettings):
     # Redis for Celery and Rate Limiting
     REDIS_URL: str = Field("redis://localhost:6379/0")
     REDIS_RATE_LIMIT_DB: int = Field(1)
+    REDIS_CACHE_DB: int = Field(2)
+    # After a Redis error, rate limiting and the response cache run locally for this long
+    REDIS_RETRY_SECONDS: int = Field(30)
 
     
     # Model/data paths
@@ -69,8 +74,25 @@ class Settings(BaseSettings):
     TTS_RATE: int = Field(150)
     TTS_VOLUME: float = Field(2.0)
     TTS_CACHE_ENABLED: bool = Field(True)
-    TTS_CACHE_DIR: str = Field("tts_cache")
+    # Under DATA_DIR (the shared ./storage volume in Docker) so the API and the Celery worker see the same files
+    TTS_CACHE_DIR: str = Field(os.path.join(DATA_DIR, "tts_cache"))
     TTS_FILTER_IDLE_GESTURES: bool = Field(True)
+    TTS_CACHE_MAX_BYTES: int = Field(256 * 1024 * 1024)  # disk budget, least recently used files evicted
+    TTS_CACHE_MEMORY_BYTES: int = Field(16 * 1024 * 1024)  # in-memory audio LRU
+    # Free text (not a gesture phrase) has its own LRU under TTS_CACHE_DIR/text, so it never evicts phrases
+    TTS_TEXT_CACHE_MAX_BYTES: int = Field(32 * 1024 * 1024)
+    TTS_TEXT_CACHE_MEMORY_BYTES: int = Field(2 * 1024 * 1024)
+    TTS_WARMUP_ON_STARTUP: bool = Field(True)  # pre-synthesize every gesture phrase (edge/gtts)
+    TTS_WARMUP_VOICES: List[str] = Field([])  # edge voices to warm; empty means TTS_VOICE
+    TTS_ESP32_BUNDLE_DIR: str = Field(os.path.join(DATA_DIR, "tts_bundles"))  # versioned SD card bundles (services.esp32_tts_bundle)
+    TTS_ESP32_BUNDLE_CONCURRENCY: int = Field(4)
+    TTS_ESP32_BUNDLE_KEEP: int = Field(3)
+
+    # Voice recognition (services.voice.transcriber)
+    VOICE_WHISPER_MODEL: str = Field("base")  # tiny / base / small / medium / large
+    VOICE_WHISPER_IDLE_UNLOAD_SECONDS: int = Field(600)  # 0 keeps the model loaded
+    VOICE_TRANSCRIBE_WORKERS: int = Field(1)
+    VOICE_TRANSCRIBE_QUEUE: int = Field(8)
     
     # Class variable for TTS configuration
     TTS_CONFIG: ClassVar[Dict[str, Any]] = {
@@ -110,6 +132,16 @@ class Settings(BaseSettings):
     MAX_REQUEST_SIZE: int = Field(10 * 1024 * 1024)  # 10MB
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = Field(60)
     RATE_LIMIT_EXCLUDE_PREFIXES: List[str] = Field(["/predict/integrated"])
+    RATE_LIMIT_BACKEND: str = Field("redis")  # "redis" (shared across replicas, memory fallback) or "memory"
+    # Path prefix -> requests/minute, counted separately from the client's other traffic (JSON object in env)
+    RATE_LIMIT_ROUTE_LIMITS: Dict[str, int] = Field({"/sensor-data": 1200})
+    # JWT role -> requests/minute for authenticated clients (others use RATE_LIMIT_REQUESTS_PER_MINUTE)
+    RATE_LIMIT_ROLE_LIMITS: Dict[str, int] = Field({"editor": 300, "admin": 600})
+    # Endpoint response cache (api.utils.cache): "memory" or "redis" (shared across replicas)
+    CACHE_BACKEND: str = Field("memory")
+    CACHE_MAX_ENTRIES: int = Field(1024)
+    # Publish/receive tag invalidations over Redis pub/sub (needed with several replicas or Celery writers)
+    CACHE_INVALIDATION_PUBSUB: bool = Field(True)
     
     # API configuration
     API_V1_STR: str = "/api/v1"
@@ -126,6 +158,7 @@ class Settings(BaseSettings):
 
     # Runtime flags
     RUNTIME_PREFLIGHT_ON_STARTUP: bool = Field(True)
+    INDEX_AUDIT_ON_STARTUP: bool = Field(True)
     USE_RUNTIME_SERVICES: bool = Field(False)
     ML_TENSORFLOW_URL: str = Field("http://ml-tensorflow:8091")
     ML_PYTORCH_URL: str = Field("http://ml-pytorch:8092")
@@ -140,6 +173,7 @@ class Settings(BaseSettings):
     # Monitoring thresholds (dashboard alerts)
     MONITORING_WINDOW_SECONDS: int = Field(300)
     MONITORING_CACHE_TTL_SECONDS: int = Field(15)
+    MONITORING_ROLLUP_INTERVAL_SECONDS: int = Field(60)  # 0 disables the minute-bucket aggregator
     MONITORING_RUNTIME_HEALTH_TIMEOUT_SECONDS: float = Field(1.5)
     MONITORING_WARN_ERROR_RATE_5M_PCT: float = Field(2.0)
     MONITORING_CRIT_ERROR_RATE_5M_PCT: float = Field(5.0)
@@ -16,11 +16,14 @@ from api.routes import (
 )
 
 from api.ingestion.streaming.live_data import get_latest_data
-from api.core.indexes import create_indexes 
+from api.core.indexes import create_indexes, audit_query_plans
+from services.label_stats_service import label_stats_service
+from services.dashboard.monitoring_rollups import monitoring_rollups
+from api.utils.cache import cache
+from services.tts_service import tts_service
 from api.core.database import client, test_connection
 from api.core.settings import settings
 from api.core.runtime_preflight import run_runtime_preflight
-from api.core.model import model, predict_gesture
 from api.routes.auth_routes import (
     role_required_dep as role_required,
     role_or_internal_dep as role_or_internal,
@@ -44,6 +47,7 @@ logger = logging.getLogger("signglove")
 async def lifespan(app: FastAPI):
     await test_connection() 
     await create_indexes()
+    await label_stats_service.bootstrap()
     await ensure_default_users()
     logging.info("Indexes created. App is starting...")
     logging.info(
@@ -56,6 +60,22 @@ async def lifespan(app: FastAPI):
         settings.MODEL_LIBRARY_DIR,
     )
 
+    if settings.INDEX_AUDIT_ON_STARTUP:
+        try:
+            await audit_query_plans()
+        except Exception as exc:
+            logging.warning("Index audit failed: %s", exc)
+
+    if settings.MONITORING_ROLLUP_INTERVAL_SECONDS > 0:
+        monitoring_rollups.start(settings.MONITORING_ROLLUP_INTERVAL_SECONDS)
+
+    cache.start_listener()
+
+    tts_warmup = None
+    if settings.TTS_ENABLED and settings.TTS_WARMUP_ON_STARTUP:
+        # Runs in the background; requests for not-yet-warm phrases synthesize on demand
+        tts_warmup = asyncio.create_task(tts_service.warmup())
+
     if settings.RUNTIME_PREFLIGHT_ON_STARTUP:
         try:
             preflight = run_runtime_preflight()
@@ -63,12 +83,16 @@ async def lifespan(app: FastAPI):
         except Exception as exc:
             logging.warning("Runtime preflight failed: %s", exc)
 
-    if model is None:
-        logging.info("Local TFLite model is not loaded; predictions will be forwarded to ml-tensorflow service.")
+    if settings.USE_RUNTIME_SERVICES:
+        logging.info("Predictions will be forwarded to ml-tensorflow service.")
     else:
-        logging.info(f"Legacy local TFLite fallback loaded successfully from: {settings.LEGACY_TFLITE_MODEL_PATH}")
+        logging.info(f"Legacy local TFLite fallback loads on first prediction from: {settings.LEGACY_TFLITE_MODEL_PATH}")
 
     yield
+    if tts_warmup is not None and not tts_warmup.done():
+        tts_warmup.cancel()
+    await cache.stop_listener()
+    await monitoring_rollups.stop()
     client.close()
     logging.info("MongoDB connection closed. App is shutting down...")
 
@@ -8,7 +8,8 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
 from api.core.settings import settings
 from api.routes.auth_routes import role_or_internal_dep, get_current_user_dep
@@ -38,6 +39,21 @@ class ReviewCsvRequest(BaseModel):
 class CsvOrderRequest(BaseModel):
     names: List[str]
 
+class FusionExportRequest(BaseModel):
+    cv_name: str
+    sensor_name: str
+    # None = estimate by cross-correlation in the export job
+    offset_ms: Optional[float] = None
+    trim_in_pct: float = 0
+    trim_out_pct: float = 100
+    mode: str = "single"
+
+class FusionOffsetRequest(BaseModel):
+    cv_name: str
+    sensor_name: str
+    rate_hz: float = Field(100.0, gt=0, le=1000)
+    max_lag_ms: float = Field(5000.0, gt=0, le=600000)
+
 # --- Helpers ---
 
 def get_job_status(job_id: str) -> Dict[str, Any]:
@@ -147,16 +163,16 @@ async def list_csv_files(
     return {"status": "success", "files": result}
 
 @router.post("/files/scan-all")
-async def trigger_all_scans(user: User = Depends(role_or_internal_dep("admin"))):
+async def trigger_all_scans(
+    include_archived: bool = Query(True),
+    user: User = Depends(role_or_internal_dep("admin")),
+):
     """
-    Triggers a background scan for all datasets that don't have up-to-date metadata.
+    Queues a single library scan job. Files are scanned in parallel chunks and
+    unchanged files (same content hash as their last scan) are skipped.
     """
-    files = dataset_service.list_datasets(include_archived=True)
-    job_ids = []
-    for f in files:
-        job_id = dataset_service.trigger_scan(f["name"], user_id=user.id)
-        job_ids.append(job_id)
-    return {"status": "success", "triggered_count": len(job_ids), "job_ids": job_ids}
+    job_id = dataset_service.trigger_library_scan(user_id=user.id, include_archived=include_archived)
+    return {"status": "success", "job_id": job_id, "message": "Library scan queued"}
 
 @router.get("/selection")
 async def get_selected_dataset(
@@ -238,6 +254,47 @@ async def trigger_dataset_scan(name: str, user: User = Depends(role_or_internal_
     job_id = dataset_service.trigger_scan(name, user_id=user.id)
     return {"status": "success", "job_id": job_id, "message": "Scan task triggered in background"}
 
+@router.post("/fusion-offset")
+async def estimate_fusion_offset(
+    req: FusionOffsetRequest,
+    _user=Depends(role_or_internal_dep("admin")),
+):
+    """
+    Estimates the sensor->CV `offset_ms` by cross-correlating CV wrist speed with
+    sensor accel magnitude over +-max_lag_ms.
+    """
+    from services.fusion_service import fusion_service
+
+    try:
+        result = await run_in_threadpool(
+            fusion_service.estimate_offset, req.cv_name, req.sensor_name, req.rate_hz, req.max_lag_ms
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "alignment": result}
+
+@router.post("/fusion-export")
+async def export_fused_dataset(
+    req: FusionExportRequest,
+    user: User = Depends(role_or_internal_dep("admin")),
+):
+    """
+    Queues the linear interpolation merge of CV and Sensor data as a background job.
+    The fused CSV lands in the active library and is scanned automatically.
+    """
+    try:
+        dataset_service.resolve_csv_path(req.cv_name)
+        dataset_service.resolve_csv_path(req.sensor_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    job_id = dataset_service.trigger_fusion_export(req.model_dump(), user_id=user.id)
+    return {"status": "success", "job_id": job_id, "message": "Fusion export queued"}
+
 @router.get("/jobs/{job_id}")
 async def get_dataset_job_status(job_id: str, _user=Depends(role_or_internal_dep("admin"))):
     return {"status": "success", "job": await get_job_record_status(job_id)}
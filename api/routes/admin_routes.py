@@ -4,13 +4,19 @@ API routes for admin operations in the sign glove system.
 Endpoints:
 - GET /admin/: Admin API root/status
 - DELETE /admin/sensor-data: Delete all sensor data.
+- POST /admin/sensor-data/migrate-timeseries: Move legacy sensor data into the time-series collection.
+- POST /admin/label-stats/rebuild: Recompute the materialized per-label summary.
+- GET /admin/indexes: Index usage stats and the latest query plan audit.
+- POST /admin/indexes/audit: Re-run the query plan audit.
 - DELETE /admin/csv-data: Delete all CSV data files.
 """
 from fastapi import APIRouter, HTTPException, Depends
-from api.core.database import sensor_collection
+from services.sensor_store import sensor_store
+from services.label_stats_service import label_stats_service
+from api.core.indexes import audit_query_plans, index_usage_stats, last_audit
 import logging
 from pathlib import Path
-from api.routes.auth_routes import role_or_internal_dep
+from api.routes.auth_routes import role_or_internal_dep, role_required_dep
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -25,13 +31,49 @@ async def clear_sensor_data(_user=Depends(role_or_internal_dep("editor"))):
     Delete all sensor data from the database.
     """
     try:
-        result = await sensor_collection.delete_many({})
-        logging.info(f"Deleted {result.deleted_count} sensor documents")
-        return {"status": "success", "deleted": result.deleted_count}
+        deleted = await sensor_store.clear()
+        logging.info(f"Deleted {deleted} sensor samples/documents")
+        return {"status": "success", "deleted": deleted}
     except Exception as e:
         logging.error(f"Failed to clear sensor data: {e}")
         raise HTTPException(status_code=500, detail="Failed to clear sensor data")
 
+@router.post("/sensor-data/migrate-timeseries")
+async def migrate_sensor_data_to_timeseries(user=Depends(role_required_dep("admin"))):
+    """
+    Queues the move of legacy sensor_data documents into the sensor_samples
+    time-series collection. Reads include unmigrated documents meanwhile.
+    """
+    job_id = sensor_store.trigger_migration(user_id=user.id)
+    return {"status": "success", "job_id": job_id, "message": "Sensor time-series migration queued"}
+
+@router.post("/label-stats/rebuild")
+async def rebuild_label_stats(_user=Depends(role_required_dep("admin"))):
+    """
+    Recomputes label_stats from the sensor samples and feedback collections.
+    Only needed after writes that bypassed the API (e.g. manual imports).
+    """
+    try:
+        await label_stats_service.rebuild_all()
+        return {"status": "success", "message": "Label stats rebuilt"}
+    except Exception as e:
+        logging.error(f"Failed to rebuild label stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rebuild label stats")
+
+@router.get("/indexes")
+async def get_index_stats(_user=Depends(role_required_dep("admin"))):
+    """
+    Index usage counters per collection plus the latest hot-query plan audit.
+    """
+    return {"status": "success", "indexes": await index_usage_stats(), "audit": last_audit()}
+
+@router.post("/indexes/audit")
+async def run_index_audit(_user=Depends(role_required_dep("admin"))):
+    """
+    Re-runs explain() on the registered hot queries and reports COLLSCANs.
+    """
+    return {"status": "success", "audit": await audit_query_plans()}
+
 @router.delete("/csv-data")
 async def clear_csv_data(_user=Depends(role_or_internal_dep("editor"))):
     """
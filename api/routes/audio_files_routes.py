@@ -7,10 +7,10 @@ from datetime import datetime
 from typing import List
 import shutil
 import requests
-import pygame
 import threading
 import asyncio
 from api.routes.auth_routes import role_required_dep
+from api.utils.lazy_imports import pygame_mixer
 
 router = APIRouter(prefix="/audio-files", tags=["Audio Files"])
 AUDIO_DIR = os.path.join(os.path.dirname(__file__), '..', 'audio_files')
@@ -27,14 +27,6 @@ class AudioFileMeta(BaseModel):
 MAX_AUDIO_FILE_SIZE_MB = 5
 MAX_AUDIO_FILE_SIZE = MAX_AUDIO_FILE_SIZE_MB * 1024 * 1024
 
-# Initialize pygame mixer for laptop audio playback
-try:
-    pygame.mixer.init()
-    PYGAME_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: pygame not available for audio playback: {e}")
-    PYGAME_AVAILABLE = False
-
 @router.get("/", response_model=List[AudioFileMeta])
 async def list_audio_files():
     files = await db["audio_files"].find({}).to_list(100)
@@ -101,7 +93,9 @@ async def play_audio_file(filename: str):
 @router.post("/{filename}/play-laptop")
 async def play_audio_on_laptop(filename: str):
     """Play audio file directly on the laptop using pygame"""
-    if not PYGAME_AVAILABLE:
+    # pygame's mixer is initialized on the first playback request
+    pygame = pygame_mixer()
+    if pygame is None:
         raise HTTPException(status_code=503, detail="Audio playback not available - pygame not installed")
     
     save_path = os.path.join(AUDIO_DIR, filename)
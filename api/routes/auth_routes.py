@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Response, Request, WebSocket, status
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Literal, List
+from typing import Dict, Optional, Literal, List, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from api.core.auth import decode_token
 from api.core.settings import settings
 from api.core.database import AsyncSessionLocal
 from db.models import User
 from sqlalchemy import select, update, insert
 import logging
+import time
 
 logger = logging.getLogger("signglove.auth")
 
@@ -65,6 +67,9 @@ class UserPublic(BaseModel):
     access_scope: AccessScope = Field(default_factory=AccessScope)
 
 COOKIE_NAME = "access_token"
+# Authenticated users are reused for a short time instead of hitting Postgres per request
+USER_CACHE_MAX = 1024
+_user_cache: Dict[str, Tuple[float, User]] = {}
 
 def _normalized_operator_preferences(raw: Optional[dict]) -> dict:
     if isinstance(raw, dict):
@@ -90,6 +95,22 @@ async def get_user_by_email(email: str) -> Optional[User]:
         result = await session.execute(select(User).where(User.email == email))
         return result.scalars().first()
 
+async def _cached_user_by_email(email: str) -> Optional[User]:
+    ttl = settings.AUTH_USER_CACHE_TTL_SECONDS
+    entry = _user_cache.get(email)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    user = await get_user_by_email(email)
+    if user is not None and ttl > 0:
+        if len(_user_cache) >= USER_CACHE_MAX:
+            _user_cache.clear()
+        _user_cache[email] = (time.monotonic() + ttl, user)
+    return user
+
+def invalidate_user_cache(*emails: str):
+    for email in emails:
+        _user_cache.pop(email, None)
+
 async def create_user(email: str, password: str, role: str = "editor") -> str:
     hashed = pwd_context.hash(password)
     async with AsyncSessionLocal() as session:
@@ -132,6 +153,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 async def get_current_user(request: Request) -> User:
+    # Resolved once per request, however many dependencies ask for it
+    cached = getattr(request.state, "current_user", None)
+    if cached is not None:
+        return cached
+
     auth_header = request.headers.get("authorization")
     token = None
     if auth_header and auth_header.lower().startswith("bearer "):
@@ -142,21 +168,35 @@ async def get_current_user(request: Request) -> User:
         
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-        
+
+    user = await user_from_token(token)
+    request.state.current_user = user
+    return user
+
+async def user_from_token(token: str) -> User:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token, settings.SECRET_KEY, [settings.JWT_ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
         
-    user = await get_user_by_email(email)
+    user = await _cached_user_by_email(email)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-        
     return user
 
+async def get_websocket_user(websocket: WebSocket) -> User:
+    """
+    get_current_user for WebSocket routes. Browsers cannot set headers on a WebSocket,
+    so a `token` query parameter is accepted besides the header and cookie.
+    """
+    token = websocket.query_params.get("token")
+    if token:
+        return await user_from_token(token)
+    return await get_current_user(websocket)
+
 def role_required(min_role: Literal["guest", "editor", "admin"]):
     order = {"guest": 0, "editor": 1, "admin": 2}
     async def dependency(user: User = Depends(get_current_user)):
@@ -262,6 +302,7 @@ async def update_me(data: UpdateProfileRequest, response: Response, user: User =
                 update(User).where(User.id == user.id).values(**update_data)
             )
             await session.commit()
+        invalidate_user_cache(user.email, data.email or user.email)
 
     updated_user = await get_user_by_email(user.email if not email_changed else data.email)
     if not updated_user:
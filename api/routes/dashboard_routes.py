@@ -23,6 +23,12 @@ async def get_monitoring_dashboard_stats(
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
+@router.get("/performance")
+async def get_route_performance(
+    window_seconds: int = Query(300, ge=10, le=900),
+):
+    return dashboard_service.get_route_latency(window_seconds)
+
 @router.get("")
 async def get_dashboard_stats_alias():
     return await get_dashboard_stats()
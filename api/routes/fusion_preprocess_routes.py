@@ -191,6 +191,11 @@ def get_fusion_job(job_id: str, _user=Depends(role_or_internal_dep("editor"))) -
     return _call_worker("GET", f"/v1/jobs/{job_id}")
 
 
+@router.post("/jobs/{job_id}/cancel")
+def cancel_fusion_job(job_id: str, _user=Depends(role_or_internal_dep("editor"))) -> Dict[str, Any]:
+    return _call_worker("POST", f"/v1/jobs/{job_id}/cancel")
+
+
 @router.post("/jobs/{job_id}/save")
 def save_fusion_job_output(
     job_id: str,
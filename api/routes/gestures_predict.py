@@ -2,7 +2,7 @@
 API routes for managing gesture sensor data in the sign glove system.
 
 Endpoints:
-- GET /export: Export all gesture data as CSV.
+- GET /export: Stream gesture data as CSV (filterable, optional gzip).
 - POST /upload: Upload raw sensor data CSV file.
 - GET /gestures: List all gesture sessions.
 - GET /gestures/{session_id}: Get data for a specific session.
@@ -10,18 +10,21 @@ Endpoints:
 - PUT /{session_id}: Update gesture label for a session.
 - DELETE /{session_id}: Delete session data.
 """
-from fastapi import APIRouter, HTTPException, Request, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, Depends, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
 from api.models.sensor_models import SensorData
-from api.core.database import sensor_collection
+from services.sensor_store import GESTURE_LIST_TAG, SENSOR_DATA_TAG, session_tag, sensor_store
 from datetime import datetime, timezone
 import logging
 import csv
 import io
-import pandas as pd
-from api.utils.cache import cacheable, get_or_set_cache
-from typing import List, Dict, Any
+import zlib
+from api.utils.cache import cacheable
+from typing import List, Dict, Any, AsyncIterator, Optional
 from api.routes.auth_routes import role_required_dep
+from api.core.settings import settings
+from api.utils.upload_utils import handle_streaming_upload
+from starlette.concurrency import run_in_threadpool
 
 logger = logging.getLogger("signglove")
 
@@ -30,54 +33,85 @@ router = APIRouter(prefix="/gestures", tags=["Gestures"])
 def get_trace_id(request: Request):
     return request.headers.get("x-trace-id", "none")
 
-@router.get(
-    "/export",
-    summary="Export all gesture data as CSV",
-    description="Download all gesture data in CSV format for analysis or backup."
-)
-async def export_gestures(request: Request):
+EXPORT_HEADER = [f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"]
+EXPORT_BATCH_SIZE = 500
+# Flush the CSV buffer to the client once it grows past this many characters
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+async def iter_gesture_csv(rows, compress: bool = False) -> AsyncIterator[bytes]:
     """
-    Returns a CSV file with all gesture data.
-    Example: flexSensor1,flexSensor2,...,label,source,timestamp
+    Yields CSV (optionally gzip) chunks from an async iterator of sensor rows/documents.
+    Only one buffer's worth of rows is held in memory at a time.
     """
-    def fetch_csv():
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"])
-        return output.getvalue()
-    cached_csv = get_or_set_cache("gestures_export_csv", lambda: None, ttl=30)
-    if cached_csv:
-        logger.info(f"[trace={get_trace_id(request)}] Served cached gesture export CSV.")
-        output = io.StringIO(cached_csv)
-        return StreamingResponse(output, media_type="text/csv", headers={
-            "Content-Disposition": "attachment; filename=gesture_data.csv"
-        })
-    cursor = sensor_collection.find({}, {"_id": 0})
-    rows = [doc async for doc in cursor]
-    if not rows:
-        logger.warning(f"[trace={get_trace_id(request)}] No gesture data found for export.")
-        raise HTTPException(status_code=404, detail="No gesture data found")
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"])
-    for row in rows:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if gzip else data
+
+    writer.writerow(EXPORT_HEADER)
+    async for row in rows:
         label = row.get("gesture_label", row.get("label", "unknown"))
         source = row.get("source", "")
         ts = row.get("timestamp", "")
-        
+
         # Handle both single 'values' and batch 'sensor_values'
         if "sensor_values" in row and isinstance(row["sensor_values"], list):
             for sample in row["sensor_values"]:
                 writer.writerow(sample + [label, source, ts])
         elif "values" in row and isinstance(row["values"], list):
             writer.writerow(row["values"] + [label, source, ts])
-    output.seek(0)
-    logger.info(f"[trace={get_trace_id(request)}] Exported {len(rows)} gesture rows.")
-    from api.utils.cache import cache
-    cache.set("gestures_export_csv", output.getvalue(), 30)
-    return StreamingResponse(output, media_type="text/csv", headers={
-        "Content-Disposition": "attachment; filename=gesture_data.csv"
-    })
+
+        if buffer.tell() >= EXPORT_CHUNK_CHARS:
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    chunk = drain()
+    if gzip:
+        chunk += gzip.flush()
+    if chunk:
+        yield chunk
+
+
+@router.get(
+    "/export",
+    summary="Export gesture data as CSV",
+    description="Stream gesture data in CSV format for analysis or backup, optionally filtered and gzip-encoded."
+)
+async def export_gestures(
+    request: Request,
+    label: Optional[str] = Query(None, description="Only export samples with this gesture label"),
+    session_id: Optional[str] = Query(None, description="Only export this session"),
+    start: Optional[datetime] = Query(None, description="Earliest sample timestamp (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Latest sample timestamp (inclusive)"),
+    compress: bool = Query(False, description="gzip-encode the response body"),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+):
+    """
+    Streams a CSV file of gesture data straight from the sample cursors, so memory
+    use does not grow with the size of the export.
+    Example: flexSensor1,flexSensor2,...,label,source,timestamp
+    """
+    trace_id = get_trace_id(request)
+    filters = {"label": label, "session_id": session_id, "start": start, "end": end}
+    if not await sensor_store.has_data(**filters):
+        logger.warning(f"[trace={trace_id}] No gesture data found for export.")
+        raise HTTPException(status_code=404, detail="No gesture data found")
+
+    rows = sensor_store.iter_rows(batch_size=batch_size, **filters)
+    headers = {"Content-Disposition": "attachment; filename=gesture_data.csv"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    active = sorted(k for k, v in filters.items() if v)
+    logger.info(f"[trace={trace_id}] Streaming gesture export (filters={active}, compress={compress}).")
+    return StreamingResponse(iter_gesture_csv(rows, compress), media_type="text/csv", headers=headers)
 
 @router.get(
     "",
@@ -89,7 +123,7 @@ async def export_gestures(request: Request):
     summary="List all gesture sessions (alias with trailing slash)",
     description="Returns a list of all gesture sessions with session_id and gesture_label."
 )
-@cacheable(ttl=30)
+@cacheable(ttl=600, key=lambda request: "all", tags=[GESTURE_LIST_TAG, SENSOR_DATA_TAG])
 async def list_gestures(request: Request) -> Dict[str, Any]:
     """
     Example response:
@@ -103,8 +137,7 @@ async def list_gestures(request: Request) -> Dict[str, Any]:
     }
     """
     trace_id = get_trace_id(request)
-    cursor = sensor_collection.find({}, {"_id": 0, "session_id": 1, "gesture_label": 1, "timestamp": 1})
-    gestures = await cursor.to_list(length=1000)
+    gestures = await sensor_store.list_sessions(limit=1000)
     logger.info(f"[trace={trace_id}] Listed {len(gestures)} gestures.")
     return {
         "status": "success",
@@ -120,38 +153,7 @@ async def list_gestures(request: Request) -> Dict[str, Any]:
 async def get_gestures_summary(request: Request) -> Dict[str, Any]:
     trace_id = get_trace_id(request)
     
-    # 1. Get Base Counts (Samples & Sessions)
-    cursor = sensor_collection.aggregate([
-        {
-            "$group": {
-                "_id": "$gesture_label",
-                "sample_count": { 
-                    "$sum": {
-                        "$cond": [
-                            { "$isArray": "$sensor_values" },
-                            { "$size": "$sensor_values" },
-                            { "$cond": [{ "$isArray": "$values" }, 1, 0] }
-                        ]
-                    }
-                },
-                "session_count": { "$addToSet": "$session_id" },
-                "last_updated": { "$max": "$timestamp" }
-            }
-        },
-        {
-            "$project": {
-                "label": "$_id",
-                "sample_count": 1,
-                "session_count": { "$size": "$session_count" },
-                "last_updated": 1,
-                "_id": 0
-            }
-        }
-    ])
-    counts = await cursor.to_list(length=1000)
-    counts_map = {c["label"]: c for c in counts if c["label"]}
-
-    # 2. Get Active Model Info (for Offline Accuracy)
+    # 1. Get Active Model Info (for Offline Accuracy)
     from services.model_library_service import model_library_service
     registry = model_library_service.load_registry()
     active_id = registry.get("active_model_id")
@@ -164,32 +166,12 @@ async def get_gestures_summary(request: Request) -> Dict[str, Any]:
         # Check if the model has per-label breakdown
         static_accuracy = active_model["metadata"].get("per_label_metrics", {})
 
-    # 3. Get Live Feedback Stats
-    from api.core.database import feedback_collection
-    fb_cursor = feedback_collection.aggregate([
-        {
-            "$group": {
-                "_id": { "label": "$true_label", "model_id": "$model_id" },
-                "total": { "$sum": 1 },
-                "correct": { "$sum": { "$cond": ["$is_correct", 1, 0] } }
-            }
-        },
-        {
-            "$project": {
-                "label": "$_id.label",
-                "model_id": "$_id.model_id",
-                "reliability": { "$divide": ["$correct", "$total"] },
-                "total_feedback": "$total",
-                "_id": 0
-            }
-        }
-    ])
-    fb_stats = await fb_cursor.to_list(length=5000)
-    
-    # Filter feedback to only include the active model
-    fb_map = {s["label"]: s for s in fb_stats if s["model_id"] == active_id}
+    # 2. Base counts and live feedback for the active model: one read of the materialized label_stats
+    from services.label_stats_service import label_stats_service
+    counts, fb_map = await label_stats_service.summary(active_id)
+    counts_map = {c["label"]: c for c in counts if c["label"]}
 
-    # 4. Merge Results
+    # 3. Merge Results
     summary = []
     for label, data in counts_map.items():
         fb = fb_map.get(label, {})
@@ -212,7 +194,12 @@ async def get_gestures_summary(request: Request) -> Dict[str, Any]:
     summary="Get sensor data for a session",
     description="Fetch all sensor data for a specific session by session_id."
 )
-@cacheable(ttl=30)
+@cacheable(
+    ttl=600,
+    key=lambda session_id, request: session_id,
+    negative_ttl=60,
+    tags=lambda session_id, request: [session_tag(session_id), SENSOR_DATA_TAG],
+)
 async def get_sensor_data(session_id: str, request: Request) -> Dict[str, Any]:
     """
     Example response:
@@ -223,11 +210,11 @@ async def get_sensor_data(session_id: str, request: Request) -> Dict[str, Any]:
     }
     """
     trace_id = get_trace_id(request)
-    data = await sensor_collection.find_one({"session_id": session_id})
-    if not data:
+    docs = await sensor_store.find_documents(session_id=session_id, limit=1)
+    if not docs:
         logger.warning(f"[trace={trace_id}] Session not found: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
-    data["_id"] = str(data["_id"])
+    data = docs[0]
     logger.info(f"[trace={trace_id}] Retrieved session: {session_id}")
     return {
         "status": "success",
@@ -245,20 +232,20 @@ async def create_sensor_data(data: SensorData, request: Request, _user=Depends(r
     Example response:
     {
         "status": "success",
-        "data": {"inserted_id": "..."},
+        "data": {"samples_inserted": 3},
         "message": "Sensor data inserted",
         "trace_id": "..."
     }
     """
     trace_id = get_trace_id(request)
-    doc = data.dict()
+    doc = data.model_dump()
     doc["_timestamp"] = datetime.now(timezone.utc)
-    result = await sensor_collection.insert_one(doc)
+    inserted = await sensor_store.insert_documents([doc])
     logger.info(f"[trace={trace_id}] Sensor data inserted: session={data.session_id}")
     return {
         "status": "success",
         "session_id": data.session_id,
-        "data": {"inserted_id": str(result.inserted_id)},
+        "data": {"samples_inserted": inserted},
         "message": "Sensor data inserted",
         "trace_id": trace_id
     }
@@ -268,85 +255,64 @@ async def create_sensor_data(data: SensorData, request: Request, _user=Depends(r
     summary="Upload raw sensor data CSV file",
     description="Upload a CSV file containing raw sensor data to be stored in the database."
 )
-async def upload_raw_csv(file: UploadFile = File(...), request: Request = None, _user=Depends(role_required_dep("editor"))) -> Dict[str, Any]:
+async def upload_raw_csv(file: UploadFile = File(...), request: Request = None, user=Depends(role_required_dep("editor"))) -> Dict[str, Any]:
     """
     Upload and process a raw sensor data CSV file.
     Expected CSV format: session_id,label,flex1,flex2,flex3,flex4,flex5,accel_x,accel_y,accel_z,gyro_x,gyro_y,gyro_z
+    (or the legacy session_id,label,values layout).
+
+    Samples are grouped into one document per session/label. Files larger than
+    INLINE_INGEST_MAX_BYTES are ingested by a background job; poll its job_id.
     """
+    # Imported here: the ingest service loads pandas, which the API should not pay for at startup
+    from services.sensor_ingest_service import INLINE_INGEST_MAX_BYTES, detect_format, sensor_ingest_service
+
     trace_id = get_trace_id(request) if request else "upload"
     
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV file")
-    
+
+    tmp_path = await handle_streaming_upload(file, settings.MAX_CSV_SIZE, [".csv"])
     try:
-        # Read CSV content
-        content = await file.read()
-        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        
-        # Validate CSV structure
-        required_columns = ['session_id', 'label']
-        sensor_columns = [f'flex{i}' for i in range(1, 6)] + ['accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z']
-        
-        # Check if we have either the new format or old format
-        if all(col in df.columns for col in required_columns + sensor_columns):
-            # New format with separate sensor columns
-            pass
-        elif 'values' in df.columns and len(required_columns) <= len([col for col in required_columns if col in df.columns]):
-            # Old format with values array
-            sensor_columns = ['values']
-        else:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"CSV must contain columns: {required_columns + sensor_columns} or {required_columns + ['values']}"
-            )
-        
-        # Process and insert data
-        documents = []
-        for _, row in df.iterrows():
-            if 'values' in df.columns:
-                # Handle old format
-                values = eval(row['values']) if isinstance(row['values'], str) else row['values']
-                if not isinstance(values, list) or len(values) != 11:
-                    continue  # Skip invalid rows
-            else:
-                # Handle new format
-                values = [row[col] for col in sensor_columns]
-                if len(values) != 11:
-                    continue  # Skip invalid rows
-            
-            doc = {
-                "session_id": str(row.get('session_id', f"upload_{trace_id}_{len(documents)}")),
-                "label": str(row.get('label', 'unknown')),
-                "values": values,
-                "source": "csv_upload",
-                "timestamp": datetime.now(timezone.utc),
-                "_timestamp": datetime.now(timezone.utc)
+        # Validate the header up front so both paths reject bad layouts immediately
+        detect_format(tmp_path)
+        if tmp_path.stat().st_size > INLINE_INGEST_MAX_BYTES:
+            job_id = sensor_ingest_service.trigger_ingest(tmp_path, file.filename, user_id=user.id)
+            logger.info(f"[trace={trace_id}] Queued sensor CSV ingest job {job_id} for {file.filename}")
+            return {
+                "status": "success",
+                "job_id": job_id,
+                "message": "CSV ingest queued",
+                "trace_id": trace_id
             }
-            documents.append(doc)
-        
+
+        stats: Dict[str, int] = {}
+        documents = await run_in_threadpool(
+            lambda: list(sensor_ingest_service.iter_documents(tmp_path, trace_id, file.filename, stats))
+        )
         if not documents:
             raise HTTPException(status_code=400, detail="No valid sensor data found in CSV")
-        
-        # Insert into database
-        result = await sensor_collection.insert_many(documents)
-        
-        logger.info(f"[trace={trace_id}] Uploaded {len(documents)} sensor data rows from CSV: {file.filename}")
-        
+        inserted = await sensor_store.insert_documents(documents)
+
+        logger.info(f"[trace={trace_id}] Uploaded {stats['rows_processed']} sensor data rows from CSV: {file.filename}")
         return {
             "status": "success",
-            "message": f"Successfully uploaded {len(documents)} sensor data rows",
-            "rows_processed": len(documents),
-            "inserted_ids": [str(id) for id in result.inserted_ids],
+            "message": f"Successfully uploaded {stats['rows_processed']} sensor data rows",
+            "rows_processed": stats["rows_processed"],
+            "rows_skipped": stats["rows_skipped"],
+            "samples_inserted": inserted,
             "trace_id": trace_id
         }
-        
-    except pd.errors.EmptyDataError:
-        raise HTTPException(status_code=400, detail="CSV file is empty")
-    except pd.errors.ParserError as e:
-        raise HTTPException(status_code=400, detail=f"CSV parsing error: {str(e)}")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Includes pandas ParserError
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[trace={trace_id}] CSV upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process CSV file: {str(e)}")
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
 @router.put(
     "/{session_id}",
@@ -364,17 +330,14 @@ async def update_label(session_id: str, label: str, request: Request, _user=Depe
     }
     """
     trace_id = get_trace_id(request)
-    result = await sensor_collection.update_one(
-        {"session_id": session_id},
-        {"$set": {"gesture_label": label}}
-    )
-    if result.matched_count == 0:
+    matched = await sensor_store.update_label(session_id, label)
+    if matched == 0:
         logger.warning(f"[trace={trace_id}] Session not found for update: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
     logger.info(f"[trace={trace_id}] Label updated for session {session_id} to '{label}'")
     return {
         "status": "success",
-        "data": {"updated": result.modified_count},
+        "data": {"updated": matched},
         "message": "Gesture label updated",
         "trace_id": trace_id
     }
@@ -395,14 +358,14 @@ async def delete_sensor_data(session_id: str, request: Request, _user=Depends(ro
     }
     """
     trace_id = get_trace_id(request)
-    result = await sensor_collection.delete_one({"session_id": session_id})
-    if result.deleted_count == 0:
+    deleted = await sensor_store.delete_session(session_id)
+    if deleted == 0:
         logger.warning(f"[trace={trace_id}] Session not found for delete: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
     logger.info(f"[trace={trace_id}] Deleted session: {session_id}")
     return {
         "status": "success",
-        "data": {"deleted": result.deleted_count},
+        "data": {"deleted": deleted},
         "message": "Session deleted",
         "trace_id": trace_id
     }
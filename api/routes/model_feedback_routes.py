@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from api.core.database import feedback_collection
+from services.label_stats_service import label_stats_service
 from datetime import datetime, timezone
 import logging
 
@@ -28,6 +29,9 @@ async def submit_feedback(feedback: FeedbackCreate):
         feedback_doc["is_correct"] = feedback.predicted_label == feedback.true_label
         
         result = await feedback_collection.insert_one(feedback_doc)
+        await label_stats_service.record_feedback(
+            feedback.model_id, feedback.true_label, feedback_doc["is_correct"], feedback_doc["timestamp"]
+        )
         
         logger.info(f"Feedback recorded for model {feedback.model_id}: {'Correct' if feedback_doc['is_correct'] else 'Incorrect'}")
         
@@ -45,27 +49,8 @@ async def get_model_feedback_stats(model_id: str):
     """
     Returns aggregate feedback stats for a specific model.
     """
-    pipeline = [
-        {"$match": {"model_id": model_id}},
-        {
-            "$group": {
-                "_id": "$true_label",
-                "total": {"$sum": 1},
-                "correct": {"$sum": {"$cond": ["$is_correct", 1, 0]}}
-            }
-        },
-        {
-            "$project": {
-                "label": "$_id",
-                "accuracy": {"$divide": ["$correct", "$total"]},
-                "total_feedback": "$total",
-                "_id": 0
-            }
-        }
-    ]
-    
-    cursor = feedback_collection.aggregate(pipeline)
-    stats = await cursor.to_list(length=1000)
+    # Running tallies maintained on submit, not an aggregation over all feedback
+    stats = await label_stats_service.model_feedback(model_id)
     
     return {
         "status": "success",
@@ -56,6 +56,7 @@ def _compute_runtime_status(entry: Dict[str, Any]) -> Dict[str, Any]:
             "input_dim": int(result["input_dim"]),
             "output_dim": int(result["output_dim"]),
             "message": str(result["message"]),
+            "integrity": model_service.verify_integrity(entry),
         }
     except Exception as exc:
         return {
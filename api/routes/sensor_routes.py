@@ -9,7 +9,7 @@ Endpoints:
 """
 from fastapi import APIRouter, HTTPException, Query, Depends
 from api.models.sensor_models import SensorData
-from api.core.database import sensor_collection
+from services.sensor_store import sensor_store
 from bson import ObjectId
 from typing import List
 from fastapi.encoders import jsonable_encoder
@@ -17,22 +17,14 @@ from api.routes.auth_routes import role_required_dep
 
 router = APIRouter()
 
-# Helper to convert Mongo _id to str
-def convert_id(doc):
-    """
-    Convert MongoDB ObjectId to string for frontend compatibility.
-    """
-    doc["_id"] = str(doc["_id"])
-    return doc
-
 @router.post("/sensor-data")
 async def create_sensor_data(data: SensorData, _user=Depends(role_required_dep("editor"))):
     """
     Insert new sensor data into the database.
     """
     try:
-        result = await sensor_collection.insert_one(data.model_dump())
-        return {"inserted_id": str(result.inserted_id)}
+        inserted = await sensor_store.insert_documents([data.model_dump()])
+        return {"samples_inserted": inserted}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -43,10 +35,7 @@ async def get_sensor_data(label: str = Query(None)):
     List all sensor data, optionally filtered by label.
     """
     try:
-        query = {"label": label} if label else {}
-        cursor = sensor_collection.find(query)
-        docs = [convert_id(doc) async for doc in cursor]
-        return docs
+        return await sensor_store.find_documents(label=label)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -56,13 +45,10 @@ async def update_sensor_label(session_id: str, label: str = Query(...), _user=De
     Update the label for a specific sensor data session.
     """
     try:
-        result = await sensor_collection.update_one(
-            {"session_id": session_id},
-            {"$set": {"label": label}}
-        )
-        if result.matched_count == 0:
+        matched = await sensor_store.update_label(session_id, label)
+        if matched == 0:
             raise HTTPException(status_code=404, detail="Session not found")
-        return {"message": "Label updated", "modified_count": result.modified_count}
+        return {"message": "Label updated", "modified_count": matched}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -72,8 +58,8 @@ async def delete_sensor_data(session_id: str, _user=Depends(role_required_dep("e
     Delete sensor data for a specific session by session ID.
     """
     try:
-        result = await sensor_collection.delete_one({"session_id": session_id})
-        if result.deleted_count == 0:
+        deleted = await sensor_store.delete_session(session_id)
+        if deleted == 0:
             raise HTTPException(status_code=404, detail="Session not found")
         return {"message": "Sensor data deleted"}
     except Exception as e:
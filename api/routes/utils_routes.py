@@ -6,18 +6,23 @@ Endpoints:
 - GET /utils/db/stats: Get database statistics.
 - DELETE /utils/sensor-data: Delete sensor data before a given timestamp.
 """
-from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.status import WS_1008_POLICY_VIOLATION
 from datetime import datetime
 from api.core.database import db
+from services.sensor_store import sensor_store
 from api.core.settings import settings
 import requests
-from services.tts_service import tts_service, IDLE_GESTURES
+from services.tts_service import tts_service, IDLE_GESTURES, LANGUAGE_MAPPINGS, ESP32_TTS_FILENAMES
+from services.esp32_tts_bundle import esp32_bundle_builder
 from pydantic import BaseModel
 import os
-from api.utils.cache import cacheable
+from api.utils.cache import cache, cacheable
 from typing import Dict, Any, Optional
 from serial.tools import list_ports
-from api.routes.auth_routes import get_current_user
+from api.routes.auth_routes import get_current_user, get_websocket_user
+from db.models import User
 from api.utils.update_env import upsert_env_values, detect_serial_ports
 
 router = APIRouter(prefix="/utils", tags=["Utilities"])
@@ -72,29 +77,40 @@ async def db_stats() -> Dict[str, Any]:
     Example response:
     {
         "sensor_data_count": 123,
+        "sensor_sample_count": 4567,
         "gesture_count": 45,
         "model_results_count": 10,
         "training_sessions_count": 8
     }
     """
-    sensor_count = await db["sensor_data"].count_documents({})
+    sensor_count = await sensor_store.count_batches()
+    sample_count = await sensor_store.count_samples()
     gesture_count = await db["gestures"].count_documents({})
     model_count = await db["model_results"].count_documents({})
     training_sessions = await db["training_sessions"].count_documents({})
     return {
         "sensor_data_count": sensor_count,
+        "sensor_sample_count": sample_count,
         "gesture_count": gesture_count,
         "model_results_count": model_count,
         "training_sessions_count": training_sessions,
     }
 
+@router.get(
+    "/cache/stats",
+    summary="Response cache statistics",
+    description="Entries, evictions and per-endpoint hit/miss counters of this process's response cache."
+)
+async def cache_stats(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    return {"status": "success", "data": cache.stats()}
+
 @router.delete("/sensor-data")
 async def delete_old_sensor_data(before: datetime = Query(..., description="Delete data before this timestamp (UTC)")):
     """
     Delete sensor data with a timestamp older than the specified value.
     """
-    result = await db["sensor_data"].delete_many({"timestamp": {"$lt": before}})
-    return {"deleted_count": result.deleted_count}
+    deleted = await sensor_store.delete_before(before)
+    return {"deleted_count": deleted}
 
 @router.post("/test_tts_to_esp32")
 async def test_tts_to_esp32(req: TTSRequest):
@@ -266,6 +282,115 @@ async def get_available_languages(current_user: dict = Depends(get_current_user)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get languages: {str(e)}")
 
+@router.get(
+    "/tts/cache-stats",
+    summary="TTS audio cache statistics",
+    description="Memory/disk usage against their budgets, hit counters and the startup warmup state."
+)
+async def get_tts_cache_stats(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    return {"status": "success", "data": tts_service.get_cache_stats()}
+
+@router.get("/tts/gesture-audio/{gesture_label}")
+async def get_gesture_audio(
+    gesture_label: str,
+    language: str = "en",
+    voice: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """MP3 audio for a gesture phrase, served from the TTS cache."""
+    text = tts_service.get_gesture_text(gesture_label, language)
+    if not text:
+        raise HTTPException(status_code=404, detail=f"No phrase for gesture '{gesture_label}' in language '{language}'")
+    try:
+        audio = await tts_service.get_audio(text, voice)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
+    if audio is None:
+        raise HTTPException(status_code=409, detail=f"TTS provider '{settings.TTS_PROVIDER}' does not produce audio files")
+    return Response(content=audio, media_type="audio/mpeg")
+
+def _stream_text(text: Optional[str], gesture_label: Optional[str], language: str) -> str:
+    if text:
+        return text
+    phrase = tts_service.get_gesture_text(gesture_label or "", language)
+    if not phrase:
+        raise HTTPException(status_code=404, detail=f"No phrase for gesture '{gesture_label}' in language '{language}'")
+    return phrase
+
+@router.get("/tts/stream")
+async def stream_tts(
+    text: Optional[str] = None,
+    gesture_label: Optional[str] = None,
+    language: str = "en",
+    voice: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Chunked MP3 for `text` (or a gesture phrase), sent as the provider produces it.
+    Playback can start on the first chunk instead of after full synthesis.
+    """
+    phrase = _stream_text(text, gesture_label, language)
+    chunks = tts_service.stream_audio(phrase, voice)
+    # Pull the first chunk here so provider errors still map to a status code
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="audio/mpeg")
+
+@router.websocket("/tts/ws")
+async def tts_websocket(websocket: WebSocket):
+    """
+    Streaming TTS for browsers and the ESP32. Authenticate with the Authorization header,
+    the session cookie or ?token=; otherwise the connection is closed with 1008. Send
+    {"type": "speak", "text": ...} or {"type": "speak", "gesture_label": ..., "language": ...};
+    the reply is {"type": "audio_start"}, binary MP3 chunks, then {"type": "audio_end", "bytes": N}.
+    """
+    try:
+        await get_websocket_user(websocket)
+    except HTTPException:
+        await websocket.close(code=WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if data.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            if data.get("type") != "speak":
+                await websocket.send_json({"type": "error", "message": f"Unknown message type: {data.get('type')}"})
+                continue
+            try:
+                phrase = _stream_text(data.get("text"), data.get("gesture_label"), data.get("language", "en"))
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "message": e.detail})
+                continue
+            await websocket.send_json({"type": "audio_start", "text": phrase, "media_type": "audio/mpeg"})
+            sent = 0
+            try:
+                async for chunk in tts_service.stream_audio(phrase, data.get("voice")):
+                    await websocket.send_bytes(chunk)
+                    sent += len(chunk)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                await websocket.send_json({"type": "error", "message": f"TTS synthesis failed: {str(e)}"})
+                continue
+            await websocket.send_json({"type": "audio_end", "bytes": sent})
+    except WebSocketDisconnect:
+        pass
+
 @router.post("/tts/gesture-mapping")
 async def update_gesture_mapping(
     mapping: Dict[str, str],
@@ -370,11 +495,11 @@ async def get_esp32_tts_files(
     """Get all available TTS files for ESP32 SD card in a specific language."""
     try:
         files = []
-        for gesture_label in tts_service.LANGUAGE_MAPPINGS.get(language, {}).keys():
+        for gesture_label in LANGUAGE_MAPPINGS.get(language, {}).keys():
             if tts_service.should_speak_gesture(gesture_label):
                 file_info = await tts_service.get_esp32_tts_info(gesture_label, language)
                 if file_info["status"] == "success":
-                    files.append(file_info["data"])
+                    files.append(file_info)
         
         return {
             "status": "success",
@@ -401,9 +526,9 @@ async def get_esp32_sd_structure(current_user: dict = Depends(get_current_user))
                 "files": []
             }
             
-            for gesture_label in tts_service.LANGUAGE_MAPPINGS.get(lang, {}).keys():
+            for gesture_label in LANGUAGE_MAPPINGS.get(lang, {}).keys():
                 if tts_service.should_speak_gesture(gesture_label):
-                    filename = tts_service.ESP32_TTS_FILENAMES.get(gesture_label, f"{gesture_label.lower()}.mp3")
+                    filename = ESP32_TTS_FILENAMES.get(gesture_label, f"{gesture_label.lower()}.mp3")
                     structure["languages"][lang]["files"].append(filename)
         
         return {"status": "success", "sd_structure": structure}
@@ -412,49 +537,36 @@ async def get_esp32_sd_structure(current_user: dict = Depends(get_current_user))
 
 @router.post("/esp32/generate-tts-files")
 async def generate_esp32_tts_files(
-    language: str = "en",
-    current_user: dict = Depends(get_current_user)
+    language: Optional[str] = None,
+    voice: Optional[str] = None,
+    user: User = Depends(get_current_user)
 ):
-    """Generate TTS audio files for ESP32 SD card in specified language."""
+    """
+    Queues rendering of the ESP32 SD card TTS files (one language, or all) into a
+    versioned bundle. Track it via /jobs/{job_id}; unchanged files are not re-rendered.
+    """
+    if language is not None and language not in LANGUAGE_MAPPINGS:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {language}")
+    if tts_service.audio_provider(voice) is None:
+        raise HTTPException(status_code=409, detail=f"TTS provider '{settings.TTS_PROVIDER}' does not produce audio files")
     try:
-        generated_files = []
-        failed_files = []
-        
-        for gesture_label in tts_service.LANGUAGE_MAPPINGS.get(language, {}).keys():
-            if tts_service.should_speak_gesture(gesture_label):
-                try:
-                    # Generate TTS audio file
-                    text = tts_service.get_gesture_text(gesture_label, language)
-                    result = await tts_service.speak(text)
-                    
-                    if result["status"] == "success":
-                        generated_files.append({
-                            "gesture": gesture_label,
-                            "text": text,
-                            "audio_file": result.get("audio_path", "generated"),
-                            "esp32_path": tts_service.get_esp32_tts_path(gesture_label, language)
-                        })
-                    else:
-                        failed_files.append({
-                            "gesture": gesture_label,
-                            "error": result.get("message", "Unknown error")
-                        })
-                except Exception as e:
-                    failed_files.append({
-                        "gesture": gesture_label,
-                        "error": str(e)
-                    })
-        
-        return {
-            "status": "success",
-            "language": language,
-            "generated_files": generated_files,
-            "failed_files": failed_files,
-            "total_generated": len(generated_files),
-            "total_failed": len(failed_files)
-        }
+        job_id = esp32_bundle_builder.trigger_build([language] if language else None, voice, user_id=user.id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate TTS files: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue TTS file generation: {str(e)}")
+    return {"status": "success", "job_id": job_id, "message": "ESP32 TTS bundle generation queued"}
+
+@router.get("/esp32/tts-bundle")
+async def get_esp32_tts_bundle(current_user: dict = Depends(get_current_user)):
+    """Latest ESP32 TTS bundle (zip of tts/<lang>/*.mp3 plus manifest.json)."""
+    path = esp32_bundle_builder.latest_bundle()
+    if path is None:
+        raise HTTPException(status_code=404, detail="No ESP32 TTS bundle generated yet")
+    return FileResponse(path=str(path), filename=path.name, media_type="application/zip")
+
+@router.get("/esp32/tts-bundle/manifest")
+async def get_esp32_tts_bundle_manifest(current_user: dict = Depends(get_current_user)):
+    """Manifest of the latest bundle, for SD sync clients to diff against."""
+    return {"status": "success", "data": esp32_bundle_builder.load_manifest()}
 
 @router.get("/esp32/tts-status")
 async def get_esp32_tts_status(current_user: dict = Depends(get_current_user)):
@@ -463,7 +575,7 @@ async def get_esp32_tts_status(current_user: dict = Depends(get_current_user)):
         status = {
             "total_languages": len(tts_service.get_available_languages()),
             "current_language": tts_service.current_language,
-            "total_gestures": len(tts_service.LANGUAGE_MAPPINGS.get("en", {})),
+            "total_gestures": len(LANGUAGE_MAPPINGS.get("en", {})),
             "meaningful_gestures": 0,
             "idle_gestures": 0,
             "tts_enabled": settings.TTS_ENABLED,
@@ -471,7 +583,7 @@ async def get_esp32_tts_status(current_user: dict = Depends(get_current_user)):
         }
         
         # Count meaningful vs idle gestures
-        for gesture_label in tts_service.LANGUAGE_MAPPINGS.get("en", {}).keys():
+        for gesture_label in LANGUAGE_MAPPINGS.get("en", {}).keys():
             if tts_service.should_speak_gesture(gesture_label):
                 status["meaningful_gestures"] += 1
             else:
@@ -2,11 +2,13 @@
 Voice streaming WebSocket routes.
 Refactored to use VoiceService.
 """
+import json
 import logging
 import asyncio
 import time
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.responses import JSONResponse
+from services.voice.vad import parse_sample_rate, pcm16_to_float
 from services.voice.voice_service import voice_service
 
 logger = logging.getLogger("signglove.voice_routes")
@@ -14,8 +16,16 @@ router = APIRouter(prefix="/api/voice", tags=["Voice"])
 
 @router.websocket("/voice")
 async def websocket_voice_stream(websocket: WebSocket):
+    """
+    Binary messages are raw PCM16 little-endian mono frames at the session's sample
+    rate (16 kHz unless set with {"type": "config", "sample_rate": N}, 8-48 kHz). Only VAD
+    state changes are acknowledged; "transcription" messages follow each completed utterance.
+    JSON {"type": "voice_data", "audio_data": [...]} chunks are still accepted. Invalid
+    sample rates are answered with an "error" message and otherwise ignored.
+    """
     await websocket.accept()
     session_id = voice_service.create_session(websocket)
+    sample_rate = 16000
     logger.info(f"Voice WebSocket connected: {session_id}")
     
     await websocket.send_json({
@@ -27,20 +37,40 @@ async def websocket_voice_stream(websocket: WebSocket):
     try:
         while True:
             try:
-                data = await asyncio.wait_for(websocket.receive_json(), timeout=30.0)
-                if data.get("type") == "voice_data":
-                    result = await voice_service.handle_audio_data(
-                        session_id, 
-                        data.get("audio_data", []), 
-                        data.get("sample_rate", 16000),
-                        data.get("volume", 0)
-                    )
-                    if result:
-                        await websocket.send_json(result)
-                elif data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": time.time()})
+                message = await asyncio.wait_for(websocket.receive(), timeout=30.0)
             except asyncio.TimeoutError:
                 await websocket.send_json({"type": "keepalive", "timestamp": time.time()})
+                continue
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes") is not None:
+                result = await voice_service.handle_audio_frame(session_id, pcm16_to_float(message["bytes"]), sample_rate)
+                if result and (result["speech_started"] or result["utterances_completed"]):
+                    await websocket.send_json(result)
+                continue
+
+            data = json.loads(message.get("text") or "{}")
+            if data.get("type") in ("voice_data", "config"):
+                try:
+                    rate = parse_sample_rate(data.get("sample_rate", sample_rate))
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "message": str(e), "timestamp": time.time()})
+                    continue
+            if data.get("type") == "voice_data":
+                result = await voice_service.handle_audio_data(
+                    session_id, 
+                    data.get("audio_data", []), 
+                    rate,
+                    data.get("volume", 0)
+                )
+                if result:
+                    await websocket.send_json(result)
+            elif data.get("type") == "config":
+                sample_rate = rate
+                await websocket.send_json({"type": "config_ack", "sample_rate": sample_rate})
+            elif data.get("type") == "ping":
+                await websocket.send_json({"type": "pong", "timestamp": time.time()})
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {session_id}")
     except Exception as e:
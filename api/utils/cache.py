@@ -1,44 +1,441 @@
-import time
+"""
+Response cache for async endpoints.
+
+- LRU with a size cap (CACHE_MAX_ENTRIES); entries expire after `ttl`.
+- Single flight: concurrent misses for a key share one computation.
+- Stale-while-revalidate: for `stale_ttl` after expiry the old value is served
+  while one background task refreshes it.
+- Negative caching: "not found" errors (status_code 404) are cached for `negative_ttl`.
+- Optional Redis tier (CACHE_BACKEND=redis) shares values across replicas; values
+  are stored JSON-encoded, so reads from it return plain JSON types.
+- Tag invalidation: entries carry tags (e.g. "session:<id>", "gesture_list");
+  `await cache.invalidate(*tags)` drops them here and in the Redis tier and publishes
+  the tags on CACHE_INVALIDATION_CHANNEL so other replicas (and Celery workers, via
+  `publish_invalidation`) keep every process fresh. This is what allows long TTLs.
+- Per-function hit/miss counters via `cache.stats()`.
+
+`@cacheable` keys entries by the function's qualified name plus the `key` builder's
+result (the builder is called with the endpoint's arguments). Without a builder only
+primitive arguments are used, so objects like Request never end up in a key.
+"""
+import asyncio
 import functools
-from typing import Any, Callable, Dict, Tuple
+import inspect
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
 
-class SimpleCache:
-    def __init__(self):
-        self._cache: Dict[Any, Tuple[Any, float, float]] = {}
+from fastapi.encoders import jsonable_encoder
 
-    def get(self, key):
-        value, timestamp, ttl = self._cache.get(key, (None, 0, 0))
-        if value is not None and (time.time() - timestamp) < ttl:
-            return value
-        return None
+from api.core.settings import settings
+
+logger = logging.getLogger("signglove.cache")
+
+CACHE_INVALIDATION_CHANNEL = "cache-invalidate"
+STAT_FIELDS = ("hits", "stale_hits", "misses", "coalesced", "redis_hits", "negative_stored", "invalidated")
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def is_not_found(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 404
+
+
+def default_key(signature: inspect.Signature, *args, **kwargs) -> str:
+    bound = signature.bind_partial(*args, **kwargs)
+    return ",".join(f"{name}={value}" for name, value in bound.arguments.items() if isinstance(value, _PRIMITIVES))
+
+
+class _Entry:
+    __slots__ = ("value", "error", "expires_at", "stale_until", "namespace", "tags")
+
+    def __init__(self, value: Any, error: Optional[BaseException], ttl: float, stale_ttl: float, now: float):
+        self.value = value
+        self.error = error
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_ttl
+        self.namespace = None
+        self.tags: Tuple[str, ...] = ()
+
+    def unwrap(self) -> Any:
+        if self.error is not None:
+            raise self.error.with_traceback(None)
+        return self.value
+
+
+class RedisTier:
+    def __init__(self, client, prefix: str = "cache"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Tuple[bool, Any, float]:
+        """(found, value, remaining ttl in seconds)."""
+        name = f"{self.prefix}:{key}"
+        async with self.client.pipeline(transaction=False) as pipe:
+            raw, pttl = await pipe.get(name).pttl(name).execute()
+        if raw is None:
+            return False, None, 0.0
+        return True, json.loads(raw), max(pttl, 0) / 1000.0
 
-    def set(self, key, value, ttl):
-        self._cache[key] = (value, time.time(), ttl)
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        ttl_ms = max(int(ttl * 1000), 1)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{self.prefix}:{key}", json.dumps(jsonable_encoder(value)), px=ttl_ms)
+            for tag in tags:
+                # Tag sets only need to outlive their longest-lived key
+                pipe.sadd(f"{self.prefix}-tag:{tag}", key)
+                pipe.pexpire(f"{self.prefix}-tag:{tag}", ttl_ms, gt=True)
+                pipe.pexpire(f"{self.prefix}-tag:{tag}", ttl_ms, nx=True)
+            await pipe.execute()
 
-    def clear(self, key=None):
+    async def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            name = f"{self.prefix}-tag:{tag}"
+            keys = await self.client.smembers(name)
+            await self.client.delete(name, *(f"{self.prefix}:{key}" for key in keys))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, redis_tier: Optional[RedisTier] = None, pubsub_client=None):
+        self.max_entries = max_entries
+        self.redis = redis_tier
+        self.pubsub = pubsub_client
+        self.origin = uuid.uuid4().hex
+        self.evictions = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        # Bumped by every invalidation; a computation that overlapped one is not stored
+        self._epoch = 0
+        self._listener: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+        self._redis_retry_at = 0.0
+
+    # --- Plain get/set ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is None or entry.error is not None or now >= entry.expires_at:
+            return default
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0):
+        self._store(key, _Entry(value, None, ttl, stale_ttl, time.monotonic()))
+
+    def clear(self, key: Optional[str] = None):
         if key is not None:
-            self._cache.pop(key, None)
+            self._drop(key)
+        else:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.stale_until:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, entry: _Entry, tags: Tuple[str, ...] = ()):
+        self._drop(key)
+        entry.tags = tags
+        self._entries[key] = entry
+        for tag in tags:
+            self._tags[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry.tags:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+        return entry
+
+    # --- Invalidation ---
+
+    def invalidate_local(self, tags: Iterable[str]) -> int:
+        """Drops this process's entries carrying any of `tags`. Returns entries dropped."""
+        self._epoch += 1
+        dropped = 0
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                entry = self._drop(key)
+                if entry is not None:
+                    dropped += 1
+                    if entry.namespace is not None:
+                        self._stats[entry.namespace]["invalidated"] += 1
+        return dropped
+
+    async def invalidate(self, *tags: str) -> int:
+        """Invalidates `tags` here, in the Redis tier and (via pub/sub) on other replicas."""
+        dropped = self.invalidate_local(tags)
+        if self._redis_available():
+            try:
+                await self.redis.invalidate(tags)
+            except Exception as exc:
+                self._redis_failed(exc)
+        if self.pubsub is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                await self.pubsub.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"origin": self.origin, "tags": list(tags)}))
+            except Exception as exc:
+                self._redis_failed(exc)
+        return dropped
+
+    async def listen(self):
+        """Applies invalidations published by other processes; reconnects after errors."""
+        while True:
+            try:
+                async with self.pubsub.pubsub() as channel:
+                    await channel.subscribe(CACHE_INVALIDATION_CHANNEL)
+                    async for message in channel.listen():
+                        if message.get("type") != "message":
+                            continue
+                        payload = json.loads(message["data"])
+                        if payload.get("origin") != self.origin:
+                            self.invalidate_local(payload.get("tags") or ())
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Entries may have missed invalidations while disconnected
+                self.clear()
+                logger.warning(f"Cache invalidation listener error, retrying in {settings.REDIS_RETRY_SECONDS}s: {exc}")
+                await asyncio.sleep(settings.REDIS_RETRY_SECONDS)
+
+    def start_listener(self):
+        if self.pubsub is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self.listen())
+
+    async def stop_listener(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    # --- Cached computation ---
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0,
+        negative_ttl: float = 0,
+        tags: Tuple[str, ...] = (),
+    ) -> Any:
+        now = time.monotonic()
+        stats = self._stats[namespace]
+        entry = self._lookup(key, now)
+        if entry is not None:
+            if now < entry.expires_at:
+                stats["hits"] += 1
+            else:
+                stats["stale_hits"] += 1
+                self._revalidate(namespace, key, compute, ttl, stale_ttl, negative_ttl, tags)
+            return entry.unwrap()
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            stats["coalesced"] += 1
         else:
-            self._cache.clear()
+            stats["misses"] += 1
+            flight = self._start(namespace, key, compute, ttl, stale_ttl, negative_ttl, tags)
+        # A cancelled caller, including the one that started the flight, leaves it running for the others
+        return await asyncio.shield(flight)
+
+    def _entry(self, namespace, value, error, ttl, stale_ttl) -> _Entry:
+        entry = _Entry(value, error, ttl, stale_ttl, time.monotonic())
+        entry.namespace = namespace
+        return entry
+
+    def _start(self, namespace, key, compute, ttl, stale_ttl, negative_ttl, tags) -> asyncio.Task:
+        flight = asyncio.create_task(
+            self._compute(namespace, key, compute, ttl, stale_ttl, negative_ttl, tags, self._epoch)
+        )
+        self._inflight[key] = flight
+        flight.add_done_callback(functools.partial(self._flight_done, key))
+        return flight
+
+    def _flight_done(self, key: str, flight: asyncio.Task):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Every caller may have been cancelled; don't warn about an unretrieved exception
+        if not flight.cancelled():
+            flight.exception()
+
+    async def _compute(self, namespace, key, compute, ttl, stale_ttl, negative_ttl, tags, epoch) -> Any:
+        stats = self._stats[namespace]
+        try:
+            found, value, remaining = await self._redis_get(key)
+            if found:
+                stats["redis_hits"] += 1
+                if epoch == self._epoch:
+                    self._store(key, self._entry(namespace, value, None, min(remaining, ttl), stale_ttl), tags)
+            else:
+                value = await compute()
+                if epoch == self._epoch:
+                    self._store(key, self._entry(namespace, value, None, ttl, stale_ttl), tags)
+                    await self._redis_set(key, value, ttl, tags)
+        except Exception as exc:
+            if negative_ttl and is_not_found(exc) and epoch == self._epoch:
+                stats["negative_stored"] += 1
+                self._store(key, self._entry(namespace, None, exc, negative_ttl, 0), tags)
+            raise
+        return value
+
+    def _revalidate(self, namespace, key, compute, ttl, stale_ttl, negative_ttl, tags):
+        if key in self._inflight:
+            return
+        self._start(namespace, key, compute, ttl, stale_ttl, negative_ttl, tags).add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None and not is_not_found(task.exception()):
+            logger.warning(f"Cache refresh failed: {task.exception()}")
 
-cache = SimpleCache()
+    # --- Redis tier (skipped for settings.REDIS_RETRY_SECONDS after an error) ---
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, exc: Exception):
+        self._redis_retry_at = time.monotonic() + settings.REDIS_RETRY_SECONDS
+        logger.error(f"Cache Redis tier error, using local cache only for {settings.REDIS_RETRY_SECONDS}s: {exc}")
+
+    async def _redis_get(self, key: str) -> Tuple[bool, Any, float]:
+        if self._redis_available():
+            try:
+                return await self.redis.get(key)
+            except Exception as exc:
+                self._redis_failed(exc)
+        return False, None, 0.0
+
+    async def _redis_set(self, key: str, value: Any, ttl: float, tags: Tuple[str, ...] = ()):
+        if self._redis_available():
+            try:
+                await self.redis.set(key, value, ttl, tags)
+            except Exception as exc:
+                self._redis_failed(exc)
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        functions = {}
+        for namespace, counts in self._stats.items():
+            lookups = counts["hits"] + counts["stale_hits"] + counts["misses"] + counts["coalesced"]
+            served = lookups - counts["misses"] + counts["redis_hits"]
+            functions[namespace] = {**counts, "hit_ratio": round(served / lookups, 4) if lookups else 0.0}
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "tags": len(self._tags),
+            "redis": self.redis is not None,
+            "pubsub": self.pubsub is not None,
+            "functions": functions,
+        }
+
+
+def _redis_tier() -> Optional[RedisTier]:
+    if settings.CACHE_BACKEND != "redis":
+        return None
+    try:
+        import redis.asyncio
 
-def cacheable(ttl=30):
-    """Decorator to cache endpoint results for a given TTL (seconds)."""
+        base_url = settings.REDIS_URL.rsplit('/', 1)[0]
+        return RedisTier(redis.asyncio.from_url(f"{base_url}/{settings.REDIS_CACHE_DB}", decode_responses=True))
+    except Exception as e:
+        logger.error(f"Failed to create Redis client for the response cache: {e}")
+        return None
+
+
+def _pubsub_client():
+    if not settings.CACHE_INVALIDATION_PUBSUB:
+        return None
+    try:
+        import redis.asyncio
+
+        return redis.asyncio.from_url(settings.REDIS_URL, decode_responses=True)
+    except Exception as e:
+        logger.error(f"Failed to create Redis client for cache invalidation: {e}")
+        return None
+
+
+cache = ResponseCache(settings.CACHE_MAX_ENTRIES, _redis_tier(), _pubsub_client())
+
+
+@functools.lru_cache(maxsize=None)
+def _sync_redis(url: str):
+    """One pooled client per URL for the lifetime of the process."""
+    import redis
+
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def publish_invalidation(*tags: str):
+    """Synchronous invalidation for processes without the API cache (Celery workers)."""
+    if not settings.CACHE_INVALIDATION_PUBSUB:
+        return
+    try:
+        _sync_redis(settings.REDIS_URL).publish(
+            CACHE_INVALIDATION_CHANNEL, json.dumps({"origin": "worker", "tags": list(tags)})
+        )
+        if settings.CACHE_BACKEND == "redis":
+            base_url = settings.REDIS_URL.rsplit('/', 1)[0]
+            tier = _sync_redis(f"{base_url}/{settings.REDIS_CACHE_DB}")
+            for tag in tags:
+                keys = tier.smembers(f"cache-tag:{tag}")
+                tier.delete(f"cache-tag:{tag}", *(f"cache:{key}" for key in keys))
+    except Exception as e:
+        logger.error(f"Failed to publish cache invalidation for {tags}: {e}")
+
+
+def cacheable(
+    ttl: float = 30,
+    key: Optional[Callable[..., Any]] = None,
+    stale_ttl: float = 0,
+    negative_ttl: float = 0,
+    tags: Any = (),
+):
+    """
+    Caches an async function's result for `ttl` seconds.
+    `key` receives the function's arguments and returns what identifies the result;
+    `tags` is a list of tags, or a callable taking the same arguments and returning one.
+    """
     def decorator(func):
+        namespace = func.__qualname__
+        signature = inspect.signature(func)
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            # Use function name and args as cache key
-            key = (func.__name__, str(args), str(kwargs))
-            cached = cache.get(key)
-            if cached is not None:
-                return cached
-            result = await func(*args, **kwargs)
-            cache.set(key, result, ttl)
-            return result
+            part = key(*args, **kwargs) if key is not None else default_key(signature, *args, **kwargs)
+            entry_tags = tuple(tags(*args, **kwargs) if callable(tags) else tags)
+            return await cache.get_or_compute(
+                namespace,
+                f"{namespace}:{part}",
+                lambda: func(*args, **kwargs),
+                ttl,
+                stale_ttl,
+                negative_ttl,
+                entry_tags,
+            )
         return wrapper
     return decorator
 
+
 def get_or_set_cache(key, fetch_func: Callable, ttl=30):
     """For custom cache logic: get from cache or set if missing/expired."""
     cached = cache.get(key)
@@ -46,4 +443,4 @@ def get_or_set_cache(key, fetch_func: Callable, ttl=30):
         return cached
     value = fetch_func()
     cache.set(key, value, ttl)
-    return value 
\ No newline at end of file
+    return value
@@ -0,0 +1,50 @@
+"""
+Deferred imports for heavy optional dependencies (TensorFlow, torch-based models,
+OpenCV, audio engines).
+
+- available(name): whether a module is installed, from import metadata only (the
+  module is not executed).
+- optional_import(name): imports on first use and caches the module, or None when
+  it is missing or fails to import.
+- pygame_mixer(): pygame with its mixer initialized on first playback.
+
+Route modules stay cheap to import, so the API starts without loading ML/audio stacks
+that a replica may never use. scripts/importtime_report.py checks that `import api.main`
+keeps them out.
+"""
+import importlib
+import importlib.util
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger("signglove.lazy_imports")
+
+
+@lru_cache(maxsize=None)
+def available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=None)
+def optional_import(name: str):
+    try:
+        return importlib.import_module(name)
+    except Exception as exc:
+        logger.info(f"Optional dependency {name} unavailable: {exc}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def pygame_mixer():
+    pygame = optional_import("pygame")
+    if pygame is None:
+        return None
+    try:
+        pygame.mixer.init()
+        return pygame
+    except Exception as exc:
+        logger.warning(f"pygame not available for audio playback: {exc}")
+        return None
@@ -4,6 +4,10 @@ db = db.getSiblingDB('signglove');
 // Create collections with proper indexes
 db.createCollection('gestures');
 db.createCollection('sensor_data');
+// One measurement per glove sample, bucketed by session/label/device
+db.createCollection('sensor_samples', {
+  timeseries: { timeField: 'timestamp', metaField: 'meta', granularity: 'seconds' }
+});
 db.createCollection('training_results');
 db.createCollection('audio_files');
 db.createCollection('models');
@@ -13,6 +17,8 @@ db.gestures.createIndex({ "gesture_name": 1 }, { unique: true });
 db.gestures.createIndex({ "created_at": -1 });
 db.sensor_data.createIndex({ "gesture_id": 1 });
 db.sensor_data.createIndex({ "timestamp": -1 });
+db.sensor_samples.createIndex({ "meta.session_id": 1, "timestamp": 1 });
+db.sensor_samples.createIndex({ "meta.label": 1, "timestamp": -1 });
 db.training_results.createIndex({ "created_at": -1 });
 db.audio_files.createIndex({ "filename": 1 }, { unique: true });
 
@@ -42,5 +48,5 @@ db.gestures.insertMany([
 ]);
 
 print("Sign Glove database initialized successfully!");
-print("Collections created: gestures, sensor_data, training_results, audio_files, models");
+print("Collections created: gestures, sensor_data, sensor_samples, training_results, audio_files, models");
 print("Sample gestures inserted: hello, goodbye, thank_you"); 
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Per-request overhead of the API middleware stack.
+
+Compares a bare app, the previous BaseHTTPMiddleware stack (six layers doing the same
+work) and the pure-ASGI stack from api.core.middleware, in-process over httpx's ASGI
+transport so no network or server loop is measured.
+
+    python -m scripts.bench_middleware [--requests 5000]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api.core.error_handler import create_error_response, log_request_performance
+from api.core.middleware import SECURITY_HEADERS, RateLimitMiddleware, RequestMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/data")
+    async def data(payload: dict):
+        return {"status": "success", "received": len(payload)}
+
+    return app
+
+
+def _legacy_stack(app: FastAPI) -> FastAPI:
+    async def errors(request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as e:
+            return create_error_response(e, request)
+
+    async def performance(request: Request, call_next):
+        start = time.time()
+        response = await call_next(request)
+        duration = time.time() - start
+        log_request_performance(request.scope, duration, status_code=response.status_code)
+        response.headers["X-Response-Time"] = f"{duration:.3f}s"
+        return response
+
+    async def security(request: Request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS:
+            response.headers[name] = value
+        return response
+
+    async def logs(request: Request, call_next):
+        logging.getLogger("signglove").info(f"Request: {request.method} {request.url.path}")
+        response = await call_next(request)
+        logging.getLogger("signglove").info(f"Response: {request.method} {request.url.path} - {response.status_code}")
+        return response
+
+    async def passthrough(request: Request, call_next):
+        return await call_next(request)
+
+    # Same order as before: errors innermost, authentication (log only) outermost
+    for dispatch in (errors, performance, security, logs, passthrough, passthrough):
+        app.add_middleware(BaseHTTPMiddleware, dispatch=dispatch)
+    return app
+
+
+def _asgi_stack(app: FastAPI) -> FastAPI:
+    app.add_middleware(RequestMiddleware)
+    app.add_middleware(RateLimitMiddleware, exclude_prefixes=["/"])
+    return app
+
+
+async def _measure(app: FastAPI, requests: int) -> float:
+    """Median microseconds per request over five rounds."""
+    payload = {f"f{i}": i for i in range(11)}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):
+            await client.post("/data", json=payload)
+        rounds = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(requests // 5):
+                await client.post("/data", json=payload)
+            rounds.append((time.perf_counter() - start) / (requests // 5) * 1e6)
+    return statistics.median(rounds)
+
+
+async def main(requests: int):
+    # Request/response logging is identical in both stacks; keep handler I/O out of the numbers
+    logging.getLogger("signglove").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    bare = await _measure(_app(), requests)
+    legacy = await _measure(_legacy_stack(_app()), requests)
+    asgi = await _measure(_asgi_stack(_app()), requests)
+    print(f"{'stack':<28}{'us/request':>12}{'overhead':>12}")
+    for name, value in (("no middleware", bare), ("BaseHTTPMiddleware x6", legacy), ("pure ASGI", asgi)):
+        print(f"{name:<28}{value:>12.1f}{value - bare:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().requests))
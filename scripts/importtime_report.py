@@ -0,0 +1,85 @@
+"""
+Import-time profile of the API entry point.
+
+Runs `python -X importtime -c "import api.main"` in a fresh interpreter and reports
+the slowest top-level imports, whether any heavy ML/audio module was pulled in
+(those are deferred to first use, see api.utils.lazy_imports), and the wall time of
+the import against a startup budget.
+
+    python -m scripts.importtime_report [--module api.main] [--top 25] [--budget-ms 2500]
+
+Exits non-zero when the budget is exceeded or a heavy module is imported eagerly.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# `import api.main` takes ~1.8 s wall without the modules below; any of them (TF/torch take
+# seconds) or other eager heavy imports push it over
+STARTUP_BUDGET_MS = 2500
+HEAVY_MODULES = (
+    "tensorflow", "torch", "whisper", "ultralytics", "mediapipe", "cv2",
+    "pygame", "edge_tts", "gtts", "pyttsx3", "sklearn", "matplotlib", "pandas",
+)
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """(wall seconds, [(name, self us, cumulative us, depth)]) for importing `module`."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"import {module} failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return wall, rows
+
+
+def main(module: str, top: int, budget_ms: float) -> int:
+    wall, rows = profile(module)
+    total = {name: cumulative for name, _, cumulative, _ in rows}.get(module, 0)
+
+    # Top-level packages, attributed by their first (outermost) import
+    packages: Dict[str, int] = {}
+    for name, _, cumulative, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    print(f"import {module}: {total / 1000:.0f} ms in imports, {wall * 1000:.0f} ms wall (budget {budget_ms:.0f} ms)\n")
+    print(f"{'package':<40}{'cumulative ms':>14}")
+    for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<40}{cumulative / 1000:>14.1f}")
+
+    heavy = sorted({name.split(".")[0] for name, *_ in rows} & set(HEAVY_MODULES))
+    failed = False
+    if heavy:
+        print(f"\nHeavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if wall * 1000 > budget_ms:
+        print(f"\nStartup import took {wall * 1000:.0f} ms, over the {budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.top, args.budget_ms))
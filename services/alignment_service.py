@@ -0,0 +1,187 @@
+"""
+Cross-correlation offset estimation between CV and sensor recordings.
+
+Both streams are reduced to a motion signal (CV wrist speed, sensor accel
+magnitude), resampled onto a common clock and compared with an FFT-based
+cross-correlation over a bounded lag range.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("signglove.alignment_service")
+
+DEFAULT_RATE_HZ = 100.0
+DEFAULT_MAX_LAG_MS = 5000.0
+# Lags whose overlap covers less than this share of the shorter stream are ignored
+MIN_OVERLAP_FRACTION = 0.25
+# Upper bound on the common resampling grid (~5.5 h at 100 Hz)
+MAX_GRID_SAMPLES = 2_000_000
+
+CV_HANDS = ("L", "R")
+SENSOR_ACCEL_LAYOUTS = (
+    (("ax", "ay", "az"),),
+    (("accel_x", "accel_y", "accel_z"),),
+    (("left_acc_1", "left_acc_2", "left_acc_3"), ("right_acc_1", "right_acc_2", "right_acc_3")),
+)
+
+
+def cv_motion_columns(header) -> Tuple[str, ...]:
+    """Columns needed from a CV CSV to build its motion signal."""
+    wanted = []
+    for hand in CV_HANDS:
+        wanted += [f"{hand}_exist", f"{hand}_x0", f"{hand}_y0", f"{hand}_z0"]
+    return tuple(c for c in wanted if c in header)
+
+
+def sensor_motion_columns(header) -> Tuple[str, ...]:
+    """Columns needed from a sensor CSV to build its motion signal."""
+    for layout in SENSOR_ACCEL_LAYOUTS:
+        present = [axes for axes in layout if all(a in header for a in axes)]
+        if present:
+            return tuple(a for axes in present for a in axes)
+    return ()
+
+
+def cv_velocity_series(ts: np.ndarray, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wrist (landmark 0) speed per frame. Uses the left hand when present, else the right.
+    Frames without a hand break the series, matching the spike-based aligner.
+    """
+    n = ts.shape[0]
+    pos = np.zeros((n, 3))
+    valid = np.zeros(n, dtype=bool)
+    for hand in reversed(CV_HANDS):
+        keys = [f"{hand}_x0", f"{hand}_y0", f"{hand}_z0"]
+        if not all(k in cols for k in keys):
+            continue
+        hand_pos = np.column_stack([cols[k] for k in keys])
+        exist_key = f"{hand}_exist"
+        present = cols[exist_key] != 0 if exist_key in cols else np.any(hand_pos != 0, axis=1)
+        pos[present] = hand_pos[present]
+        valid |= present
+
+    dt = np.diff(ts)
+    ok = valid[1:] & valid[:-1] & (dt > 0)
+    speed = np.linalg.norm(np.diff(pos, axis=0), axis=1)
+    return ts[1:][ok], speed[ok] / dt[ok]
+
+
+def sensor_magnitude_series(ts: np.ndarray, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Accelerometer magnitude per sample, averaged across hands for dual layouts."""
+    for layout in SENSOR_ACCEL_LAYOUTS:
+        present = [axes for axes in layout if all(a in cols for a in axes)]
+        if present:
+            mags = [np.linalg.norm(np.column_stack([cols[a] for a in axes]), axis=1) for axes in present]
+            return ts, np.mean(mags, axis=0)
+    return ts[:0], ts[:0]
+
+
+def _resample(ts: np.ndarray, values: np.ndarray, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Z-scored signal on `grid` (0 outside coverage) and its coverage mask."""
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+    mask = (grid >= ts[0]) & (grid <= ts[-1])
+    out = np.zeros(grid.shape[0])
+    sampled = np.interp(grid[mask], ts, values)
+    std = sampled.std()
+    if std > 0:
+        out[mask] = (sampled - sampled.mean()) / std
+    return out, mask.astype(np.float64)
+
+
+def _xcorr(a: np.ndarray, b: np.ndarray, nfft: int) -> np.ndarray:
+    """Circular cross-correlation c[k] = sum_t a[t] * b[t - k] via real FFTs."""
+    return np.fft.irfft(np.fft.rfft(a, nfft) * np.conj(np.fft.rfft(b, nfft)), nfft)
+
+
+def _main_lobe(score: np.ndarray, peak: int) -> Tuple[int, int]:
+    """Index bounds of the descent from `peak` to the first rise on either side."""
+    with np.errstate(invalid="ignore"):
+        rise_right = np.flatnonzero(np.diff(score[peak:]) > 0)
+        rise_left = np.flatnonzero(np.diff(score[peak::-1]) > 0)
+    hi = peak + (int(rise_right[0]) if rise_right.size else score.shape[0] - 1 - peak)
+    lo = peak - (int(rise_left[0]) if rise_left.size else peak)
+    return lo, hi
+
+
+def estimate_offset(
+    cv_ts: np.ndarray,
+    cv_values: np.ndarray,
+    sensor_ts: np.ndarray,
+    sensor_values: np.ndarray,
+    rate_hz: float = DEFAULT_RATE_HZ,
+    max_lag_ms: float = DEFAULT_MAX_LAG_MS,
+) -> Dict[str, Optional[float]]:
+    """
+    Best offset (ms) to add to sensor timestamps so sensor motion lines up with CV motion,
+    i.e. the `offset_ms` convention used by FusionService. Timestamps are in seconds.
+
+    `correlation` is the normalized correlation at the peak; `confidence` (0..1) scales it
+    by how much the peak stands out from the best competing lag.
+    """
+    result: Dict[str, Optional[float]] = {
+        "offset_ms": None,
+        "correlation": None,
+        "confidence": 0.0,
+        "rate_hz": rate_hz,
+        "max_lag_ms": max_lag_ms,
+    }
+    if cv_ts.size < 2 or sensor_ts.size < 2 or rate_hz <= 0:
+        return result
+
+    step = 1.0 / rate_hz
+    max_lag = int(round(max_lag_ms / 1000.0 * rate_hz))
+    # Only samples that can meet within +-max_lag matter; the union of both clocks can be
+    # enormous when the recordings use unrelated epochs
+    max_lag_s = max_lag_ms / 1000.0
+    start = max(cv_ts.min(), sensor_ts.min()) - max_lag_s
+    end = min(cv_ts.max(), sensor_ts.max()) + max_lag_s
+    if end <= start:
+        return result
+    samples = int((end - start) / step) + 1
+    if samples > MAX_GRID_SAMPLES:
+        logger.warning(f"Offset estimation skipped: {samples} grid samples exceed {MAX_GRID_SAMPLES}")
+        return result
+    grid = start + np.arange(samples) * step
+
+    cv_sig, cv_mask = _resample(cv_ts, cv_values, grid)
+    s_sig, s_mask = _resample(sensor_ts, sensor_values, grid)
+
+    nfft = 1 << int(np.ceil(np.log2(2 * grid.shape[0])))
+    corr = _xcorr(cv_sig, s_sig, nfft)
+    overlap = np.rint(_xcorr(cv_mask, s_mask, nfft))
+
+    # Lags -max_lag..max_lag, negative lags wrap to the end of the circular result
+    lags = np.arange(-max_lag, max_lag + 1)
+    corr = corr[lags % nfft]
+    overlap = overlap[lags % nfft]
+    min_overlap = MIN_OVERLAP_FRACTION * min(cv_mask.sum(), s_mask.sum())
+    score = np.where(overlap >= max(min_overlap, 2), corr / np.maximum(overlap, 1), -np.inf)
+    if not np.isfinite(score).any():
+        return result
+
+    peak = int(np.argmax(score))
+    peak_score = float(score[peak])
+
+    # Parabolic refinement for sub-sample precision
+    frac = 0.0
+    if 0 < peak < score.shape[0] - 1 and np.isfinite(score[peak - 1]) and np.isfinite(score[peak + 1]):
+        denom = score[peak - 1] - 2 * peak_score + score[peak + 1]
+        if denom < 0:
+            frac = float(0.5 * (score[peak - 1] - score[peak + 1]) / denom)
+
+    # Runner-up outside the main lobe (down to the first local minimum on each side)
+    lo, hi = _main_lobe(score, peak)
+    rest = score.copy()
+    rest[lo:hi + 1] = -np.inf
+    runner_up = float(rest.max()) if np.isfinite(rest).any() else 0.0
+
+    sharpness = 1.0 - max(runner_up, 0.0) / peak_score if peak_score > 0 else 0.0
+    result.update({
+        "offset_ms": round((lags[peak] + frac) * step * 1000.0, 3),
+        "correlation": round(peak_score, 4),
+        "confidence": round(float(np.clip(peak_score, 0, 1) * np.clip(sharpness, 0, 1)), 4),
+    })
+    return result
@@ -1,15 +1,16 @@
 import logging
-import math
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict
 
 import httpx
 from pymongo import DESCENDING
 
-from api.core.database import model_collection, sensor_collection
+from api.core.database import model_collection
 from api.core.error_handler import performance_monitor
 from api.core.settings import settings
+from services.dashboard.monitoring_rollups import monitoring_rollups, source_drift, window_summary
+from services.sensor_store import sensor_store
 
 logger = logging.getLogger("signglove.dashboard_service")
 
@@ -18,15 +19,11 @@ CACHE_TTL = 30
 MONITORING_CACHE_TTL = settings.MONITORING_CACHE_TTL_SECONDS
 WINDOW_5M_SECONDS = settings.MONITORING_WINDOW_SECONDS
 RUNTIME_HTTP_TIMEOUT_SECONDS = settings.MONITORING_RUNTIME_HEALTH_TIMEOUT_SECONDS
+MONITORING_PATH = "/dashboard/monitoring"
+WINDOW_HOURS = {"1h": 1, "6h": 6, "24h": 24, "7d": 168}
 
-SENSOR_FIELDS_PROJECTION = {
-    "timestamp": 1,
-    "timestamp_ms": 1,
-    "sensor_values": 1,
-    "values": 1,
-    "device_info": 1,
-    "source": 1,
-}
+# Dashboard polling is not traffic
+performance_monitor.rollup_exclude_paths.add(MONITORING_PATH)
 
 # --- Helpers ---
 
@@ -35,49 +32,6 @@ def _safe_round(value: float, digits: int = 4) -> float:
     try: return round(float(value), digits)
     except: return 0.0
 
-def _parse_timestamp(value: Any) -> Optional[datetime]:
-    if value is None: return None
-    if isinstance(value, datetime):
-        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
-    if isinstance(value, (int, float)):
-        num = float(value)
-        if num > 1e12: num /= 1000.0
-        try: return datetime.fromtimestamp(num, tz=timezone.utc)
-        except: return None
-    if isinstance(value, str):
-        raw = value.strip()
-        if not raw: return None
-        if raw.isdigit(): return _parse_timestamp(int(raw))
-        if raw.endswith("Z"): raw = raw[:-1] + "+00:00"
-        try:
-            dt = datetime.fromisoformat(raw)
-            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-        except: return None
-    return None
-
-def _extract_timestamp(doc: Dict[str, Any]) -> Optional[datetime]:
-    return _parse_timestamp(doc.get("timestamp")) or _parse_timestamp(doc.get("timestamp_ms"))
-
-def _extract_sample_values(doc: Dict[str, Any]) -> List[List[float]]:
-    sv = doc.get("sensor_values")
-    if isinstance(sv, list) and sv and isinstance(sv[0], list):
-        return [row for row in sv if isinstance(row, list)]
-    v = doc.get("values")
-    if isinstance(v, list) and v:
-        if isinstance(v[0], list): return [row for row in v if isinstance(row, list)]
-        return [v]
-    return []
-
-def _calc_percentile(values: List[float], percentile: float) -> float:
-    if not values: return 0.0
-    if len(values) == 1: return float(values[0])
-    sorted_values = sorted(values)
-    k = (len(sorted_values) - 1) * percentile
-    f = math.floor(k)
-    c = math.ceil(k)
-    if f == c: return float(sorted_values[int(k)])
-    return float(sorted_values[f] * (c - k) + sorted_values[c] * (k - f))
-
 async def _probe_health_endpoint(name: str, base_url: str) -> Dict[str, Any]:
     url = f"{str(base_url).rstrip('/')}/health"
     try:
@@ -106,7 +60,7 @@ class DashboardService:
         if self._dashboard_cache["data"] and now - self._dashboard_cache["timestamp"] < CACHE_TTL:
             return self._dashboard_cache["data"]
 
-        total_sessions = await sensor_collection.count_documents({})
+        total_sessions = await sensor_store.count_batches()
         total_models = await model_collection.count_documents({})
         
         acc_list = []
@@ -116,10 +70,10 @@ class DashboardService:
         
         avg_acc = _safe_round(sum(acc_list)/len(acc_list)) if acc_list else 0.0
         
-        latest_sensor = await sensor_collection.find_one(sort=[("timestamp", DESCENDING)])
+        latest_sensor = await sensor_store.latest_timestamp()
         latest_model = await model_collection.find_one(sort=[("timestamp", DESCENDING)])
         
-        s_time = latest_sensor.get("timestamp", "") if latest_sensor else ""
+        s_time = latest_sensor or ""
         m_time = latest_model.get("timestamp", "") if latest_model else ""
         latest_time = max(str(s_time), str(m_time)) if s_time and m_time else (s_time or m_time or "")
 
@@ -135,6 +89,11 @@ class DashboardService:
         self._dashboard_cache = {"data": result, "timestamp": now}
         return result
 
+    def get_route_latency(self, window_seconds: int) -> Dict[str, Any]:
+        """p50/p95/p99 per route and overall from this process's latency sketches."""
+        stats = performance_monitor.get_window_stats(window_seconds, {MONITORING_PATH}, per_route=True)
+        return {"status": "success", "data": stats}
+
     async def get_monitoring_stats(self, window_str: str) -> Dict[str, Any]:
         now = time.time()
         cache_key = f"window:{window_str}"
@@ -145,23 +104,27 @@ class DashboardService:
         now_dt = datetime.now(timezone.utc)
         
         # Window parsing
-        w_map = {"1h": 1, "6h": 6, "24h": 24, "7d": 168}
-        hours = w_map.get(window_str, 24)
+        hours = WINDOW_HOURS.get(window_str, 24)
         recent_window = now_dt - timedelta(hours=hours)
         short_window = now_dt - timedelta(minutes=5)
 
-        stats = performance_monitor.get_window_stats(WINDOW_5M_SECONDS, {"/dashboard/monitoring"})
-        durations = stats.get("durations_ms", [])
-        p95 = _safe_round(_calc_percentile(durations, 0.95), 2)
+        # Live 5m health from this process; the window from pre-aggregated minute buckets
+        stats = performance_monitor.get_window_stats(WINDOW_5M_SECONDS, {MONITORING_PATH})
+        p95 = _safe_round(stats.get("latency_p95_ms", 0.0), 2)
         error_rate = _safe_round(float(stats.get("error_rate_pct", 0.0)), 4)
-        
-        # Sensor data analysis
-        sensor_docs = []
-        async for doc in sensor_collection.find({}, SENSOR_FIELDS_PROJECTION).sort("timestamp", DESCENDING).limit(1500):
-            ts = _extract_timestamp(doc)
-            if ts and ts >= recent_window: sensor_docs.append(doc)
-        
-        sensor_5m = [d for d in sensor_docs if (_extract_timestamp(d) or now_dt) >= short_window]
+
+        window = window_summary(await monitoring_rollups.window(recent_window), hours * 60)
+        previous = window_summary(
+            await monitoring_rollups.window(recent_window - timedelta(hours=hours), recent_window), hours * 60
+        )
+        drift = source_drift(window["sources"], previous["sources"])
+        sensor_window = window["sensor_batches"]
+        trend_delta = (
+            (sensor_window - previous["sensor_batches"]) / previous["sensor_batches"] * 100.0
+            if previous["sensor_batches"] else 0.0
+        )
+        # Indexed count; fresher than the rollups, which lag by up to one aggregation pass
+        sensor_5m = await sensor_store.count_batches(start=short_window)
         
         # Runtime checks
         runtime_checks = []
@@ -177,14 +140,39 @@ class DashboardService:
             status = "warning"
         if error_rate > settings.MONITORING_CRIT_ERROR_RATE_5M_PCT or p95 > settings.MONITORING_CRIT_LATENCY_P95_MS:
             status = "critical"
+        if status == "healthy" and (
+            window["missing_ratio"] > settings.MONITORING_WARN_MISSING_RATIO
+            or drift["global_score"] > settings.MONITORING_WARN_DRIFT_SCORE
+        ):
+            status = "warning"
         if any(not c["ok"] for c in runtime_checks): status = "critical"
 
         monitoring = {
             "status": "success",
             "data": {
-                "health": {"status": status, "error_rate_5m": error_rate, "latency_p95_ms": p95},
+                "health": {
+                    "status": status,
+                    "error_rate_5m": error_rate,
+                    "latency_p95_ms": p95,
+                    "throughput_rpm": _safe_round(window["throughput_rpm"], 2),
+                    "window_error_rate_pct": _safe_round(window["error_rate_pct"], 4),
+                    "window_latency_ms": {
+                        "p50": _safe_round(window["latency_p50_ms"], 2),
+                        "p95": _safe_round(window["latency_p95_ms"], 2),
+                        "p99": _safe_round(window["latency_p99_ms"], 2),
+                    },
+                },
                 "runtime_services": runtime_checks,
-                "traffic": {"requests_last_5m": len(sensor_5m), "requests_last_24h": len(sensor_docs)},
+                "traffic": {
+                    "requests_last_5m": sensor_5m,
+                    "requests_last_24h": sensor_window,
+                    "trend_delta_pct": _safe_round(trend_delta, 2),
+                },
+                "data_quality": {
+                    "missing_ratio": _safe_round(window["missing_ratio"], 6),
+                    "schema_mismatch_count": window["schema_mismatch_count"],
+                },
+                "drift": drift,
                 "meta": {"window": window_str, "generated_at": now_dt.isoformat()}
             }
         }
@@ -0,0 +1,221 @@
+"""
+Minute-bucket monitoring rollups (`monitoring_rollups` collection).
+
+One document per UTC minute ({_id: minute start}) holding:
+- requests / errors / latency: API request counters and LatencySketch bucket
+  counts, $inc'ed from each process's PerformanceMonitor (sketches merge by addition).
+- sensor: batches, samples, values_total, missing_values, schema_mismatches and
+  per-source batch counts, recomputed ($set) from the sensor time-series collection
+  for the recent minutes on each pass, so late or re-run writes stay idempotent.
+  After a restart the pass resumes from the latest stored sensor bucket.
+
+The dashboard merges the buckets of a window (O(buckets), no sample scan). Buckets
+expire after ROLLUP_RETENTION_DAYS via a TTL index on `minute`. Legacy sensor_data documents
+awaiting migration are not rolled up.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+from api.core.database import monitoring_rollup_collection, sensor_samples_collection
+from api.core.error_handler import LatencySketch, performance_monitor
+from services.sensor_store import as_datetime
+
+logger = logging.getLogger("signglove.monitoring_rollups")
+
+# Covers the 7d dashboard window plus the preceding 7d used as its drift/trend baseline
+ROLLUP_RETENTION_DAYS = 15
+# Minutes re-aggregated behind the previous pass to pick up late sensor writes
+SENSOR_LATE_MINUTES = 5
+SAMPLE_DIM = 11
+NAN = float("nan")
+
+_VALUES = {"$ifNull": ["$values", []]}
+SENSOR_MINUTE_GROUP = {
+    "samples": {"$sum": 1},
+    "batches": {"$sum": {"$cond": [{"$eq": ["$seq", 0]}, 1, 0]}},
+    "values_total": {"$sum": {"$size": _VALUES}},
+    "missing_values": {"$sum": {"$size": {"$filter": {
+        "input": _VALUES,
+        "cond": {"$or": [{"$eq": ["$$this", None]}, {"$eq": ["$$this", NAN]}]},
+    }}}},
+    "schema_mismatches": {"$sum": {"$cond": [{"$ne": [{"$size": _VALUES}, SAMPLE_DIM]}, 1, 0]}},
+}
+
+
+def minute_start(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def _source_key(source: Any) -> str:
+    return str(source or "unknown").replace(".", "_").replace("$", "_")
+
+
+def source_drift(current: Dict[str, int], baseline: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Total variation distance between two source distributions (0 = same mix,
+    1 = disjoint) and the per-source share change in percentage points.
+    """
+    cur_total, base_total = sum(current.values()), sum(baseline.values())
+    if not cur_total or not base_total:
+        return {"global_score": 0.0, "top_shifted_features": []}
+    shifts = []
+    for source in set(current) | set(baseline):
+        delta = current.get(source, 0) / cur_total - baseline.get(source, 0) / base_total
+        shifts.append({"feature": f"source:{source}", "shift": round(delta * 100.0, 2)})
+    shifts.sort(key=lambda s: abs(s["shift"]), reverse=True)
+    score = sum(abs(s["shift"]) for s in shifts) / 200.0
+    return {"global_score": round(score, 4), "top_shifted_features": shifts[:5]}
+
+
+def merge_buckets(buckets: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sums minute buckets into one window total."""
+    merged: Dict[str, Any] = {
+        "minutes": 0,
+        "requests": 0,
+        "errors": 0,
+        "latency": {},
+        "sensor": {k: 0 for k in SENSOR_MINUTE_GROUP},
+        "sources": {},
+    }
+    for bucket in buckets:
+        merged["minutes"] += 1
+        merged["requests"] += int(bucket.get("requests", 0))
+        merged["errors"] += int(bucket.get("errors", 0))
+        for index, count in (bucket.get("latency") or {}).items():
+            merged["latency"][index] = merged["latency"].get(index, 0) + int(count)
+        for key, value in (bucket.get("sensor") or {}).items():
+            if key in merged["sensor"]:
+                merged["sensor"][key] += int(value)
+        for source, count in (bucket.get("sources") or {}).items():
+            merged["sources"][source] = merged["sources"].get(source, 0) + int(count)
+    return merged
+
+
+class MonitoringRollupService:
+    def __init__(self, collection, samples):
+        self.collection = collection
+        self.samples = samples
+        self._sensor_watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            "minute", expireAfterSeconds=ROLLUP_RETENTION_DAYS * 86400
+        )
+
+    # --- Aggregation ---
+
+    async def flush_requests(self) -> int:
+        """$inc's this process's pending request counters into their minute buckets."""
+        counters = performance_monitor.drain_minute_counters()
+        updates = []
+        for minute, c in counters.items():
+            bucket = datetime.fromtimestamp(minute * 60, tz=timezone.utc)
+            inc = {"requests": c["requests"], "errors": c["errors"]}
+            inc.update({f"latency.{i}": n for i, n in c["latency"].counts.items()})
+            updates.append(UpdateOne(
+                {"_id": bucket},
+                {"$inc": inc, "$setOnInsert": {"minute": bucket}},
+                upsert=True,
+            ))
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+        return len(updates)
+
+    async def roll_up_sensor(self, now: Optional[datetime] = None) -> int:
+        """Recomputes sensor stats for every minute since the previous pass (minus the late margin)."""
+        now = now or datetime.now(timezone.utc)
+        if self._sensor_watermark is None:
+            self._sensor_watermark = await self.latest_sensor_minute()
+        start = self._sensor_watermark or (now - timedelta(days=ROLLUP_RETENTION_DAYS))
+        start = minute_start(start - timedelta(minutes=SENSOR_LATE_MINUTES))
+        minute = {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}}
+
+        minutes: Dict[datetime, Dict[str, Any]] = {}
+        async for g in self.samples.aggregate([
+            {"$match": {"timestamp": {"$gte": start}}},
+            {"$group": {"_id": minute, **SENSOR_MINUTE_GROUP}},
+        ]):
+            minutes[as_datetime(g.pop("_id"))] = {"sensor": g, "sources": {}}
+        async for g in self.samples.aggregate([
+            {"$match": {"timestamp": {"$gte": start}, "seq": 0}},
+            {"$group": {"_id": {"minute": minute, "source": "$meta.source"}, "batches": {"$sum": 1}}},
+        ]):
+            entry = minutes.get(as_datetime(g["_id"]["minute"]))
+            if entry is not None:
+                entry["sources"][_source_key(g["_id"].get("source"))] = g["batches"]
+
+        updates = [
+            UpdateOne({"_id": bucket}, {"$set": entry, "$setOnInsert": {"minute": bucket}}, upsert=True)
+            for bucket, entry in minutes.items()
+        ]
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+        self._sensor_watermark = now
+        return len(updates)
+
+    async def latest_sensor_minute(self) -> Optional[datetime]:
+        """Minute of the newest stored sensor bucket; where a restarted process resumes."""
+        latest = await self.collection.find_one({"sensor": {"$exists": True}}, sort=[("_id", -1)])
+        return as_datetime(latest["_id"]) if latest else None
+
+    async def roll_up(self):
+        await self.flush_requests()
+        await self.roll_up_sensor()
+
+    async def run_forever(self, interval_seconds: int):
+        await self.ensure_indexes()
+        while True:
+            try:
+                await self.roll_up()
+            except Exception as exc:
+                logger.warning(f"Monitoring rollup pass failed: {exc}")
+            await asyncio.sleep(interval_seconds)
+
+    def start(self, interval_seconds: int = 60):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever(interval_seconds))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # Keep the counters of the last partial minute
+            try:
+                await self.flush_requests()
+            except Exception as exc:
+                logger.warning(f"Final monitoring rollup flush failed: {exc}")
+
+    # --- Reads ---
+
+    async def window(self, start: datetime, end: Optional[datetime] = None) -> Dict[str, Any]:
+        query: Dict[str, Any] = {"$gte": minute_start(start)}
+        if end is not None:
+            query["$lt"] = end
+        return merge_buckets(await self.collection.find({"_id": query}).to_list(length=None))
+
+
+def window_summary(merged: Dict[str, Any], window_minutes: int) -> Dict[str, Any]:
+    """Rates and percentiles derived from a merged window (minutes without traffic have no bucket)."""
+    sensor = merged["sensor"]
+    requests = merged["requests"]
+    latency = LatencySketch.from_counts(merged["latency"])
+    return {
+        "requests": requests,
+        "error_rate_pct": (merged["errors"] / requests * 100.0) if requests else 0.0,
+        "throughput_rpm": requests / max(window_minutes, 1),
+        "latency_p50_ms": latency.percentile(0.50),
+        "latency_p95_ms": latency.percentile(0.95),
+        "latency_p99_ms": latency.percentile(0.99),
+        "sensor_batches": sensor["batches"],
+        "missing_ratio": (sensor["missing_values"] / sensor["values_total"]) if sensor["values_total"] else 0.0,
+        "schema_mismatch_count": sensor["schema_mismatches"],
+        "sources": merged["sources"],
+    }
+
+
+monitoring_rollups = MonitoringRollupService(monitoring_rollup_collection, sensor_samples_collection)
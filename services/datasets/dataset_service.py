@@ -3,14 +3,23 @@ from __future__ import annotations
 import csv
 import hashlib
 import json
+import os
 import shutil
 import logging
+import threading
 from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from api.core.settings import settings
+from services.file_integrity import cached_sha256
+
+try:
+    import fcntl
+except ImportError:  # Windows dev hosts: in-process locking only
+    fcntl = None
 
 logger = logging.getLogger("signglove.dataset_service")
 
@@ -107,6 +116,8 @@ class DatasetService:
         self.archive_dir = self.library_dir / "archive"
         self.selection_file = self.library_dir / "selected_datasets.json"
         self.order_file = self.library_dir / "order.json"
+        self.content_index_file = self.library_dir / "content_index.json"
+        self._content_index_thread_lock = threading.Lock()
         self._ensure_dirs()
 
     def _ensure_dirs(self):
@@ -239,12 +250,110 @@ class DatasetService:
         p = self.sidecar_path(csv_path)
         p.write_text(json.dumps(data, ensure_ascii=True, indent=2), encoding="utf-8")
 
-    def _sha256_for_file(self, path: Path) -> str:
-        digest = hashlib.sha256()
-        with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                digest.update(chunk)
-        return digest.hexdigest()
+    def library_name(self, path: Path) -> str:
+        """Name of `path` relative to the first library root that contains it."""
+        resolved = path.resolve()
+        for _, root in self.get_roots(include_archived=True):
+            try:
+                return str(resolved.relative_to(root.resolve()))
+            except ValueError:
+                continue
+        return resolved.name
+
+    # --- Content Hashing & Dedup ---
+
+    def content_sha256(self, csv_path: Path, sidecar: Dict[str, Any]) -> str:
+        """
+        SHA-256 of the CSV, cached in sidecar["content_hash"] keyed by (size, mtime_ns, inode).
+        Updates `sidecar` in place; callers persist it with save_sidecar.
+        """
+        entry = cached_sha256(csv_path, sidecar.get("content_hash"))
+        sidecar["content_hash"] = entry
+        return entry["sha256"]
+
+    def load_content_index(self) -> Dict[str, Dict[str, str]]:
+        if not self.content_index_file.exists(): return {"content": {}, "fusion_exports": {}}
+        try:
+            with self.content_index_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception: data = {}
+        if not isinstance(data, dict): data = {}
+        return {"content": dict(data.get("content") or {}), "fusion_exports": dict(data.get("fusion_exports") or {})}
+
+    def save_content_index(self, data: Dict[str, Dict[str, str]]):
+        # Unique temp name: writers in other processes must not share it
+        tmp = self.content_index_file.with_suffix(f".json.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=True, indent=2)
+        tmp.replace(self.content_index_file)
+
+    @contextmanager
+    def content_index_lock(self):
+        """
+        Serializes read-modify-write of the content index across threads and, through an
+        flock on a sibling lock file, across API and Celery worker processes.
+        """
+        with self._content_index_thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self.content_index_file.parent.mkdir(parents=True, exist_ok=True)
+            with self.content_index_file.with_suffix(".lock").open("a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def register_content(self, sha256: str, csv_path: Path, fusion_key: Optional[str] = None):
+        self.register_contents([(sha256, csv_path)], fusion_key=fusion_key)
+
+    def register_contents(self, entries: List[Tuple[str, Path]], fusion_key: Optional[str] = None):
+        """Records (sha256, csv_path) pairs in the content index with one locked read/write."""
+        with self.content_index_lock():
+            index = self.load_content_index()
+            for sha256, csv_path in entries:
+                current = index["content"].get(sha256)
+                if not current or not Path(current).is_file():
+                    index["content"][sha256] = str(csv_path.resolve())
+                if fusion_key:
+                    index["fusion_exports"][fusion_key] = str(csv_path.resolve())
+            self.save_content_index(index)
+
+    def _indexed_path(self, raw: Optional[str], sha256: Optional[str] = None) -> Optional[Path]:
+        """Validates an index entry: file still exists and (when given) still has that content."""
+        if not raw:
+            return None
+        path = Path(raw)
+        if not path.is_file():
+            return None
+        if sha256 is not None:
+            cached = self.load_sidecar(path).get("content_hash")
+            if cached_sha256(path, cached)["sha256"] != sha256:
+                return None
+        return path
+
+    def find_duplicate(self, sha256: str, exclude: Optional[Path] = None) -> Optional[Path]:
+        """Returns another library file with identical content, if one is indexed."""
+        path = self._indexed_path(self.load_content_index()["content"].get(sha256), sha256)
+        if path is None or (exclude is not None and path.resolve() == exclude.resolve()):
+            return None
+        return path
+
+    def fusion_export_key(self, params: Dict[str, Any]) -> str:
+        """Content-addressed key for a fusion export: input hashes plus merge parameters."""
+        parts = {}
+        for field in ("cv_name", "sensor_name"):
+            _, path, _ = self.resolve_csv_path(params[field])
+            sidecar = self.load_sidecar(path)
+            parts[field] = self.content_sha256(path, sidecar)
+            self.save_sidecar(path, sidecar)
+        settings_part = {k: params.get(k) for k in ("offset_ms", "trim_in_pct", "trim_out_pct", "mode")}
+        payload = json.dumps({"inputs": parts, "params": settings_part}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def find_fusion_export(self, key: str) -> Optional[Path]:
+        return self._indexed_path(self.load_content_index()["fusion_exports"].get(key))
 
     def upsert_dataset_record(
         self,
@@ -253,38 +362,79 @@ class DatasetService:
         validation: Dict[str, Any],
         sidecar: Optional[Dict[str, Any]] = None,
     ) -> str:
+        ids = self.upsert_dataset_records([(csv_path, validation, sidecar)], owner_id)
+        return ids[str(csv_path.resolve())]
+
+    def upsert_dataset_records(
+        self,
+        items: List[Tuple[Path, Dict[str, Any], Optional[Dict[str, Any]]]],
+        owner_id: Any,
+    ) -> Dict[str, str]:
+        """
+        Upserts Dataset rows for (csv_path, validation, sidecar) items in a single
+        transaction. Returns {resolved storage path: dataset id}.
+        """
         from uuid import UUID
 
         from db.base import SessionLocal
         from db.models import Dataset
 
-        resolved_path = csv_path.resolve()
-        stats = resolved_path.stat()
-        payload = {
-            "source": "csv_library",
-            "validation": validation,
-            "sidecar": sidecar or {},
-            "content_sha256": self._sha256_for_file(resolved_path),
-        }
+        owner = owner_id if isinstance(owner_id, UUID) else UUID(str(owner_id))
+        prepared = []
+        for csv_path, validation, sidecar in items:
+            resolved_path = csv_path.resolve()
+            sidecar = sidecar if sidecar is not None else self.load_sidecar(resolved_path)
+            prepared.append((resolved_path, resolved_path.stat(), validation, sidecar))
+        if not prepared:
+            return {}
 
         with SessionLocal() as session:
-            dataset = session.query(Dataset).filter(Dataset.storage_path == str(resolved_path)).first()
-            if not dataset:
-                dataset = Dataset(
-                    name=resolved_path.name,
-                    version="v1",
-                    storage_path=str(resolved_path),
-                    owner_id=owner_id if isinstance(owner_id, UUID) else UUID(str(owner_id)),
-                )
-                session.add(dataset)
-
-            dataset.file_size_bytes = int(stats.st_size)
-            dataset.modality = str(validation.get("modality") or "unknown")
-            dataset.hand_mode = str(validation.get("hand_mode") or "unknown")
-            dataset.row_count = int(validation.get("row_count") or 0)
-            dataset.metadata_json = payload
+            paths = [str(p) for p, _, _, _ in prepared]
+            existing = {
+                d.storage_path: d
+                for d in session.query(Dataset).filter(Dataset.storage_path.in_(paths)).all()
+            }
+            for resolved_path, stats, validation, sidecar in prepared:
+                dataset = existing.get(str(resolved_path))
+                if not dataset:
+                    dataset = Dataset(
+                        name=resolved_path.name,
+                        version="v1",
+                        storage_path=str(resolved_path),
+                        owner_id=owner,
+                    )
+                    session.add(dataset)
+                    existing[str(resolved_path)] = dataset
+
+                dataset.file_size_bytes = int(stats.st_size)
+                dataset.modality = str(validation.get("modality") or "unknown")
+                dataset.hand_mode = str(validation.get("hand_mode") or "unknown")
+                dataset.row_count = int(validation.get("row_count") or 0)
+                dataset.metadata_json = {
+                    "source": "csv_library",
+                    "validation": validation,
+                    "sidecar": sidecar,
+                    "content_sha256": self.content_sha256(resolved_path, sidecar),
+                }
             session.commit()
-            return str(dataset.id)
+            return {path: str(existing[path].id) for path in paths}
+
+    def library_files(self, include_archived: bool = True) -> List[Tuple[str, str]]:
+        """
+        (scope, resolved path) of every CSV across roots, each file once. The legacy
+        root contains the others, so files are de-duplicated by resolved path. Paths
+        are returned rather than names: a name can exist in several roots, and
+        resolving it again would always pick the first one.
+        """
+        seen = set()
+        files = []
+        for item in self.list_datasets(include_archived):
+            resolved = Path(item["path"]).resolve()
+            if resolved in seen:
+                continue
+            seen.add(resolved)
+            files.append((item["source"], str(resolved)))
+        return files
 
     def create_job(
         self, 
@@ -334,4 +484,34 @@ class DatasetService:
         )
         return job_id
 
+    def trigger_fusion_export(self, params: Dict[str, Any], user_id: Any) -> str:
+        """Queues a CV/sensor fusion export job and returns the job ID."""
+        from workers.tasks.dataset_tasks import export_fusion_task
+        from uuid import uuid4
+
+        job_id = str(uuid4())
+        self.create_job(
+            task_type="fusion_export",
+            user_id=user_id,
+            payload=params,
+            job_id=job_id
+        )
+        export_fusion_task.apply_async(args=[params], task_id=job_id)
+        return job_id
+
+    def trigger_library_scan(self, user_id: Any, include_archived: bool = True) -> str:
+        """Queues one job that scans every library CSV and returns the job ID."""
+        from workers.tasks.dataset_tasks import scan_library_task
+        from uuid import uuid4
+
+        job_id = str(uuid4())
+        self.create_job(
+            task_type="library_scan",
+            user_id=user_id,
+            payload={"include_archived": include_archived},
+            job_id=job_id
+        )
+        scan_library_task.apply_async(args=[include_archived], task_id=job_id)
+        return job_id
+
 dataset_service = DatasetService()
@@ -0,0 +1,220 @@
+"""
+ESP32 SD card TTS bundles.
+
+Renders every gesture phrase (LANGUAGE_MAPPINGS x languages) to the SD layout
+tts/<lang>/<file>.mp3 under TTS_ESP32_BUNDLE_DIR/assets, then packs the assets with a
+manifest.json into a versioned esp32_tts_v<N>.zip for SD sync.
+
+- Files are rendered in parallel, at most TTS_ESP32_BUNDLE_CONCURRENCY at a time,
+  through TTSService.render, so phrases already in the TTS cache cost a copy.
+- Each entry records the SHA-256 of its synthesis inputs (provider, voice, text). An
+  asset whose inputs are unchanged since the last manifest is not rendered again.
+- A new version is written only when something changed. The last
+  TTS_ESP32_BUNDLE_KEEP bundles are kept.
+
+Runs in the Celery worker (workers.tasks.tts_tasks); the API only queues the job.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from api.core.settings import settings
+from services.tts_service import ESP32_TTS_FILENAMES, LANGUAGE_MAPPINGS, tts_service
+
+logger = logging.getLogger("signglove.esp32_tts_bundle")
+
+MANIFEST_NAME = "manifest.json"
+BUNDLE_PATTERN = re.compile(r"esp32_tts_v(\d+)\.zip$")
+
+
+def input_sha256(provider: str, voice: str, text: str) -> str:
+    return hashlib.sha256(f"{provider}\0{voice}\0{text}".encode()).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ESP32BundleBuilder:
+    def __init__(self, root: str, concurrency: int = 4, keep: int = 3):
+        self.root = Path(root)
+        self.assets = self.root / "assets"
+        self.concurrency = max(concurrency, 1)
+        self.keep = max(keep, 1)
+
+    # --- Manifest and bundles ---
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads((self.root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"version": 0, "files": []}
+
+    def bundle_path(self, version: int) -> Path:
+        return self.root / f"esp32_tts_v{version}.zip"
+
+    def latest_bundle(self) -> Optional[Path]:
+        version = self.load_manifest().get("version", 0)
+        path = self.bundle_path(version)
+        return path if version and path.exists() else None
+
+    def plan(self, languages: Optional[Iterable[str]] = None) -> List[Dict[str, str]]:
+        """One entry per speakable gesture and language, in SD card layout."""
+        entries = []
+        for language in languages or LANGUAGE_MAPPINGS.keys():
+            for gesture, text in LANGUAGE_MAPPINGS.get(language, {}).items():
+                if not text.strip() or not tts_service.should_speak_gesture(gesture):
+                    continue
+                filename = ESP32_TTS_FILENAMES.get(gesture, f"{gesture.lower()}.mp3")
+                entries.append({"path": f"tts/{language}/{filename}", "language": language, "gesture": gesture, "text": text})
+        return entries
+
+    # --- Build ---
+
+    def _render(self, entry: Dict[str, str], voice: Optional[str]) -> Dict[str, Any]:
+        source, provider, voice = tts_service.render(entry["text"], voice)
+        target = self.assets / entry["path"]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_suffix(".tmp")
+        shutil.copyfile(source, temp)
+        os.replace(temp, target)
+        return {
+            **entry,
+            "input_sha256": input_sha256(provider, voice, entry["text"]),
+            "sha256": file_sha256(target),
+            "bytes": target.stat().st_size,
+        }
+
+    def build(
+        self,
+        languages: Optional[Iterable[str]] = None,
+        voice: Optional[str] = None,
+        progress_cb: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Renders changed assets and writes a new bundle version when anything changed.
+        Returns a summary with the bundle path and per-file failures.
+        """
+        selected = tts_service.audio_provider(voice)
+        if selected is None:
+            raise RuntimeError(f"TTS provider '{settings.TTS_PROVIDER}' does not produce audio files")
+        provider, resolved_voice = selected
+
+        previous = self.load_manifest()
+        files = {item["path"]: item for item in previous.get("files", [])}
+        entries = self.plan(languages)
+        pending = []
+        for entry in entries:
+            known = files.get(entry["path"])
+            if (
+                known
+                and known.get("input_sha256") == input_sha256(provider, resolved_voice, entry["text"])
+                and (self.assets / entry["path"]).exists()
+            ):
+                continue
+            pending.append(entry)
+
+        total = len(entries)
+        done = total - len(pending)
+        if progress_cb:
+            progress_cb(done, total)
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="esp32-tts") as executor:
+            futures = {executor.submit(self._render, entry, voice): entry for entry in pending}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    files[entry["path"]] = future.result()
+                except Exception as e:
+                    failed.append({"path": entry["path"], "gesture": entry["gesture"], "error": str(e)})
+                    logger.warning(f"ESP32 TTS render failed for {entry['path']}: {e}")
+                done += 1
+                if progress_cb:
+                    progress_cb(done, total)
+
+        # Drop entries whose gesture/language no longer exists in the mappings
+        planned = {entry["path"] for entry in self.plan()}
+        current = sorted((item for path, item in files.items() if path in planned), key=lambda item: item["path"])
+        changed = current != previous.get("files") or not self.latest_bundle()
+        version = previous.get("version", 0)
+        if changed and current:
+            version += 1
+            manifest = {
+                "version": version,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "provider": provider,
+                "voice": resolved_voice,
+                "files": current,
+            }
+            self._write_bundle(manifest)
+        return {
+            "version": version,
+            "bundle": str(self.bundle_path(version)) if version else None,
+            "changed": bool(changed and current),
+            "total": total,
+            "rendered": len(pending) - len(failed),
+            "skipped": total - len(pending),
+            "failed": failed,
+        }
+
+    def trigger_build(self, languages: Optional[List[str]], voice: Optional[str], user_id: Any) -> str:
+        """Queues a bundle build as a background job. Returns the job ID."""
+        from uuid import uuid4
+
+        from services.datasets.dataset_service import dataset_service
+        from workers.tasks.tts_tasks import generate_esp32_tts_bundle_task
+
+        job_id = str(uuid4())
+        dataset_service.create_job(
+            task_type="esp32_tts_bundle",
+            user_id=user_id,
+            payload={"languages": languages, "voice": voice},
+            job_id=job_id,
+        )
+        generate_esp32_tts_bundle_task.apply_async(args=[languages, voice], task_id=job_id)
+        return job_id
+
+    def _write_bundle(self, manifest: Dict[str, Any]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(manifest, indent=2, ensure_ascii=False)
+        target = self.bundle_path(manifest["version"])
+        temp = target.with_suffix(".tmp")
+        # MP3 is already compressed
+        with zipfile.ZipFile(temp, "w", compression=zipfile.ZIP_STORED) as bundle:
+            for item in manifest["files"]:
+                bundle.write(self.assets / item["path"], item["path"])
+            bundle.writestr(MANIFEST_NAME, data)
+        os.replace(temp, target)
+        manifest_temp = self.root / f"{MANIFEST_NAME}.tmp"
+        manifest_temp.write_text(data, encoding="utf-8")
+        os.replace(manifest_temp, self.root / MANIFEST_NAME)
+        self._prune()
+        logger.info(f"ESP32 TTS bundle v{manifest['version']} written: {len(manifest['files'])} files")
+
+    def _prune(self):
+        bundles = sorted(
+            (int(match.group(1)), path)
+            for path in self.root.iterdir()
+            if (match := BUNDLE_PATTERN.match(path.name))
+        )
+        for _, path in bundles[:-self.keep]:
+            path.unlink(missing_ok=True)
+
+
+esp32_bundle_builder = ESP32BundleBuilder(
+    settings.TTS_ESP32_BUNDLE_DIR,
+    concurrency=settings.TTS_ESP32_BUNDLE_CONCURRENCY,
+    keep=settings.TTS_ESP32_BUNDLE_KEEP,
+)
@@ -0,0 +1,35 @@
+"""
+SHA-256 helpers for library files with stat-keyed caching.
+
+A cached digest is reused while the file's (size, mtime_ns, inode) fingerprint is
+unchanged, so repeated scans of an untouched library do not re-read file contents.
+"""
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_fingerprint(path: Path) -> Dict[str, int]:
+    stats = path.stat()
+    return {"size": int(stats.st_size), "mtime_ns": int(stats.st_mtime_ns), "inode": int(stats.st_ino)}
+
+
+def sha256_for_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_sha256(path: Path, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Returns a cache entry {"sha256", "size", "mtime_ns", "inode"} for `path`,
+    recomputing the digest only when `cached` is missing or its fingerprint is stale.
+    """
+    fingerprint = file_fingerprint(path)
+    if isinstance(cached, dict) and cached.get("sha256") and all(cached.get(k) == v for k, v in fingerprint.items()):
+        return cached
+    return {"sha256": sha256_for_file(path), **fingerprint}
@@ -1,31 +1,216 @@
 import csv
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import numpy as np
 from datetime import datetime, timezone
 
+from services import alignment_service as alignment
+
 logger = logging.getLogger("signglove.fusion_service")
 
+# Columns in a sensor CSV that describe the recording rather than a channel.
+SENSOR_META_COLUMNS = {"timestamp", "gesture_label", "device_id", "source"}
+
+
+def _parse_float_column(values: Sequence[Any]) -> Optional[np.ndarray]:
+    """
+    Parses a CSV column into float64. Empty cells read as 0 (legacy behaviour).
+    Returns None when the column holds non-numeric text.
+    """
+    try:
+        return np.fromiter((float(v) if v else 0.0 for v in values), dtype=np.float64, count=len(values))
+    except (TypeError, ValueError):
+        return None
+
+
+class SensorChannels:
+    """
+    Column-oriented view of a sensor recording, sorted by timestamp.
+    Numeric channels live in one (rows x channels) float matrix so a single lerp
+    covers every channel; single (11) and dual-hand (22) layouts are handled alike.
+    """
+
+    def __init__(self, header: List[str], rows: List[List[str]]):
+        by_name = dict(zip(header, zip(*rows))) if rows else {k: () for k in header}
+        timestamps = _parse_float_column(by_name["timestamp"]) if "timestamp" in by_name else np.zeros(len(rows))
+        if timestamps is None:
+            raise ValueError("Sensor CSV has non-numeric timestamps")
+        order = np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps[order]
+
+        self.keys = [k for k in header if k not in SENSOR_META_COLUMNS]
+        numeric: List[np.ndarray] = []
+        self.numeric_keys: List[str] = []
+        self.text_columns: Dict[str, np.ndarray] = {}
+        for key in self.keys:
+            col = by_name[key]
+            parsed = _parse_float_column(col)
+            if parsed is None:
+                self.text_columns[key] = np.asarray(col, dtype=object)[order]
+            else:
+                self.numeric_keys.append(key)
+                numeric.append(parsed[order])
+        self.matrix = np.column_stack(numeric) if numeric else np.empty((len(rows), 0))
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
 class FusionService:
-    def __init__(self, csv_dir: Path):
+    # CV rows aligned and written per chunk during export
+    CHUNK_ROWS = 5000
+
+    def __init__(self, csv_dir: Path, resolver: Optional[Callable[[str], Path]] = None):
         self.csv_dir = csv_dir
+        self._resolver = resolver
 
-    def _load_csv(self, name: str) -> List[Dict[str, Any]]:
+    def _resolve(self, name: str) -> Path:
+        if self._resolver is not None:
+            return self._resolver(name)
         path = self.csv_dir / name
         if not path.exists():
             raise FileNotFoundError(f"CSV not found: {name}")
-        
-        with open(path, "r", encoding="utf-8") as f:
-            return list(csv.DictReader(f))
+        return path
+
+    def _iter_rows(self, path: Path, chunk_rows: int) -> Iterator[Tuple[List[str], List[List[str]]]]:
+        """Yields (header, rows) chunks, padding/truncating ragged rows to the header width."""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = [h.strip() for h in next(reader, [])]
+            width = len(header)
+            chunk: List[List[str]] = []
+            for row in reader:
+                if not row:
+                    continue
+                chunk.append((row + [""] * (width - len(row)))[:width])
+                if len(chunk) >= chunk_rows:
+                    yield header, chunk
+                    chunk = []
+            if chunk or not header:
+                yield header, chunk
+
+    def _load_table(self, path: Path) -> Tuple[List[str], List[List[str]]]:
+        header: List[str] = []
+        rows: List[List[str]] = []
+        for header, chunk in self._iter_rows(path, self.CHUNK_ROWS):
+            rows.extend(chunk)
+        return header, rows
+
+    def _scan_clock(self, path: Path) -> Tuple[int, float, float]:
+        """Cheap first pass over the CV file: (row count, first timestamp, last timestamp)."""
+        total, first_ts, last_ts = 0, 0.0, 0.0
+        for header, chunk in self._iter_rows(path, self.CHUNK_ROWS):
+            if not chunk:
+                continue
+            ts = self._timestamps(header, chunk)
+            if total == 0:
+                first_ts = float(ts[0])
+            last_ts = float(ts[-1])
+            total += len(chunk)
+        return total, first_ts, last_ts
+
+    @staticmethod
+    def _timestamps(header: List[str], rows: List[List[str]]) -> np.ndarray:
+        if "timestamp" not in header:
+            return np.zeros(len(rows))
+        col = header.index("timestamp")
+        ts = _parse_float_column([r[col] for r in rows])
+        if ts is None:
+            raise ValueError("CV CSV has non-numeric timestamps")
+        return ts
 
     def _get_timestamp(self, row: Dict[str, Any]) -> float:
         return float(row.get("timestamp") or 0)
 
+    def _load_columns(self, path: Path, pick: Callable[[List[str]], Sequence[str]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Streams a CSV keeping only its clock and the numeric columns chosen by `pick(header)`."""
+        ts_parts: List[np.ndarray] = []
+        parts: Dict[str, List[np.ndarray]] = {}
+        for header, chunk in self._iter_rows(path, self.CHUNK_ROWS):
+            if not chunk:
+                continue
+            ts_parts.append(self._timestamps(header, chunk))
+            for name in pick(header):
+                col = header.index(name)
+                parsed = _parse_float_column([r[col] for r in chunk])
+                parts.setdefault(name, []).append(parsed if parsed is not None else np.zeros(len(chunk)))
+        ts = np.concatenate(ts_parts) if ts_parts else np.empty(0)
+        return ts, {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+    def estimate_offset(
+        self,
+        cv_name: str,
+        sensor_name: str,
+        rate_hz: float = alignment.DEFAULT_RATE_HZ,
+        max_lag_ms: float = alignment.DEFAULT_MAX_LAG_MS,
+    ) -> Dict[str, Any]:
+        """Cross-correlation estimate of `offset_ms` for a CV/sensor pair."""
+        cv_ts, cv_cols = self._load_columns(self._resolve(cv_name), alignment.cv_motion_columns)
+        s_ts, s_cols = self._load_columns(self._resolve(sensor_name), alignment.sensor_motion_columns)
+        if not cv_cols:
+            raise ValueError("CV CSV has no wrist landmark columns (L_x0/R_x0)")
+        if not s_cols:
+            raise ValueError("Sensor CSV has no accelerometer columns")
+
+        cv_t, cv_v = alignment.cv_velocity_series(cv_ts, cv_cols)
+        s_t, s_v = alignment.sensor_magnitude_series(s_ts, s_cols)
+        return alignment.estimate_offset(cv_t, cv_v, s_t, s_v, rate_hz=rate_hz, max_lag_ms=max_lag_ms)
+
+    @staticmethod
+    def trim_window(cv_start_ts: float, cv_end_ts: float, trim_in_pct: float, trim_out_pct: float) -> Tuple[float, float]:
+        """Trimming window based on CV duration."""
+        cv_duration = cv_end_ts - cv_start_ts
+        return (
+            cv_start_ts + (cv_duration * (trim_in_pct / 100.0)),
+            cv_start_ts + (cv_duration * (trim_out_pct / 100.0)),
+        )
+
+    def align(
+        self,
+        cv_ts: np.ndarray,
+        sensor: SensorChannels,
+        offset_ms: float,
+        window: Tuple[float, float],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized CV-clocked merge.
+        Returns (kept CV row indices, left sensor index per kept row, interpolated numeric matrix).
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, sensor.matrix.shape[1])))
+        if cv_ts.size == 0 or len(sensor) < 2:
+            return empty
+
+        # Positive offset means sensor data is shifted "later" in time
+        s_ts = sensor.timestamps + (offset_ms / 1000.0)
+
+        # Trimming window plus sensor coverage bounds
+        window_start, window_end = window
+        mask = (cv_ts >= window_start) & (cv_ts <= window_end) & (cv_ts >= s_ts[0]) & (cv_ts <= s_ts[-1])
+        cv_idx = np.flatnonzero(mask)
+        if cv_idx.size == 0:
+            return empty
+        t_target = cv_ts[cv_idx]
+
+        # S1.ts <= t_target <= S2.ts
+        left = np.clip(np.searchsorted(s_ts, t_target, side="left") - 1, 0, len(s_ts) - 2)
+        t1 = s_ts[left]
+        denom = s_ts[left + 1] - t1
+        factor = np.divide(t_target - t1, denom, out=np.zeros_like(t_target), where=denom != 0)
+
+        v1 = sensor.matrix[left]
+        v2 = sensor.matrix[left + 1]
+        fused = v1 + (v2 - v1) * factor[:, None]
+        return cv_idx, left, np.round(fused, 6)
+
     def interpolate_sensor_data(
-        self, 
-        cv_rows: List[Dict[str, Any]], 
-        sensor_rows: List[Dict[str, Any]], 
+        self,
+        cv_rows: List[Dict[str, Any]],
+        sensor_rows: List[Dict[str, Any]],
         offset_ms: float,
         trim_in_pct: float,
         trim_out_pct: float,
@@ -33,78 +218,35 @@ class FusionService:
     ) -> List[Dict[str, Any]]:
         """
         Merges CV and Sensor data using Linear Interpolation.
-        CV acts as the 'Master Clock'.
+        CV acts as the 'Master Clock'. Row-dict wrapper around `align`.
         """
         if not cv_rows or not sensor_rows:
             return []
 
-        # 1. Apply Offset to Sensor Timestamps
-        # Positive offset means sensor data is shifted "later" in time
-        s_data = []
-        for r in sensor_rows:
-            s_data.append({
-                "ts": self._get_timestamp(r) + (offset_ms / 1000.0),
-                "vals": r
-            })
-
-        # 2. Determine Trimming Window based on CV duration
-        cv_start_ts = self._get_timestamp(cv_rows[0])
-        cv_end_ts = self._get_timestamp(cv_rows[-1])
-        cv_duration = cv_end_ts - cv_start_ts
+        header = list(sensor_rows[0].keys())
+        sensor = SensorChannels(header, [[r.get(k) for k in header] for r in sensor_rows])
+        cv_ts = np.array([self._get_timestamp(r) for r in cv_rows], dtype=np.float64)
+        window = self.trim_window(cv_ts[0], cv_ts[-1], trim_in_pct, trim_out_pct)
 
-        window_start = cv_start_ts + (cv_duration * (trim_in_pct / 100.0))
-        window_end = cv_start_ts + (cv_duration * (trim_out_pct / 100.0))
+        cv_idx, left, fused = self.align(cv_ts, sensor, offset_ms, window)
+        fused_values = fused.tolist()
 
-        # 3. Filter CV rows to window
-        active_cv = [r for r in cv_rows if window_start <= self._get_timestamp(r) <= window_end]
-        
-        # Identify sensor columns (exclude timestamp, etc)
-        # We assume sensor models want: f1..f5, ax, ay, az, gx, gy, gz
-        sensor_keys = [k for k in sensor_rows[0].keys() if k not in {"timestamp", "gesture_label", "device_id", "source"}]
-        
         fused_rows = []
-        s_idx = 0
-        
-        for cv_row in active_cv:
-            t_target = self._get_timestamp(cv_row)
-            
-            # Find two sensor points S1 and S2 such that S1.ts <= t_target < S2.ts
-            while s_idx < len(s_data) - 1 and s_data[s_idx+1]["ts"] < t_target:
-                s_idx += 1
-            
-            if s_idx >= len(s_data) - 1:
-                # Out of sensor data bounds, pad with last known or skip
-                continue
-                
-            s1 = s_data[s_idx]
-            s2 = s_data[s_idx+1]
-            
-            if s1["ts"] > t_target:
-                # Target is before first sensor point
-                continue
-
-            # Linear Interpolation Factor (0.0 to 1.0)
-            denom = s2["ts"] - s1["ts"]
-            factor = (t_target - s1["ts"]) / denom if denom != 0 else 0
-            
-            # Create the Fused Row
-            fused_row = cv_row.copy()
-            
-            for key in sensor_keys:
-                try:
-                    v1 = float(s1["vals"].get(key) or 0)
-                    v2 = float(s2["vals"].get(key) or 0)
-                    # Interpolate: v = v1 + (v2 - v1) * factor
-                    fused_val = v1 + (v2 - v1) * factor
-                    fused_row[f"sensor_{key}"] = round(fused_val, 6)
-                except ValueError:
-                    fused_row[f"sensor_{key}"] = s1["vals"].get(key)
-
+        for pos, (i, s1) in enumerate(zip(cv_idx.tolist(), left.tolist())):
+            fused_row = cv_rows[i].copy()
+            for key in sensor.keys:
+                if key in sensor.text_columns:
+                    fused_row[f"sensor_{key}"] = sensor.text_columns[key][s1]
+            for j, key in enumerate(sensor.numeric_keys):
+                fused_row[f"sensor_{key}"] = fused_values[pos][j]
             fused_rows.append(fused_row)
-
         return fused_rows
 
-    def export_fusion(self, params: Dict[str, Any]) -> str:
+    def export_fusion(self, params: Dict[str, Any], progress_cb: Optional[ProgressCallback] = None) -> str:
+        """
+        Streams the CV file in chunks against the in-memory sensor matrix and writes
+        the result atomically (temp file + rename) into `csv_dir`.
+        """
         cv_name = params["cv_name"]
         sensor_name = params["sensor_name"]
         offset_ms = params.get("offset_ms", 0)
@@ -112,26 +254,69 @@ class FusionService:
         trim_out = params.get("trim_out_pct", 100)
         mode = params.get("mode", "single")
 
-        cv_rows = self._load_csv(cv_name)
-        sensor_rows = self._load_csv(sensor_name)
-
-        fused = self.interpolate_sensor_data(cv_rows, sensor_rows, offset_ms, trim_in, trim_out, mode)
-
-        if not fused:
+        cv_path = self._resolve(cv_name)
+        sensor = SensorChannels(*self._load_table(self._resolve(sensor_name)))
+        total, first_ts, last_ts = self._scan_clock(cv_path)
+        if total == 0 or len(sensor) == 0:
             raise ValueError("No data remained after alignment and trimming. Check offsets.")
+        window = self.trim_window(first_ts, last_ts, trim_in, trim_out)
 
         # Save to a new file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         export_name = f"fusion_{mode}_aligned_{timestamp}.csv"
         export_path = self.csv_dir / export_name
+        tmp_path = export_path.with_name(f".{export_name}.tmp")
+
+        written = 0
+        done = 0
+        try:
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                for cv_header, chunk in self._iter_rows(cv_path, self.CHUNK_ROWS):
+                    if done == 0:
+                        writer.writerow(cv_header + [f"sensor_{k}" for k in sensor.keys])
+                    cv_idx, left, fused = self.align(self._timestamps(cv_header, chunk), sensor, offset_ms, window)
+                    written += self._write_rows(writer, chunk, sensor, cv_idx, left, fused)
+                    done += len(chunk)
+                    if progress_cb:
+                        progress_cb(done, total)
 
-        with open(export_path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fused[0].keys())
-            writer.writeheader()
-            writer.writerows(fused)
+            if not written:
+                raise ValueError("No data remained after alignment and trimming. Check offsets.")
+            os.replace(tmp_path, export_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
+        logger.info("Fusion export %s: %d/%d CV rows aligned", export_name, written, total)
         return export_name
 
-# Singleton instance
-from api.core.settings import settings
-fusion_service = FusionService(Path(settings.DATA_DIR) / "active")
+    def _write_rows(
+        self,
+        writer: Any,
+        cv_rows: List[List[str]],
+        sensor: SensorChannels,
+        cv_idx: np.ndarray,
+        left: np.ndarray,
+        fused: np.ndarray,
+    ) -> int:
+        """Bulk-writes aligned rows: CV columns followed by `sensor_*` channels in sensor header order."""
+        # Assemble output columns once, in the sensor CSV's key order
+        columns: List[Any] = []
+        numeric_pos = {k: j for j, k in enumerate(sensor.numeric_keys)}
+        for key in sensor.keys:
+            if key in numeric_pos:
+                columns.append(fused[:, numeric_pos[key]].tolist())
+            else:
+                columns.append(sensor.text_columns[key][left].tolist())
+
+        kept = [cv_rows[i] for i in cv_idx.tolist()]
+        sensor_values = zip(*columns) if columns else [()] * len(kept)
+        writer.writerows(row + list(vals) for row, vals in zip(kept, sensor_values))
+        return len(kept)
+
+# Singleton instance: reads from any library root, writes into the active library
+from services.datasets.dataset_service import dataset_service
+fusion_service = FusionService(
+    dataset_service.active_dir,
+    resolver=lambda name: dataset_service.resolve_csv_path(name)[1],
+)
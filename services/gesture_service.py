@@ -9,24 +9,15 @@ from typing import Dict, Any, List, Optional
 from api.core.settings import settings
 from AI.runtime_adapter import normalize_export_format
 from services.model_library_service import model_library_service
+from api.utils.lazy_imports import available, optional_import
 
 logger = logging.getLogger("signglove.gesture_service")
 
-# Optional ML imports for local fallback (only if installed)
-try:
-    import cv2
-except ImportError:
-    cv2 = None
 
-try:
-    from ultralytics import YOLO
-except ImportError:
-    YOLO = None
-
-try:
-    from AI.pipelines.yolo_mediapipe_lstm import YoloMediapipeSequence
-except ImportError:
-    YoloMediapipeSequence = None
+def _yolo_class():
+    """ultralytics.YOLO for the local fallback, imported on first use (pulls in torch)."""
+    module = optional_import("ultralytics")
+    return getattr(module, "YOLO", None)
 
 class GestureService:
     def __init__(self):
@@ -63,9 +54,12 @@ class GestureService:
 
     def _init_local_models(self):
         """Initialize models locally if libraries and files are available."""
-        if YOLO is None or cv2 is None:
+        if not (available("ultralytics") and available("cv2")):
             logger.info("Local ML libraries (ultralytics/cv2) not found. Local fallback disabled.")
             return
+        YOLO = _yolo_class()
+        if YOLO is None:
+            return
 
         registry = model_library_service.load_registry()
         yolo_model = next((m for m in registry.get("models", []) if m.get("metadata", {}).get("export_format") == "yolo"), None)
@@ -79,6 +73,8 @@ class GestureService:
             except Exception as e:
                 logger.error(f"Failed to load local YOLO: {e}")
 
+        pipelines = optional_import("AI.pipelines.yolo_mediapipe_lstm")
+        YoloMediapipeSequence = getattr(pipelines, "YoloMediapipeSequence", None)
         if YoloMediapipeSequence is not None and self.detector is not None:
             try:
                 import mediapipe as mp
@@ -222,6 +218,7 @@ class GestureService:
         model_entry = next((m for m in registry.get("models", []) if m.get("id") == model_id), None)
         if model_entry:
             self.yolo_path = model_entry["model_path"]
+            YOLO = _yolo_class()
             if YOLO:
                 self.detector = YOLO(self.yolo_path)
 
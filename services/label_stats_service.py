@@ -0,0 +1,254 @@
+"""
+Materialized per-label gesture statistics (`label_stats` collection).
+
+Two document kinds, both keyed by a string _id:
+- "samples|<label>": sample_count, last_updated and a HyperLogLog sketch of distinct
+  session ids (`hll`, sparse {register: rank} merged with $max).
+- "feedback|<model_id>|<label>": running total / correct tallies for that model.
+
+Sensor writes and feedback submissions apply $inc/$max updates, so the gesture summary
+is one indexed read. HLL registers cannot be decremented; deletes and relabels rebuild
+the affected labels from the sample store instead.
+"""
+import hashlib
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+from api.core.database import feedback_collection, label_stats_collection
+
+logger = logging.getLogger("signglove.label_stats_service")
+
+LABEL_STATS_COLLECTION = "label_stats"
+# 2^8 registers: ~6.5% standard error on distinct session counts
+HLL_PRECISION = 8
+HLL_REGISTERS = 1 << HLL_PRECISION
+_HLL_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+
+
+def hll_position(value: Any) -> Tuple[int, int]:
+    """(register index, rank) of a value in the HyperLogLog sketch."""
+    h = int.from_bytes(hashlib.sha1(str(value).encode("utf-8")).digest()[:8], "big")
+    index = h >> (64 - HLL_PRECISION)
+    rest = h & ((1 << (64 - HLL_PRECISION)) - 1)
+    rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+    return index, rank
+
+
+def hll_registers(values: Iterable[Any]) -> Dict[str, int]:
+    registers: Dict[str, int] = {}
+    for value in values:
+        index, rank = hll_position(value)
+        key = str(index)
+        if rank > registers.get(key, 0):
+            registers[key] = rank
+    return registers
+
+
+def hll_estimate(registers: Optional[Dict[str, int]]) -> int:
+    """Distinct-count estimate with the small-range (linear counting) correction."""
+    registers = registers or {}
+    if not registers:
+        return 0
+    total = sum(2.0 ** -int(registers.get(str(i), 0)) for i in range(HLL_REGISTERS))
+    estimate = _HLL_ALPHA * HLL_REGISTERS * HLL_REGISTERS / total
+    zeros = HLL_REGISTERS - len(registers)
+    if estimate <= 2.5 * HLL_REGISTERS and zeros:
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+    return int(round(estimate))
+
+
+def samples_id(label: Any) -> str:
+    return f"samples|{label}"
+
+
+def feedback_id(model_id: Any, label: Any) -> str:
+    return f"feedback|{model_id}|{label}"
+
+
+def sample_updates(docs: Iterable[Dict[str, Any]]) -> List[UpdateOne]:
+    """$inc/$max upserts for SensorData-shaped documents, one per label touched."""
+    from services.sensor_store import sample_meta, to_samples
+
+    per_label: Dict[Any, Dict[str, Any]] = defaultdict(lambda: {"samples": 0, "sessions": set(), "last": None})
+    for doc in docs:
+        samples = to_samples(doc)
+        if not samples:
+            continue
+        meta = sample_meta(doc)
+        entry = per_label[meta["label"]]
+        entry["samples"] += len(samples)
+        if meta["session_id"] is not None:
+            entry["sessions"].add(meta["session_id"])
+        ts = samples[0]["timestamp"]
+        entry["last"] = ts if entry["last"] is None or ts > entry["last"] else entry["last"]
+
+    updates = []
+    for label, entry in per_label.items():
+        maxes = {f"hll.{k}": v for k, v in hll_registers(entry["sessions"]).items()}
+        maxes["last_updated"] = entry["last"]
+        updates.append(UpdateOne(
+            {"_id": samples_id(label)},
+            {
+                "$setOnInsert": {"kind": "samples", "label": label},
+                "$inc": {"sample_count": entry["samples"]},
+                "$max": maxes,
+            },
+            upsert=True,
+        ))
+    return updates
+
+
+def feedback_update(model_id: str, label: str, is_correct: bool, ts: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"_id": feedback_id(model_id, label)},
+        {
+            "$setOnInsert": {"kind": "feedback", "label": label, "model_id": model_id},
+            "$inc": {"total": 1, "correct": int(bool(is_correct))},
+            "$max": {"last_updated": ts},
+        },
+        upsert=True,
+    )
+
+
+class LabelStatsService:
+    def __init__(self, collection):
+        self.collection = collection
+
+    # --- Incremental updates ---
+
+    async def record_samples(self, docs: List[Dict[str, Any]]):
+        updates = sample_updates(docs)
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+
+    async def record_feedback(self, model_id: str, label: str, is_correct: bool, ts: Optional[datetime] = None):
+        update = feedback_update(model_id, label, is_correct, ts or datetime.now(timezone.utc))
+        await self.collection.bulk_write([update])
+
+    # --- Rebuilds ---
+
+    async def rebuild_labels(self, labels: Optional[Iterable[Any]] = None):
+        """
+        Recomputes sample stats from the sample store, for `labels` or every label.
+        Labels with no remaining samples are removed.
+        """
+        from services.sensor_store import sensor_store
+
+        labels = None if labels is None else list(set(labels))
+        if labels == []:
+            return
+        breakdown = await sensor_store.label_breakdown(labels)
+        if labels is None:
+            await self.collection.delete_many({"kind": "samples"})
+            labels = list(breakdown)
+
+        ops = []
+        for label in labels:
+            entry = breakdown.get(label)
+            if not entry:
+                await self.collection.delete_one({"_id": samples_id(label)})
+                continue
+            ops.append(ReplaceOne(
+                {"_id": samples_id(label)},
+                {
+                    "_id": samples_id(label),
+                    "kind": "samples",
+                    "label": label,
+                    "sample_count": entry["sample_count"],
+                    "last_updated": entry["last_updated"],
+                    "hll": hll_registers(entry["sessions"]),
+                },
+                upsert=True,
+            ))
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+
+    async def rebuild_feedback(self):
+        pipeline = [
+            {"$group": {
+                "_id": {"model_id": "$model_id", "label": "$true_label"},
+                "total": {"$sum": 1},
+                "correct": {"$sum": {"$cond": ["$is_correct", 1, 0]}},
+                "last_updated": {"$max": "$timestamp"},
+            }}
+        ]
+        ops = []
+        async for g in feedback_collection.aggregate(pipeline):
+            model_id, label = g["_id"].get("model_id"), g["_id"].get("label")
+            ops.append(ReplaceOne(
+                {"_id": feedback_id(model_id, label)},
+                {
+                    "_id": feedback_id(model_id, label),
+                    "kind": "feedback",
+                    "label": label,
+                    "model_id": model_id,
+                    "total": g["total"],
+                    "correct": g["correct"],
+                    "last_updated": g["last_updated"],
+                },
+                upsert=True,
+            ))
+        await self.collection.delete_many({"kind": "feedback"})
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+
+    async def rebuild_all(self):
+        await self.rebuild_labels()
+        await self.rebuild_feedback()
+
+    async def clear_samples(self):
+        await self.collection.delete_many({"kind": "samples"})
+
+    async def bootstrap(self):
+        """Builds the collection once when it is empty (first start after upgrade)."""
+        if await self.collection.estimated_document_count() == 0:
+            logger.info("label_stats is empty; rebuilding from sensor samples and feedback")
+            await self.rebuild_all()
+
+    # --- Reads ---
+
+    async def model_feedback(self, model_id: str) -> List[Dict[str, Any]]:
+        """[{label, accuracy, total_feedback}] for one model."""
+        return [
+            {
+                "label": doc.get("label"),
+                "accuracy": doc.get("correct", 0) / doc["total"] if doc.get("total") else 0.0,
+                "total_feedback": int(doc.get("total", 0)),
+            }
+            async for doc in self.collection.find({"kind": "feedback", "model_id": model_id})
+        ]
+
+    async def summary(self, model_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[Any, Dict[str, Any]]]:
+        """
+        (per-label counts, {label: feedback stats for model_id}) from a single indexed read.
+        """
+        query: Dict[str, Any] = {"kind": "samples"}
+        if model_id:
+            query = {"$or": [query, {"kind": "feedback", "model_id": model_id}]}
+
+        counts, feedback = [], {}
+        async for doc in self.collection.find(query):
+            if doc["kind"] == "samples":
+                counts.append({
+                    "label": doc.get("label"),
+                    "sample_count": int(doc.get("sample_count", 0)),
+                    "session_count": hll_estimate(doc.get("hll")),
+                    "last_updated": doc.get("last_updated"),
+                })
+            else:
+                total = int(doc.get("total", 0))
+                feedback[doc.get("label")] = {
+                    "label": doc.get("label"),
+                    "model_id": doc.get("model_id"),
+                    "reliability": (doc.get("correct", 0) / total) if total else None,
+                    "total_feedback": total,
+                }
+        return counts, feedback
+
+
+label_stats_service = LabelStatsService(label_stats_collection)
@@ -12,6 +12,7 @@ from sqlalchemy import select
 
 from api.core.database import AsyncSessionLocal
 from db.models import Dataset, Model
+from services.file_integrity import cached_sha256
 from services.model_library_service import model_library_service
 
 logger = logging.getLogger("signglove.model_service")
@@ -80,12 +81,32 @@ class ModelService:
             "runtime_status": entry.get("runtime_status"),
         }
 
-    def _sha256_for_file(self, path: Path) -> str:
-        digest = hashlib.sha256()
-        with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                digest.update(chunk)
-        return digest.hexdigest()
+    def _sha256_for_file(self, path: Path, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Digest entry for `path`; reuses `cached` while its (size, mtime_ns, inode) still match."""
+        return cached_sha256(path, cached)
+
+    def verify_integrity(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Re-checks artifact and metadata hashes against the registered integrity block.
+        Files untouched since registration are not re-read.
+        """
+        integrity = entry.get("integrity") or {}
+        # Registry rows (_row_from_entry) only carry model_path
+        artifact_path = entry.get("artifact_path") or entry.get("model_path")
+        checks = {
+            "artifact": (artifact_path, integrity.get("artifact_sha256"), integrity.get("artifact_fingerprint")),
+            "metadata": (entry.get("metadata_path"), integrity.get("metadata_sha256"), integrity.get("metadata_fingerprint")),
+        }
+        result: Dict[str, Any] = {}
+        for key, (raw_path, expected, fingerprint) in checks.items():
+            path = Path(raw_path) if raw_path else None
+            if not path or not path.is_file() or not expected:
+                result[key] = False
+                continue
+            cached = {"sha256": expected, **fingerprint} if isinstance(fingerprint, dict) else None
+            result[key] = self._sha256_for_file(path, cached)["sha256"] == expected
+        result["ok"] = result["artifact"] and result["metadata"]
+        return result
 
     def _sha256_for_bytes(self, payload: bytes) -> str:
         return hashlib.sha256(payload).hexdigest()
@@ -186,8 +207,10 @@ class ModelService:
         family = str(metadata.get("model_family") or "unknown").strip() or "unknown"
         accuracy = metadata.get("accuracy")
         f1_score = metadata.get("f1")
-        artifact_sha256 = self._sha256_for_file(model_path)
-        metadata_sha256 = self._sha256_for_file(metadata_path)
+        artifact_hash = self._sha256_for_file(model_path)
+        metadata_hash = self._sha256_for_file(metadata_path)
+        artifact_sha256 = artifact_hash.pop("sha256")
+        metadata_sha256 = metadata_hash.pop("sha256")
 
         training_dataset_uuid = UUID(training_dataset_id) if training_dataset_id else None
         try:
@@ -207,6 +230,9 @@ class ModelService:
                     "integrity": {
                         "artifact_sha256": artifact_sha256,
                         "metadata_sha256": metadata_sha256,
+                        # (size, mtime_ns, inode) at hashing time, lets verify_integrity skip re-reads
+                        "artifact_fingerprint": artifact_hash,
+                        "metadata_fingerprint": metadata_hash,
                         "verified_at": datetime.now(timezone.utc).isoformat(),
                     },
                     "experiment": self._build_experiment_payload(
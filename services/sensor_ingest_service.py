@@ -0,0 +1,245 @@
+"""
+Bulk ingestion of raw sensor CSV uploads into sensor storage.
+
+Files are read with typed pandas readers in bounded chunks, validated with
+vectorized checks and grouped into per-session documents shaped like
+SensorData (`sensor_values` batches), then written to the sensor samples
+time-series collection with unordered insert_many.
+"""
+import logging
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.core.settings import settings
+from services.label_stats_service import LABEL_STATS_COLLECTION, sample_updates
+from services.sensor_store import SAMPLES_COLLECTION, sync_database, to_samples
+
+logger = logging.getLogger("signglove.sensor_ingest_service")
+
+REQUIRED_COLUMNS = ("session_id", "label")
+SENSOR_COLUMNS = tuple(f"flex{i}" for i in range(1, 6)) + (
+    "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z",
+)
+SAMPLE_DIM = len(SENSOR_COLUMNS)
+# Legacy layout: one "values" column holding "[v1, ..., v11]"
+LEGACY_VALUES_COLUMN = "values"
+
+PARSE_CHUNK_ROWS = 100_000
+# Samples per Mongo document; keeps documents far below the 16MB BSON limit
+MAX_SAMPLES_PER_DOCUMENT = 1000
+# Documents per insert_many; pymongo splits the samples into wire-size messages itself
+INSERT_CHUNK_DOCUMENTS = 100
+# Uploads up to this size are ingested in the request, larger ones as a job
+INLINE_INGEST_MAX_BYTES = 5 * 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _count_rows(path: Path) -> int:
+    """Data rows in a CSV (lines minus header), counted without parsing."""
+    lines = 0
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+
+def detect_format(path: Path) -> str:
+    """Returns "columns" or "values" for the two supported upload layouts."""
+    try:
+        columns = set(pd.read_csv(path, nrows=0).columns)
+    except pd.errors.EmptyDataError:
+        raise ValueError("CSV file is empty")
+    if all(c in columns for c in REQUIRED_COLUMNS + SENSOR_COLUMNS):
+        return "columns"
+    if all(c in columns for c in REQUIRED_COLUMNS) and LEGACY_VALUES_COLUMN in columns:
+        return "values"
+    raise ValueError(
+        f"CSV must contain columns: {list(REQUIRED_COLUMNS + SENSOR_COLUMNS)} "
+        f"or {list(REQUIRED_COLUMNS) + [LEGACY_VALUES_COLUMN]}"
+    )
+
+
+def parse_values_column(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized parse of the legacy "[v1, ..., v11]" column.
+    Returns (samples[n, 11], valid[n]); rows with the wrong length or non-numeric entries are invalid.
+    """
+    parts = (
+        values.astype("string")
+        .str.strip()
+        .str.strip("[]()")
+        .str.split(",", expand=True)
+    )
+    n = len(values)
+    if parts.shape[1] < SAMPLE_DIM:
+        return np.zeros((n, SAMPLE_DIM)), np.zeros(n, dtype=bool)
+    samples = (
+        parts.iloc[:, :SAMPLE_DIM]
+        .apply(lambda col: pd.to_numeric(col.str.strip(), errors="coerce"))
+        .to_numpy(dtype=np.float64)
+    )
+    valid = ~np.isnan(samples).any(axis=1)
+    if parts.shape[1] > SAMPLE_DIM:
+        valid &= parts.iloc[:, SAMPLE_DIM:].isna().all(axis=1).to_numpy()
+    return samples, valid
+
+
+def parse_frame(frame: pd.DataFrame, fmt: str, default_session: str) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Validates one parsed chunk. Returns (ids[session_id, label], samples) for valid rows only."""
+    if fmt == "values":
+        samples, valid = parse_values_column(frame[LEGACY_VALUES_COLUMN])
+    else:
+        samples = frame[list(SENSOR_COLUMNS)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        valid = ~np.isnan(samples).any(axis=1)
+    ids = pd.DataFrame({
+        "session_id": frame["session_id"].fillna(default_session).astype(str).to_numpy(),
+        "label": frame["label"].fillna("unknown").astype(str).to_numpy(),
+    })
+    return ids[valid].reset_index(drop=True), samples[valid]
+
+
+def build_documents(
+    ids: pd.DataFrame,
+    samples: np.ndarray,
+    base: Dict[str, Any],
+) -> Iterator[Dict[str, Any]]:
+    """Groups samples by (session_id, label) in first-seen order into SensorData-shaped documents."""
+    if not len(ids):
+        return
+    codes, _ = pd.factorize(pd.MultiIndex.from_frame(ids))
+    order = np.argsort(codes, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+    session_ids = ids["session_id"].to_numpy()
+    labels = ids["label"].to_numpy()
+    for idx in groups:
+        for start in range(0, idx.shape[0], MAX_SAMPLES_PER_DOCUMENT):
+            part = idx[start:start + MAX_SAMPLES_PER_DOCUMENT]
+            yield {
+                **base,
+                "session_id": str(session_ids[part[0]]),
+                "gesture_label": str(labels[part[0]]),
+                "sensor_values": samples[part].tolist(),
+            }
+
+
+class SensorIngestService:
+    def __init__(self):
+        # Under the shared storage volume so Celery workers can read staged uploads.
+        # The ".upload" suffix keeps staged files out of the CSV library listing.
+        self.staging_dir = Path(settings.DATA_DIR) / "ingest"
+        self._sync_collection = None
+        self._sync_stats_collection = None
+
+    def iter_documents(
+        self,
+        path: Path,
+        upload_id: str,
+        filename: str,
+        stats: Optional[Dict[str, int]] = None,
+        progress_cb: Optional[ProgressCallback] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streams per-session documents from a CSV on disk. `stats` is updated with
+        rows_processed / rows_skipped as chunks are consumed.
+        """
+        stats = stats if stats is not None else {}
+        stats.setdefault("rows_processed", 0)
+        stats.setdefault("rows_skipped", 0)
+        fmt = detect_format(path)
+        usecols = list(REQUIRED_COLUMNS) + ([LEGACY_VALUES_COLUMN] if fmt == "values" else list(SENSOR_COLUMNS))
+        dtype = {c: "string" for c in REQUIRED_COLUMNS}
+        if fmt == "values":
+            dtype[LEGACY_VALUES_COLUMN] = "string"
+        total = _count_rows(path) if progress_cb else 0
+
+        received_at = datetime.now(timezone.utc)
+        base = {
+            "source": "csv_upload",
+            "device_info": {"source": "csv_upload", "device_id": None},
+            "upload_id": upload_id,
+            "filename": filename,
+            "timestamp": received_at,
+            "_timestamp": received_at,
+        }
+        done = 0
+        for frame in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=PARSE_CHUNK_ROWS):
+            ids, samples = parse_frame(frame, fmt, default_session=f"upload_{upload_id}")
+            done += len(frame)
+            stats["rows_processed"] += len(ids)
+            stats["rows_skipped"] += len(frame) - len(ids)
+            yield from build_documents(ids, samples, base)
+            if progress_cb:
+                progress_cb(done, max(total, done))
+
+    def insert_documents(self, collection, documents: Iterable[Dict[str, Any]], stats_collection=None) -> int:
+        """
+        Synchronous (pymongo) bounded unordered inserts of the documents' samples into
+        the time-series collection. Batches written in full are folded into
+        `stats_collection` (label_stats) when given. Returns samples inserted.
+        """
+        from pymongo.errors import BulkWriteError
+
+        inserted = 0
+        for batch in _batched(documents, INSERT_CHUNK_DOCUMENTS):
+            samples = [s for doc in batch for s in to_samples(doc)]
+            try:
+                inserted += len(collection.insert_many(samples, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                inserted += int(e.details.get("nInserted", 0))
+                logger.error(f"Sensor ingest batch partially failed: {len(e.details.get('writeErrors', []))} errors; label_stats needs a rebuild")
+                continue
+            if stats_collection is not None:
+                stats_collection.bulk_write(sample_updates(batch), ordered=False)
+        return inserted
+
+    def sync_collection(self):
+        """pymongo handle on the sensor samples collection for Celery workers."""
+        if self._sync_collection is None:
+            self._sync_collection = sync_database()[SAMPLES_COLLECTION]
+        return self._sync_collection
+
+    def sync_stats_collection(self):
+        """pymongo handle on label_stats for Celery workers."""
+        if self._sync_stats_collection is None:
+            self._sync_stats_collection = sync_database()[LABEL_STATS_COLLECTION]
+        return self._sync_stats_collection
+
+    def trigger_ingest(self, upload_path: Path, filename: str, user_id: Any) -> str:
+        """Stages an uploaded CSV on shared storage and queues the ingest job. Returns the job ID."""
+        from uuid import uuid4
+
+        from services.datasets.dataset_service import dataset_service
+        from workers.tasks.sensor_tasks import ingest_sensor_csv_task
+
+        job_id = str(uuid4())
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        staged = self.staging_dir / f"{job_id}.csv.upload"
+        shutil.move(str(upload_path), staged)
+        dataset_service.create_job(
+            task_type="sensor_csv_ingest",
+            user_id=user_id,
+            payload={"filename": filename, "staged_path": str(staged)},
+            job_id=job_id,
+        )
+        ingest_sensor_csv_task.apply_async(args=[str(staged), filename], task_id=job_id)
+        return job_id
+
+
+sensor_ingest_service = SensorIngestService()
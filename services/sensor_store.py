@@ -0,0 +1,507 @@
+"""
+Sensor sample storage on a MongoDB time-series collection.
+
+Each glove sample is one measurement {timestamp, meta, seq, values} where meta is
+{session_id, label, source, device_id}. MongoDB buckets measurements per meta value,
+so range scans, counts and per-label aggregations read compressed buckets instead of
+branching over the two legacy `sensor_data` shapes (`values` / `sensor_values`).
+
+Every write invalidates the cached endpoint responses built from the affected
+sessions (tags below), so those can be cached for minutes.
+
+Readers get legacy-shaped documents back through SensorStore. Documents still in
+`sensor_data` (not yet migrated) are included, so the switch is transparent; the
+migration moves them out, after which the legacy lookups hit an empty collection.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+from api.core.database import sensor_collection, sensor_samples_collection
+from api.utils.cache import cache
+from services.label_stats_service import label_stats_service
+
+logger = logging.getLogger("signglove.sensor_store")
+
+SAMPLES_COLLECTION = "sensor_samples"
+LEGACY_ARCHIVE_COLLECTION = "sensor_data_archive"
+TIMESERIES_OPTIONS = {"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"}
+INSERT_CHUNK_SAMPLES = 5000
+MIGRATION_BATCH_DOCS = 500
+DUPLICATE_KEY_ERROR = 11000
+# Export order: samples of one batch share a timestamp and keep their order through seq.
+# api.core.indexes declares a matching index so exports stream without a blocking sort.
+EXPORT_SORT = [("timestamp", ASCENDING), ("seq", ASCENDING)]
+
+# Legacy documents store a batch of samples in one of two shapes
+LEGACY_SAMPLE_COUNT = {
+    "$cond": [
+        {"$isArray": "$sensor_values"},
+        {"$size": "$sensor_values"},
+        {"$cond": [{"$isArray": "$values"}, 1, 0]},
+    ]
+}
+LEGACY_LABEL = {"$ifNull": ["$gesture_label", "$label"]}
+
+# Response cache tags: every sensor-derived entry carries SENSOR_DATA_TAG
+SENSOR_DATA_TAG = "sensor_data"
+GESTURE_LIST_TAG = "gesture_list"
+
+
+def session_tag(session_id: Any) -> str:
+    return f"session:{session_id}"
+
+
+def as_datetime(value: Any) -> Optional[datetime]:
+    """Coerces stored timestamps (datetime, epoch s/ms, ISO string) to an aware UTC datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (int, float)):
+        num = float(value)
+        if num > 1e12:
+            num /= 1000.0
+        try:
+            return datetime.fromtimestamp(num, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        raw = value.strip()
+        if not raw:
+            return None
+        if raw.isdigit():
+            return as_datetime(int(raw))
+        if raw.endswith("Z"):
+            raw = raw[:-1] + "+00:00"
+        try:
+            return as_datetime(datetime.fromisoformat(raw))
+        except ValueError:
+            return None
+    return None
+
+
+def sample_meta(doc: Dict[str, Any]) -> Dict[str, Any]:
+    device = doc.get("device_info") if isinstance(doc.get("device_info"), dict) else {}
+    meta = {
+        "session_id": doc.get("session_id"),
+        "label": doc.get("gesture_label", doc.get("label")),
+        "source": doc.get("source", device.get("source")),
+        "device_id": device.get("device_id"),
+    }
+    # CSV uploads: keeps samples traceable to (and removable by) their upload job
+    if doc.get("upload_id") is not None:
+        meta["upload_id"] = doc["upload_id"]
+    return meta
+
+
+def to_samples(doc: Dict[str, Any], source_id: Any = None) -> List[Dict[str, Any]]:
+    """Explodes a legacy/SensorData-shaped document into time-series measurements."""
+    rows = doc.get("sensor_values")
+    if not (isinstance(rows, list) and rows and isinstance(rows[0], list)):
+        values = doc.get("values")
+        if isinstance(values, list) and values:
+            rows = values if isinstance(values[0], list) else [values]
+        else:
+            rows = []
+    ts = (
+        as_datetime(doc.get("timestamp"))
+        or as_datetime(doc.get("timestamp_ms"))
+        or as_datetime(doc.get("_timestamp"))
+        or datetime.now(timezone.utc)
+    )
+    meta = sample_meta(doc)
+    samples = []
+    for seq, row in enumerate(r for r in rows if isinstance(r, list)):
+        sample = {"timestamp": ts, "meta": meta, "seq": seq, "values": row}
+        if source_id is not None:
+            sample["source_id"] = source_id
+        samples.append(sample)
+    return samples
+
+
+def samples_query(
+    session_id: Optional[str] = None,
+    label: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if session_id:
+        query["meta.session_id"] = session_id
+    if label:
+        query["meta.label"] = label
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lte"] = end
+    return query
+
+
+def legacy_query(
+    session_id: Optional[str] = None,
+    label: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if label:
+        query["$or"] = [{"gesture_label": label}, {"label": label}]
+    if session_id:
+        query["session_id"] = session_id
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lte"] = end
+    return query
+
+
+def _session_document(group: Dict[str, Any]) -> Dict[str, Any]:
+    meta = group["_id"]
+    return {
+        "_id": f"ts:{meta.get('session_id')}:{meta.get('label')}",
+        "session_id": meta.get("session_id"),
+        "gesture_label": meta.get("label"),
+        "timestamp": group.get("timestamp"),
+        "sensor_values": group.get("sensor_values", []),
+        "source": meta.get("source"),
+        "device_info": {"source": meta.get("source"), "device_id": meta.get("device_id")},
+    }
+
+
+class SensorStore:
+    def __init__(self, samples, legacy):
+        self.samples = samples
+        self.legacy = legacy
+
+    # --- Setup ---
+
+    async def ensure_collection(self):
+        """Creates the time-series collection on first start (MongoDB 5.0+). Indexes live in api.core.indexes."""
+        db = self.samples.database
+        try:
+            await db.create_collection(self.samples.name, timeseries=TIMESERIES_OPTIONS)
+            logger.info(f"Created time-series collection {self.samples.name}")
+        except CollectionInvalid:
+            pass
+        except Exception as e:
+            # Older servers: inserts fall back to a regular collection with the same document shape
+            logger.warning(f"Could not create time-series collection {self.samples.name}: {e}")
+
+    # --- Writes ---
+
+    async def insert_documents(self, docs: List[Dict[str, Any]]) -> int:
+        """Writes SensorData-shaped documents as samples and folds them into label_stats. Returns samples inserted."""
+        samples = [s for doc in docs for s in to_samples(doc)]
+        inserted = 0
+        for start in range(0, len(samples), INSERT_CHUNK_SAMPLES):
+            chunk = samples[start:start + INSERT_CHUNK_SAMPLES]
+            try:
+                result = await self.samples.insert_many(chunk, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted += int(e.details.get("nInserted", 0))
+                logger.error(f"Sensor sample insert partially failed: {len(e.details.get('writeErrors', []))} errors")
+        if inserted == len(samples):
+            await label_stats_service.record_samples(docs)
+        else:
+            await label_stats_service.rebuild_labels(sample_meta(doc)["label"] for doc in docs)
+        if inserted:
+            await self.invalidate_sessions({sample_meta(doc)["session_id"] for doc in docs})
+        return inserted
+
+    async def invalidate_sessions(self, session_ids=None):
+        """Invalidates cached responses for `session_ids` and the session list (None: all sensor data)."""
+        if session_ids is None:
+            await cache.invalidate(SENSOR_DATA_TAG)
+        else:
+            await cache.invalidate(GESTURE_LIST_TAG, *(session_tag(s) for s in session_ids))
+
+    async def session_labels(self, session_id: str) -> List[Any]:
+        labels = set(await self.samples.distinct("meta.label", {"meta.session_id": session_id}))
+        async for doc in self.legacy.find({"session_id": session_id}, {"gesture_label": 1, "label": 1}):
+            labels.add(doc.get("gesture_label", doc.get("label")))
+        return list(labels)
+
+    async def update_label(self, session_id: str, label: str) -> int:
+        """Relabels a session. Returns the number of matched samples/legacy documents."""
+        previous = await self.session_labels(session_id)
+        ts = await self.samples.update_many({"meta.session_id": session_id}, {"$set": {"meta.label": label}})
+        legacy = await self.legacy.update_many({"session_id": session_id}, {"$set": {"gesture_label": label}})
+        matched = ts.matched_count + legacy.matched_count
+        if matched:
+            await label_stats_service.rebuild_labels(previous + [label])
+            await self.invalidate_sessions([session_id])
+        return matched
+
+    async def delete_session(self, session_id: str) -> int:
+        previous = await self.session_labels(session_id)
+        ts = await self.samples.delete_many({"meta.session_id": session_id})
+        legacy = await self.legacy.delete_many({"session_id": session_id})
+        deleted = ts.deleted_count + legacy.deleted_count
+        if deleted:
+            await label_stats_service.rebuild_labels(previous)
+            await self.invalidate_sessions([session_id])
+        return deleted
+
+    async def delete_before(self, before: datetime) -> int:
+        ts = await self.samples.delete_many({"timestamp": {"$lt": before}})
+        legacy = await self.legacy.delete_many({"timestamp": {"$lt": before}})
+        deleted = ts.deleted_count + legacy.deleted_count
+        if deleted:
+            # Any label may have lost samples
+            await label_stats_service.rebuild_labels()
+            await self.invalidate_sessions()
+        return deleted
+
+    async def clear(self) -> int:
+        ts = await self.samples.delete_many({})
+        legacy = await self.legacy.delete_many({})
+        await label_stats_service.clear_samples()
+        await self.invalidate_sessions()
+        return ts.deleted_count + legacy.deleted_count
+
+    def trigger_migration(self, user_id: Any) -> str:
+        """Queues the legacy sensor_data -> time-series migration job and returns the job ID."""
+        from uuid import uuid4
+
+        from services.datasets.dataset_service import dataset_service
+        from workers.tasks.sensor_tasks import migrate_sensor_timeseries_task
+
+        job_id = str(uuid4())
+        dataset_service.create_job(
+            task_type="sensor_timeseries_migration",
+            user_id=user_id,
+            payload={"batch_docs": MIGRATION_BATCH_DOCS},
+            job_id=job_id,
+        )
+        migrate_sensor_timeseries_task.apply_async(task_id=job_id)
+        return job_id
+
+    # --- Reads (legacy-compatible) ---
+
+    async def has_data(self, **filters) -> bool:
+        if await self.samples.find_one(samples_query(**filters), {"_id": 1}):
+            return True
+        return bool(await self.legacy.find_one(legacy_query(**filters), {"_id": 1}))
+
+    async def iter_rows(self, batch_size: int = 500, **filters) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields export rows in time order per stream: one {"values", "gesture_label", "source",
+        "timestamp"} per sample, then any unmigrated legacy documents as stored.
+        """
+        cursor = self.samples.find(
+            samples_query(**filters),
+            {"_id": 0, "values": 1, "timestamp": 1, "meta.label": 1, "meta.source": 1},
+            batch_size=batch_size,
+        ).sort(EXPORT_SORT)
+        async for sample in cursor:
+            meta = sample.get("meta") or {}
+            yield {
+                "values": sample.get("values"),
+                "gesture_label": meta.get("label") or "unknown",
+                "source": meta.get("source") or "",
+                "timestamp": sample.get("timestamp", ""),
+            }
+        legacy_cursor = self.legacy.find(
+            legacy_query(**filters),
+            {"_id": 0, "gesture_label": 1, "label": 1, "source": 1, "timestamp": 1, "sensor_values": 1, "values": 1},
+            batch_size=batch_size,
+        )
+        async for doc in legacy_cursor:
+            yield doc
+
+    async def find_documents(
+        self,
+        session_id: Optional[str] = None,
+        label: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Sessions rebuilt as SensorData-shaped documents (one per session/label/device)."""
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": samples_query(session_id=session_id, label=label)},
+            {"$sort": {"timestamp": 1, "seq": 1}},
+            {"$group": {
+                "_id": "$meta",
+                "timestamp": {"$first": "$timestamp"},
+                "sensor_values": {"$push": "$values"},
+            }},
+            {"$sort": {"timestamp": 1}},
+        ]
+        if limit:
+            pipeline.append({"$limit": limit})
+        docs = [_session_document(g) async for g in self.samples.aggregate(pipeline)]
+
+        remaining = limit - len(docs) if limit else None
+        if remaining is None or remaining > 0:
+            legacy_cursor = self.legacy.find(legacy_query(session_id=session_id, label=label))
+            if remaining:
+                legacy_cursor = legacy_cursor.limit(remaining)
+            async for doc in legacy_cursor:
+                doc["_id"] = str(doc["_id"])
+                docs.append(doc)
+        return docs
+
+    async def list_sessions(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """[{session_id, gesture_label, timestamp}] without materializing samples."""
+        pipeline = [
+            {"$group": {
+                "_id": {"session_id": "$meta.session_id", "label": "$meta.label"},
+                "timestamp": {"$min": "$timestamp"},
+            }},
+            {"$sort": {"timestamp": 1}},
+            {"$limit": limit},
+        ]
+        sessions = [
+            {"session_id": g["_id"].get("session_id"), "gesture_label": g["_id"].get("label"), "timestamp": g["timestamp"]}
+            async for g in self.samples.aggregate(pipeline)
+        ]
+        if len(sessions) < limit:
+            cursor = self.legacy.find({}, {"_id": 0, "session_id": 1, "gesture_label": 1, "timestamp": 1})
+            sessions += await cursor.to_list(length=limit - len(sessions))
+        return sessions
+
+    async def label_breakdown(self, labels: Optional[List[Any]] = None) -> Dict[Any, Dict[str, Any]]:
+        """
+        {label: {sample_count, sessions, last_updated}} across both stores, optionally
+        restricted to `labels`. Full aggregation; label_stats serves the hot summary reads.
+        """
+        merged: Dict[Any, Dict[str, Any]] = {}
+
+        def _merge(label, samples, sessions, last):
+            entry = merged.setdefault(label, {"sample_count": 0, "sessions": set(), "last_updated": None})
+            entry["sample_count"] += samples
+            entry["sessions"].update(s for s in sessions if s is not None)
+            last_dt = as_datetime(last)
+            if last_dt is not None and (entry["last_updated"] is None or last_dt > entry["last_updated"]):
+                entry["last_updated"] = last_dt
+
+        ts_pipeline = [
+            {"$group": {
+                "_id": "$meta.label",
+                "sample_count": {"$sum": 1},
+                "sessions": {"$addToSet": "$meta.session_id"},
+                "last_updated": {"$max": "$timestamp"},
+            }}
+        ]
+        legacy_pipeline = [
+            {"$group": {
+                "_id": LEGACY_LABEL,
+                "sample_count": {"$sum": LEGACY_SAMPLE_COUNT},
+                "sessions": {"$addToSet": "$session_id"},
+                "last_updated": {"$max": "$timestamp"},
+            }}
+        ]
+        if labels is not None:
+            ts_pipeline.insert(0, {"$match": {"meta.label": {"$in": labels}}})
+            legacy_pipeline.insert(0, {"$match": {"$or": [
+                {"gesture_label": {"$in": labels}},
+                {"gesture_label": None, "label": {"$in": labels}},
+            ]}})
+        async for g in self.samples.aggregate(ts_pipeline):
+            _merge(g["_id"], g["sample_count"], g["sessions"], g["last_updated"])
+        async for g in self.legacy.aggregate(legacy_pipeline):
+            _merge(g["_id"], g["sample_count"], g["sessions"], g["last_updated"])
+        return merged
+
+    async def label_summary(self) -> List[Dict[str, Any]]:
+        """Exact per-label sample_count, session_count and last_updated across both stores."""
+        return [
+            {
+                "label": label,
+                "sample_count": entry["sample_count"],
+                "session_count": len(entry["sessions"]),
+                "last_updated": entry["last_updated"],
+            }
+            for label, entry in (await self.label_breakdown()).items()
+        ]
+
+    async def count_batches(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Ingested sensor batches (legacy document count semantics): the seq=0 sample of each."""
+        query = {**samples_query(start=start, end=end), "seq": 0}
+        return await self.samples.count_documents(query) + await self.legacy.count_documents(
+            legacy_query(start=start, end=end)
+        )
+
+    async def count_samples(self) -> int:
+        return await self.samples.estimated_document_count()
+
+    async def latest_timestamp(self) -> Optional[datetime]:
+        candidates = []
+        latest = await self.samples.find_one({}, {"timestamp": 1}, sort=[("timestamp", DESCENDING)])
+        if latest:
+            candidates.append(as_datetime(latest.get("timestamp")))
+        legacy = await self.legacy.find_one({}, {"timestamp": 1}, sort=[("timestamp", DESCENDING)])
+        if legacy:
+            candidates.append(as_datetime(legacy.get("timestamp")))
+        candidates = [c for c in candidates if c is not None]
+        return max(candidates) if candidates else None
+
+
+def migrate_legacy(
+    legacy,
+    samples,
+    archive,
+    batch_docs: int = MIGRATION_BATCH_DOCS,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Moves `sensor_data` documents into the time-series collection (pymongo, for workers/CLI).
+    Originals are copied to the archive collection before removal. Re-running after a crash
+    is safe: samples carry `source_id` and are replaced, archive copies keep their _id.
+    """
+    total = legacy.count_documents({})
+    moved_docs = moved_samples = 0
+    while True:
+        batch = list(legacy.find({}).sort("_id", ASCENDING).limit(batch_docs))
+        if not batch:
+            break
+        ids = [doc["_id"] for doc in batch]
+        rows = [s for doc in batch for s in to_samples(doc, source_id=doc["_id"])]
+        samples.delete_many({"source_id": {"$in": ids}})
+        if rows:
+            samples.insert_many(rows, ordered=False)
+        try:
+            archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            if any(err.get("code") != DUPLICATE_KEY_ERROR for err in e.details.get("writeErrors", [])):
+                raise
+        legacy.delete_many({"_id": {"$in": ids}})
+        moved_docs += len(batch)
+        moved_samples += len(rows)
+        if progress_cb:
+            progress_cb(moved_docs, max(total, moved_docs))
+    return {"documents": moved_docs, "samples": moved_samples}
+
+
+def sync_database():
+    """pymongo database handle for Celery workers and scripts (motor needs an event loop)."""
+    from pymongo import MongoClient
+
+    from api.core.settings import settings
+
+    client = MongoClient(settings.MONGO_URI, w=1)
+    return client[settings.TEST_DB_NAME if settings.ENVIRONMENT == "testing" else settings.DB_NAME]
+
+
+sensor_store = SensorStore(sensor_samples_collection, sensor_collection)
+
+
+if __name__ == "__main__":
+    # python -m services.sensor_store  -> migrate legacy sensor_data into the time-series collection
+    logging.basicConfig(level=logging.INFO)
+    database = sync_database()
+    result = migrate_legacy(
+        database[sensor_collection.name],
+        database[SAMPLES_COLLECTION],
+        database[LEGACY_ARCHIVE_COLLECTION],
+        progress_cb=lambda done, total: logger.info(f"Migrated {done}/{total} sensor documents"),
+    )
+    logger.info(f"Migration finished: {result}")
@@ -0,0 +1,183 @@
+"""
+Synthesized TTS audio cache (`TTS_CACHE_DIR`).
+
+Audio is keyed by an MD5 of text and voice, the same file names TTSService has
+always used, so existing caches stay valid. There are two tiers:
+- memory: an LRU of audio bytes bounded by TTS_CACHE_MEMORY_BYTES, so known
+  phrases are served without touching disk or a provider.
+- disk: MP3 files bounded by TTS_CACHE_MAX_BYTES. On overflow, the least recently
+  used files are deleted; recency is file mtime, refreshed on each read, so it
+  survives restarts.
+
+Files are written to a temporary name and renamed, so readers never see partial
+audio. Safe to use from the event loop and from executor threads (warmup).
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("signglove.tts_cache")
+
+
+def cache_key(text: str, voice: str) -> str:
+    return hashlib.md5(f"{text}_{voice}".encode()).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, directory: str, max_disk_bytes: int, max_memory_bytes: int):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> size, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.stats_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_evictions": 0, "memory_evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _scan(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                # Left behind by an interrupted synthesis
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+        logger.debug(f"TTS cache: {len(self._disk)} files, {self._disk_bytes} bytes in {self.directory}")
+
+    # --- Reads ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Audio bytes from memory, else disk (promoted to memory); None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.stats_counters["memory_hits"] += 1
+                return data
+            on_disk = key in self._disk
+        if on_disk:
+            try:
+                with open(self.path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self.path(key))
+            except OSError:
+                data = None
+        if data is None:
+            with self._lock:
+                self.stats_counters["misses"] += 1
+                self._forget_disk(key)
+            return None
+        with self._lock:
+            self.stats_counters["disk_hits"] += 1
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, data)
+        return data
+
+    def cached_path(self, key: str) -> Optional[str]:
+        """Path of a cached file (for playback/file responses), refreshing its recency."""
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget_disk(key)
+            return None
+        return path
+
+    # --- Writes ---
+
+    def temp_path(self, key: str) -> str:
+        return os.path.join(self.directory, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def commit(self, key: str, temp_path: str) -> str:
+        """Moves a synthesized temp file into place and accounts for it. Returns the final path."""
+        path = self.path(key)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._forget_disk(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            self._evict_disk(keep=key)
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        temp = self.temp_path(key)
+        with open(temp, "wb") as f:
+            f.write(data)
+        path = self.commit(key, temp)
+        with self._lock:
+            self._remember(key, data)
+        return path
+
+    # --- Accounting (lock held) ---
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats_counters["memory_evictions"] += 1
+
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self, keep: Optional[str] = None):
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > (1 if keep else 0):
+            key = next(iter(self._disk))
+            if key == keep:
+                self._disk.move_to_end(key)
+                continue
+            self._forget_disk(key)
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            self.stats_counters["disk_evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats_counters["memory_hits"] + self.stats_counters["disk_hits"] + self.stats_counters["misses"]
+            return {
+                **self.stats_counters,
+                "hit_ratio": round((lookups - self.stats_counters["misses"]) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self.max_memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_budget_bytes": self.max_disk_bytes,
+            }
@@ -2,34 +2,29 @@
     TTS Service
 """
 import asyncio
+import io
 import os
 import logging
-import hashlib
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
 from api.core.settings import settings
-import pygame
+from api.utils.lazy_imports import available, optional_import, pygame_mixer
+from services.tts_cache import TTSCache, cache_key
 import threading
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-# TTS Libraries Import Check
-try:
-    import pyttsx3
-    HAS_PYTTSX3 = True
-except ImportError:
-    HAS_PYTTSX3 = False
-try:
-    from gtts import gTTS
-    HAS_GTTS = True
-except ImportError:
-    HAS_GTTS = False
-try:
-    import edge_tts
-    HAS_EDGE_TTS = True
-except ImportError:
-    HAS_EDGE_TTS = False
+# TTS libraries are checked here but imported on first synthesis
+HAS_PYTTSX3 = available("pyttsx3")
+HAS_GTTS = available("gtts")
+HAS_EDGE_TTS = available("edge_tts")
+
+# gTTS is always asked for Vietnamese; its cache entries use this as the voice
+GTTS_LANG = "vi"
+# Cached audio is replayed to streaming clients in chunks of this size
+STREAM_CHUNK_BYTES = 16 * 1024
 
 # Multi-language gesture mapping for ESP32 + SD card system
 LANGUAGE_MAPPINGS = {
@@ -109,23 +104,29 @@ IDLE_GESTURES = {
 class TTSService:
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=2)
-        self.cache = {}
+        # Synthesized audio (edge/gtts): memory LRU over a size-bounded disk directory.
+        # Gesture phrases and free text are separate tiers, so ad-hoc text cannot evict warmed phrases.
+        self.cache = TTSCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES, settings.TTS_CACHE_MEMORY_BYTES)
+        self.text_cache = TTSCache(
+            os.path.join(settings.TTS_CACHE_DIR, "text"),
+            settings.TTS_TEXT_CACHE_MAX_BYTES,
+            settings.TTS_TEXT_CACHE_MEMORY_BYTES,
+        )
         self.pyttsx3_engine = None
+        self._pyttsx3_initialized = False
         self.current_language = DEFAULT_LANGUAGE
-        # Ensure cache dir exists
-        if settings.TTS_CACHE_ENABLED and not os.path.exists(settings.TTS_CACHE_DIR):
-            os.makedirs(settings.TTS_CACHE_DIR)
-        if HAS_PYTTSX3:
-            self._init_pyttsx3()
-        # Initialize pygame for laptop audio playback
-        try:
-            pygame.mixer.init()
-            self.pygame_available = True
-        except Exception as e:
-            logging.warning(f"pygame not available for audio playback: {e}")
-            self.pygame_available = False
+        self.warmup_status: Dict[str, Any] = {"state": "idle"}
+
+    @property
+    def pygame_available(self) -> bool:
+        """Laptop playback; the pygame mixer is initialized on first use."""
+        return pygame_mixer() is not None
 
     def _init_pyttsx3(self):
+        self._pyttsx3_initialized = True
+        pyttsx3 = optional_import("pyttsx3")
+        if pyttsx3 is None:
+            return
         try:
             self.pyttsx3_engine = pyttsx3.init()
             self.pyttsx3_engine.setProperty('rate', settings.TTS_RATE)
@@ -134,8 +135,174 @@ class TTSService:
             logging.error(f"Failed to initialize pyttsx3: {e}")
 
     def get_cache_path(self, text, voice):
-        text_hash = hashlib.md5(f"{text}_{voice}".encode()).hexdigest()
-        return os.path.join(settings.TTS_CACHE_DIR, f"{text_hash}.mp3")
+        return self.cache_for(text).path(cache_key(text, voice))
+
+    # --- Synthesis and cache ---
+
+    def phrase_texts(self) -> set:
+        """Every non-empty gesture phrase across languages."""
+        return {text for mapping in LANGUAGE_MAPPINGS.values() for text in mapping.values() if text.strip()}
+
+    def cache_for(self, text: str) -> TTSCache:
+        """The phrase tier for gesture phrases, the free-text tier for anything else."""
+        return self.cache if text in self.phrase_texts() else self.text_cache
+
+    def audio_provider(self, voice: str = None) -> Optional[Tuple[str, str]]:
+        """(provider, cache voice) when the configured provider produces audio files."""
+        provider = settings.TTS_PROVIDER
+        if provider == "edge" and HAS_EDGE_TTS:
+            return "edge", voice or settings.TTS_VOICE
+        if provider == "gtts" and HAS_GTTS:
+            return "gtts", GTTS_LANG
+        return None
+
+    def _synthesize_sync(self, text: str, provider: str, voice: str) -> str:
+        """Renders `text` to the cache (executor thread). Returns the audio path."""
+        key = cache_key(text, voice)
+        cache = self.cache_for(text)
+        temp_path = cache.temp_path(key)
+        try:
+            if provider == "edge":
+                communicate = optional_import("edge_tts").Communicate(text, voice)
+                asyncio.run(communicate.save(temp_path))
+            else:
+                optional_import("gtts").gTTS(text=text, lang=GTTS_LANG).save(temp_path)
+            return cache.commit(key, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def render(self, text: str, voice: str = None) -> Tuple[str, str, str]:
+        """
+        Blocking counterpart of get_audio for batch jobs: (audio path, provider, voice),
+        synthesizing on a cache miss. Raises RuntimeError without a file provider.
+        """
+        selected = self.audio_provider(voice)
+        if selected is None:
+            raise RuntimeError(f"TTS provider '{settings.TTS_PROVIDER}' does not produce audio files")
+        provider, voice = selected
+        path = self.cache_for(text).cached_path(cache_key(text, voice)) if settings.TTS_CACHE_ENABLED else None
+        return path or self._synthesize_sync(text, provider, voice), provider, voice
+
+    async def _cached_path(self, text: str, provider: str, voice: str) -> str:
+        path = self.cache_for(text).cached_path(cache_key(text, voice)) if settings.TTS_CACHE_ENABLED else None
+        if path is None:
+            loop = asyncio.get_running_loop()
+            path = await loop.run_in_executor(self.executor, self._synthesize_sync, text, provider, voice)
+        return path
+
+    async def get_audio(self, text: str, voice: str = None) -> Optional[bytes]:
+        """
+        MP3 bytes for `text`: a memory read for warmed phrases, otherwise from disk or
+        synthesized. None when the configured provider does not produce audio files.
+        """
+        selected = self.audio_provider(voice)
+        if selected is None:
+            return None
+        provider, voice = selected
+        key = cache_key(text, voice)
+        cache = self.cache_for(text)
+        if settings.TTS_CACHE_ENABLED:
+            data = cache.get(key)
+            if data is not None:
+                return data
+        await self._cached_path(text, provider, voice)
+        return cache.get(key)
+
+    async def stream_audio(self, text: str, voice: str = None) -> AsyncIterator[bytes]:
+        """
+        MP3 chunks for `text` as the provider produces them (edge-tts streams natively,
+        gTTS per sentence part). Cached audio is replayed directly. A stream that runs to
+        completion is written to its cache tier; an abandoned one is not.
+        Raises RuntimeError when the configured provider does not produce audio.
+        """
+        selected = self.audio_provider(voice)
+        if selected is None:
+            raise RuntimeError(f"TTS provider '{settings.TTS_PROVIDER}' does not produce audio files")
+        provider, voice = selected
+        key = cache_key(text, voice)
+        cache = self.cache_for(text)
+        data = cache.get(key) if settings.TTS_CACHE_ENABLED else None
+        if data is not None:
+            for start in range(0, len(data), STREAM_CHUNK_BYTES):
+                yield data[start:start + STREAM_CHUNK_BYTES]
+            return
+
+        parts = []
+        chunks = self._edge_chunks(text, voice) if provider == "edge" else self._gtts_chunks(text)
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        if settings.TTS_CACHE_ENABLED and parts:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, cache.put, key, b"".join(parts))
+
+    async def _edge_chunks(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        communicate = optional_import("edge_tts").Communicate(text, voice)
+        async for chunk in communicate.stream():
+            if chunk.get("type") == "audio" and chunk.get("data"):
+                yield chunk["data"]
+
+    async def _gtts_chunks(self, text: str) -> AsyncIterator[bytes]:
+        # gTTS.stream() is a blocking generator (one HTTP request per text part)
+        parts = optional_import("gtts").gTTS(text=text, lang=GTTS_LANG).stream()
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, parts, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def warmup_phrases(self) -> List[Tuple[str, str, str]]:
+        """(text, provider, voice) for every gesture phrase in every language and warmup voice."""
+        provider = settings.TTS_PROVIDER
+        if provider == "edge" and HAS_EDGE_TTS:
+            voices = settings.TTS_WARMUP_VOICES or [settings.TTS_VOICE]
+        elif provider == "gtts" and HAS_GTTS:
+            voices = [GTTS_LANG]
+        else:
+            return []
+        texts = sorted(self.phrase_texts())
+        return [(text, provider, voice) for voice in voices for text in texts]
+
+    async def warmup(self):
+        """
+        Pre-synthesizes all gesture phrases in the executor and loads them into the
+        memory tier, so speaking a known gesture never waits on a provider.
+        """
+        phrases = self.warmup_phrases()
+        if not settings.TTS_ENABLED or not settings.TTS_CACHE_ENABLED or not phrases:
+            self.warmup_status = {"state": "skipped", "provider": settings.TTS_PROVIDER}
+            return self.warmup_status
+        self.warmup_status = {"state": "running", "phrases": len(phrases)}
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._cached_path(text, provider, voice) for text, provider, voice in phrases),
+            return_exceptions=True,
+        )
+        failed = 0
+        for (text, _, voice), result in zip(phrases, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logging.warning(f"TTS warmup failed for '{text}' ({voice}): {result}")
+            else:
+                self.cache.get(cache_key(text, voice))
+        self.warmup_status = {
+            "state": "done",
+            "phrases": len(phrases),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+        logging.info(f"TTS warmup: {self.warmup_status}")
+        return self.warmup_status
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "text_tier": self.text_cache.stats(),
+            "enabled": settings.TTS_CACHE_ENABLED,
+            "warmup": self.warmup_status,
+        }
 
     def set_language(self, language: str):
         """Set the current language for TTS."""
@@ -241,13 +408,18 @@ class TTSService:
             laptop_result = None
             if play_on_laptop and self.pygame_available:
                 try:
-                    # Use the existing speak method which handles caching
-                    tts_result = await self.speak(text, voice)
-                    if tts_result and tts_result.get('status') == 'success' and 'audio_path' in tts_result:
-                        play_result = await self.play_on_laptop(tts_result['audio_path'])
+                    # Known phrases are warmed into memory; play those bytes directly
+                    audio = await self.get_audio(text, voice) if settings.TTS_ENABLED else None
+                    if audio is not None:
+                        play_result = await self.play_on_laptop(audio)
                         laptop_result = play_result.get('status', 'unknown')
                     else:
-                        laptop_result = f"error: {tts_result.get('message', 'Unknown error')}"
+                        tts_result = await self.speak(text, voice)
+                        if tts_result and tts_result.get('status') == 'success' and 'audio_path' in tts_result:
+                            play_result = await self.play_on_laptop(tts_result['audio_path'])
+                            laptop_result = play_result.get('status', 'unknown')
+                        else:
+                            laptop_result = f"error: {tts_result.get('message', 'Unknown error')}"
                 except Exception as e:
                     error_msg = str(e)
                     logging.error(f"Error in speak_gesture: {error_msg}")
@@ -276,18 +448,21 @@ class TTSService:
                 "language": language
             }
 
-    async def play_on_laptop(self, audio_path: str):
-        """Play audio file on laptop using pygame"""
+    async def play_on_laptop(self, audio: Union[str, bytes]):
+        """Play an audio file path or in-memory MP3 bytes on laptop using pygame"""
         if not self.pygame_available:
             return {"status": "error", "message": "pygame not available"}
             
-        if not os.path.exists(audio_path):
+        if isinstance(audio, str) and not os.path.exists(audio):
             return {"status": "error", "message": "Audio file not found"}
             
         try:
+            pygame = pygame_mixer()
+
             def play_audio():
                 try:
-                    pygame.mixer.music.load(audio_path)
+                    source = io.BytesIO(audio) if isinstance(audio, bytes) else audio
+                    pygame.mixer.music.load(source)
                     pygame.mixer.music.play()
                     # Wait for playback to finish
                     while pygame.mixer.music.get_busy():
@@ -330,23 +505,16 @@ class TTSService:
         }
 
     async def _speak_edge(self, text, voice: str = None):
-        voice = voice or settings.TTS_VOICE
-        cache_path = self.get_cache_path(text, voice)
-        if settings.TTS_CACHE_ENABLED and os.path.exists(cache_path):
-            return {"status": "success", "provider": "edge", "audio_path": cache_path}
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(cache_path)
+        cache_path = await self._cached_path(text, "edge", voice or settings.TTS_VOICE)
         return {"status": "success", "provider": "edge", "audio_path": cache_path}
 
     async def _speak_gtts(self, text: str):
-        cache_path = self.get_cache_path(text, "vi")
-        if settings.TTS_CACHE_ENABLED and os.path.exists(cache_path):
-            return {"status": "success", "provider": "gtts", "audio_path": cache_path}
-        tts = gTTS(text=text, lang="vi")
-        tts.save(cache_path)
+        cache_path = await self._cached_path(text, "gtts", GTTS_LANG)
         return {"status": "success", "provider": "gtts", "audio_path": cache_path}
 
     async def _speak_pyttsx3(self, text: str):
+        if not self._pyttsx3_initialized:
+            self._init_pyttsx3()
         if not self.pyttsx3_engine:
             return {"status": "error", "message": "pyttsx3 not available"}
         loop = asyncio.get_event_loop()
@@ -369,7 +537,9 @@ class TTSService:
                 "rate": settings.TTS_RATE,
                 "volume": settings.TTS_VOLUME,
                 "cache_enabled": settings.TTS_CACHE_ENABLED,
-                "cache_dir": settings.TTS_CACHE_DIR
+                "cache_dir": settings.TTS_CACHE_DIR,
+                "cache_max_bytes": settings.TTS_CACHE_MAX_BYTES,
+                "cache_memory_bytes": settings.TTS_CACHE_MEMORY_BYTES
             },
             "available_providers": {
                 "pyttsx3": HAS_PYTTSX3,
@@ -0,0 +1,177 @@
+"""
+Process-wide speech-to-text for the voice service.
+
+- Whisper is imported and its model (VOICE_WHISPER_MODEL) loaded on the first
+  transcription, once per process, and unloaded again after
+  VOICE_WHISPER_IDLE_UNLOAD_SECONDS without use. API pods that never receive voice
+  therefore never hold torch or the model.
+- Recognition (Google via speech_recognition, then Whisper) runs in a worker pool of
+  VOICE_TRANSCRIBE_WORKERS threads, keeping the event loop free. At most
+  VOICE_TRANSCRIBE_QUEUE further requests wait. Beyond that, chunks are dropped with
+  status "busy" rather than piling up behind a slow model.
+"""
+import asyncio
+import gc
+import logging
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from api.core.settings import settings
+from api.utils.lazy_imports import available, optional_import
+
+logger = logging.getLogger("signglove.voice_transcriber")
+
+HAS_SPEECH_RECOGNITION = available("speech_recognition")
+HAS_WHISPER = available("whisper")
+# Whisper reads any ndarray as audio at this rate
+WHISPER_SAMPLE_RATE = 16000
+
+
+def resample(audio: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    """Polyphase (anti-aliased) resampling of mono float audio to `target_rate`."""
+    if sample_rate == target_rate or audio.size == 0:
+        return audio
+    from scipy.signal import resample_poly
+
+    common = math.gcd(int(sample_rate), int(target_rate))
+    return resample_poly(audio, target_rate // common, sample_rate // common).astype(np.float32)
+
+
+class Transcriber:
+    def __init__(
+        self,
+        model_name: str = "base",
+        workers: int = 1,
+        max_queue: int = 8,
+        idle_unload_seconds: float = 600,
+    ):
+        self.model_name = model_name
+        self.idle_unload_seconds = idle_unload_seconds
+        self.capacity = max(workers, 1) + max(max_queue, 0)
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="transcribe")
+        self.pending = 0
+        self.dropped = 0
+        self._recognizer = None
+        self._model = None
+        self._model_failed = False
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._idle_task: Optional[asyncio.Task] = None
+
+    # --- Engines ---
+
+    def _get_recognizer(self):
+        if self._recognizer is None and HAS_SPEECH_RECOGNITION:
+            self._recognizer = optional_import("speech_recognition").Recognizer()
+        return self._recognizer
+
+    def _get_model(self):
+        """The Whisper model, loaded on first use by one worker while others wait."""
+        if self._model is None and HAS_WHISPER and not self._model_failed:
+            with self._lock:
+                if self._model is None and not self._model_failed:
+                    try:
+                        start = time.perf_counter()
+                        self._model = optional_import("whisper").load_model(self.model_name)
+                        logger.info(f"Whisper model '{self.model_name}' loaded in {time.perf_counter() - start:.1f}s")
+                    except Exception as e:
+                        # Not retried per chunk; unload() clears the failure
+                        self._model_failed = True
+                        logger.warning(f"Failed to load Whisper model: {e}")
+        self._last_used = time.monotonic()
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    def unload(self):
+        with self._lock:
+            if self._model is None and not self._model_failed:
+                return
+            self._model = None
+            self._model_failed = False
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info(f"Whisper model '{self.model_name}' unloaded after {self.idle_unload_seconds:.0f}s idle")
+
+    async def _unload_when_idle(self):
+        while self._model is not None:
+            idle = time.monotonic() - self._last_used
+            if idle >= self.idle_unload_seconds and self.pending == 0:
+                await asyncio.get_running_loop().run_in_executor(self.executor, self.unload)
+                return
+            await asyncio.sleep(max(self.idle_unload_seconds - idle, 1.0))
+
+    # --- Transcription ---
+
+    def _transcribe_sync(self, audio: np.ndarray, sample_rate: int) -> Dict[str, Any]:
+        recognizer = self._get_recognizer()
+        if recognizer is not None:
+            try:
+                sr = optional_import("speech_recognition")
+                audio_bytes = np.int16(np.clip(audio, -1.0, 1.0) * 32767).tobytes()
+                text = recognizer.recognize_google(sr.AudioData(audio_bytes, sample_rate, 2))
+                return {"text": text, "confidence": 0.9, "recognition_service": "google"}
+            except Exception:
+                pass
+        model = self._get_model()
+        if model is not None:
+            try:
+                res = model.transcribe(resample(audio.astype(np.float32), sample_rate, WHISPER_SAMPLE_RATE))
+                if res and "text" in res:
+                    return {"text": str(res["text"]).strip(), "confidence": 0.8, "recognition_service": "whisper"}
+            except Exception as e:
+                logger.warning(f"Whisper error: {e}")
+        return {}
+
+    async def transcribe(self, audio: np.ndarray, sample_rate: int = 16000) -> Dict[str, Any]:
+        """
+        {text, confidence, recognition_service} for float32 audio in [-1, 1]; {} when
+        nothing was recognized, {"status": "busy"} when the queue is full.
+        """
+        if not self.enabled:
+            return {}
+        if self.pending >= self.capacity:
+            self.dropped += 1
+            return {"status": "busy"}
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._transcribe_sync, audio, sample_rate
+            )
+        finally:
+            self.pending -= 1
+        if self._model is not None and self.idle_unload_seconds > 0 and (self._idle_task is None or self._idle_task.done()):
+            self._idle_task = asyncio.create_task(self._unload_when_idle())
+        return result
+
+    @property
+    def enabled(self) -> bool:
+        return HAS_SPEECH_RECOGNITION or HAS_WHISPER
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "whisper_model": self.model_name,
+            "whisper_loaded": self.model_loaded,
+            "idle_unload_seconds": self.idle_unload_seconds,
+            "pending": self.pending,
+            "capacity": self.capacity,
+            "dropped": self.dropped,
+        }
+
+
+transcriber = Transcriber(
+    model_name=settings.VOICE_WHISPER_MODEL,
+    workers=settings.VOICE_TRANSCRIBE_WORKERS,
+    max_queue=settings.VOICE_TRANSCRIBE_QUEUE,
+    idle_unload_seconds=settings.VOICE_WHISPER_IDLE_UNLOAD_SECONDS,
+)
@@ -0,0 +1,150 @@
+"""
+Streaming voice activity detection and utterance segmentation.
+
+Audio arrives as PCM16 (little-endian) and is cut into FRAME_MS frames. A frame is
+speech when its RMS energy clears an adaptive threshold (a multiple of the tracked
+noise floor, never below MIN_RMS). Inside an utterance, quieter frames with a high
+zero-crossing rate (fricatives like "s"/"f") also count as speech.
+
+An utterance starts after START_FRAMES consecutive speech frames and includes
+PRE_ROLL_MS of audio before that point, kept in a ring buffer. It ends after
+HANGOVER_MS of silence, or is cut at MAX_UTTERANCE_S. Utterances shorter than
+MIN_SPEECH_MS are dropped. Only completed utterances are transcribed.
+"""
+from collections import deque
+from typing import List
+
+import numpy as np
+
+FRAME_MS = 30
+MIN_RMS = 0.01
+NOISE_RATIO = 3.0
+NOISE_ALPHA = 0.05
+ZCR_FRICATIVE = 0.25
+START_FRAMES = 3
+PRE_ROLL_MS = 300
+HANGOVER_MS = 600
+MIN_SPEECH_MS = 250
+MAX_UTTERANCE_S = 15.0
+# Client-selectable sample rates; the utterance buffer is preallocated from the rate
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+def parse_sample_rate(value) -> int:
+    """Client-supplied sample rate as an int; ValueError outside MIN_SAMPLE_RATE..MAX_SAMPLE_RATE."""
+    try:
+        rate = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"sample_rate must be an integer, got {value!r}")
+    if not MIN_SAMPLE_RATE <= rate <= MAX_SAMPLE_RATE:
+        raise ValueError(f"sample_rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE} Hz, got {rate}")
+    return rate
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """PCM16 little-endian bytes -> float32 samples in [-1, 1) (a trailing odd byte is ignored)."""
+    usable = len(data) - (len(data) % 2)
+    return np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def frame_features(frame: np.ndarray):
+    """(rms, zero-crossing rate) of one frame."""
+    rms = float(np.sqrt(max(float(np.mean(np.square(frame))), 1e-10)))
+    zcr = float(np.count_nonzero(np.diff(np.signbit(frame)))) / max(len(frame) - 1, 1)
+    return rms, zcr
+
+
+class UtteranceSegmenter:
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.frame_len = max(int(sample_rate * FRAME_MS / 1000), 1)
+        self.noise_floor = MIN_RMS / NOISE_RATIO
+        self.in_speech = False
+        self.volume = 0.0
+        self._partial = np.zeros(0, dtype=np.float32)
+        self._pre_roll: deque = deque(maxlen=max(PRE_ROLL_MS // FRAME_MS, 1))
+        self._onset = 0
+        self._silence = 0
+        self._speech_frames = 0
+        # Utterance buffer: preallocated, written in place
+        self._buffer = np.zeros(int(sample_rate * MAX_UTTERANCE_S) + self.frame_len * self._pre_roll.maxlen, dtype=np.float32)
+        self._length = 0
+
+    @property
+    def threshold(self) -> float:
+        return max(MIN_RMS, self.noise_floor * NOISE_RATIO)
+
+    def push(self, samples: np.ndarray) -> List[np.ndarray]:
+        """Feeds float32 samples; returns the utterances completed by them."""
+        if len(self._partial):
+            samples = np.concatenate([self._partial, samples])
+        whole = len(samples) - len(samples) % self.frame_len
+        self._partial = samples[whole:].copy()
+
+        completed = []
+        for start in range(0, whole, self.frame_len):
+            segment = self._frame(samples[start:start + self.frame_len])
+            if segment is not None:
+                completed.append(segment)
+        return completed
+
+    def flush(self) -> List[np.ndarray]:
+        """Ends the current utterance (e.g. on disconnect)."""
+        if not self.in_speech:
+            return []
+        segment = self._finish()
+        return [segment] if segment is not None else []
+
+    def _frame(self, frame: np.ndarray):
+        rms, zcr = frame_features(frame)
+        self.volume = rms
+        threshold = self.threshold
+        speech = rms > threshold or (self.in_speech and rms > threshold / 2 and zcr > ZCR_FRICATIVE)
+
+        if not self.in_speech:
+            self._pre_roll.append(frame)
+            if speech:
+                self._onset += 1
+                if self._onset >= START_FRAMES:
+                    self._start()
+            else:
+                self._onset = 0
+                self.noise_floor += NOISE_ALPHA * (rms - self.noise_floor)
+            return None
+
+        self._append(frame)
+        if speech:
+            self._silence = 0
+            self._speech_frames += 1
+        else:
+            self._silence += 1
+        if self._silence * FRAME_MS >= HANGOVER_MS or self._length + self.frame_len > len(self._buffer):
+            return self._finish()
+        return None
+
+    def _start(self):
+        self.in_speech = True
+        self._length = 0
+        self._silence = 0
+        self._speech_frames = self._onset
+        for frame in self._pre_roll:
+            self._append(frame)
+        self._pre_roll.clear()
+
+    def _append(self, frame: np.ndarray):
+        self._buffer[self._length:self._length + len(frame)] = frame
+        self._length += len(frame)
+
+    def _finish(self):
+        self.in_speech = False
+        self._onset = 0
+        segment = None
+        if self._speech_frames * FRAME_MS >= MIN_SPEECH_MS:
+            # Trailing silence carries nothing for recognition
+            end = self._length - max(self._silence - 1, 0) * self.frame_len
+            segment = self._buffer[:end].copy()
+        self._length = 0
+        self._speech_frames = 0
+        self._silence = 0
+        return segment
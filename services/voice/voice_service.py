@@ -8,92 +8,35 @@ from typing import Dict, Set, Optional, Any, List
 from fastapi import WebSocket, HTTPException
 
 from api.core.database import voice_collection
-
-# Voice recognition imports (optional)
-try:
-    import speech_recognition as sr
-    HAS_SPEECH_RECOGNITION = True
-except ImportError:
-    HAS_SPEECH_RECOGNITION = False
-
-try:
-    import whisper
-    HAS_WHISPER = True
-except ImportError:
-    HAS_WHISPER = False
+from services.voice.transcriber import HAS_SPEECH_RECOGNITION, HAS_WHISPER, transcriber
+from services.voice.vad import UtteranceSegmenter
 
 logger = logging.getLogger("signglove.voice_service")
 
-class VoiceProcessor:
-    def __init__(self):
-        self.recognizer = None
-        self.whisper_model = None
-        
-        if HAS_SPEECH_RECOGNITION:
-            self.recognizer = sr.Recognizer()
-            
-        if HAS_WHISPER:
-            try:
-                self.whisper_model = whisper.load_model("base")
-                logger.info("Whisper model loaded successfully")
-            except Exception as e:
-                logger.warning(f"Failed to load Whisper model: {e}")
-                self.whisper_model = None
-    
-    async def process_audio_chunk(self, audio_data: list, sample_rate: int = 16000) -> dict:
-        """Process audio chunk for voice recognition"""
-        try:
-            if not audio_data:
-                return {"type": "voice_analysis", "volume": 0.0, "has_speech": False, "error": "Empty data"}
-                
-            audio_np = np.array(audio_data, dtype=np.float32)
-            audio_np = audio_np.astype(np.float32) / 32768.0
-            rms = np.sqrt(np.maximum(np.mean(np.square(audio_np)), 1e-10))
-            volume = float(rms)
-            
-            result = {
-                "type": "voice_analysis",
-                "volume": volume,
-                "has_speech": bool(volume > 0.01),
-                "timestamp": float(time.time())
-            }
-            
-            if result["has_speech"] and (self.recognizer or self.whisper_model):
-                audio_bytes = np.int16(audio_np * 32767).tobytes()
-                audio_segment = sr.AudioData(audio_bytes, sample_rate, 2)
-                
-                if self.recognizer:
-                    try:
-                        text = self.recognizer.recognize_google(audio_segment)
-                        result.update({"text": text, "confidence": 0.9, "recognition_service": "google"})
-                    except: pass
-                
-                if "text" not in result and self.whisper_model:
-                    try:
-                        res = self.whisper_model.transcribe(audio_np.astype(np.float32))
-                        if res and "text" in res:
-                            result.update({"text": str(res["text"]).strip(), "confidence": 0.8, "recognition_service": "whisper"})
-                    except Exception as e:
-                        logger.warning(f"Whisper error: {e}")
-            return result
-        except Exception as e:
-            logger.error(f"process_audio_chunk error: {e}")
-            return {"type": "error", "error": str(e)}
-
 class VoiceService:
-    def __init__(self):
-        self.processor = VoiceProcessor()
+    """
+    Voice sessions: audio is segmented into utterances per session (services.voice.vad)
+    and each completed utterance is transcribed once in the transcriber's worker pool.
+    Results are pushed to the session's WebSocket as "transcription" messages.
+    """
+
+    def __init__(self, transcriber=transcriber):
+        self.transcriber = transcriber
         self.active_connections: Set[WebSocket] = set()
         self.sessions: Dict[str, dict] = {}
         self.total_sessions = 0
         self.last_activity = None
+        self._tasks: Set[asyncio.Task] = set()
 
-    def create_session(self, websocket: Optional[WebSocket] = None, session_type: str = "websocket") -> str:
+    def create_session(self, websocket: Optional[WebSocket] = None, session_type: str = "websocket", sample_rate: int = 16000) -> str:
         session_id = f"{session_type}_{int(time.time())}_{len(self.sessions)}"
         self.sessions[session_id] = {
             "start_time": time.time(),
             "audio_chunks_received": 0,
             "total_audio_duration": 0,
+            "utterances": 0,
+            "transcriptions": 0,
+            "segmenter": UtteranceSegmenter(sample_rate),
             "websocket": websocket,
             "type": session_type,
             "status": "active"
@@ -106,35 +49,90 @@ class VoiceService:
 
     def remove_session(self, session_id: str):
         if session_id in self.sessions:
-            ws = self.sessions[session_id].get("websocket")
+            session = self.sessions[session_id]
+            ws = session.get("websocket")
             if ws:
                 self.active_connections.discard(ws)
+            # The utterance in progress is still transcribed and stored
+            for segment in session["segmenter"].flush():
+                self._schedule_transcription(session_id, session, segment)
+            session["websocket"] = None
             del self.sessions[session_id]
 
-    async def handle_audio_data(self, session_id: str, audio_data: list, sample_rate: int, volume: float = 0):
+    async def handle_audio_frame(self, session_id: str, samples: np.ndarray, sample_rate: int = 16000) -> Optional[dict]:
+        """Feeds float32 samples to the session's VAD. Returns the voice_analysis for this frame."""
         if session_id not in self.sessions: return None
-        
+
         session = self.sessions[session_id]
+        segmenter = session["segmenter"]
+        if segmenter.sample_rate != sample_rate:
+            segmenter = session["segmenter"] = UtteranceSegmenter(sample_rate)
         session["audio_chunks_received"] += 1
-        chunk_dur = len(audio_data) / sample_rate
-        session["total_audio_duration"] += chunk_dur
+        session["total_audio_duration"] += len(samples) / sample_rate
         self.last_activity = datetime.utcnow().isoformat()
 
-        result = await self.processor.process_audio_chunk(audio_data, sample_rate)
-        result.update({"chunk_id": session["audio_chunks_received"], "session_id": session_id})
+        was_speaking = segmenter.in_speech
+        segments = segmenter.push(samples)
+        for segment in segments:
+            self._schedule_transcription(session_id, session, segment)
+        return {
+            "type": "voice_analysis",
+            "volume": segmenter.volume,
+            "has_speech": segmenter.in_speech,
+            "speech_started": segmenter.in_speech and not was_speaking,
+            "utterances_completed": len(segments),
+            "timestamp": float(time.time()),
+            "chunk_id": session["audio_chunks_received"],
+            "session_id": session_id,
+        }
+
+    async def handle_audio_data(self, session_id: str, audio_data: list, sample_rate: int, volume: float = 0):
+        """Legacy JSON chunks: a list of PCM16 sample values."""
+        samples = np.asarray(audio_data, dtype=np.float32) / 32768.0
+        return await self.handle_audio_frame(session_id, samples, sample_rate)
+
+    def _schedule_transcription(self, session_id: str, session: dict, segment: np.ndarray):
+        session["utterances"] += 1
+        if not self.transcriber.enabled:
+            return
+        task = asyncio.create_task(self._transcribe(session_id, session, session["utterances"], segment))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
-        if result.get("has_speech"):
+    async def _transcribe(self, session_id: str, session: dict, utterance_id: int, segment: np.ndarray):
+        sample_rate = session["segmenter"].sample_rate
+        duration = len(segment) / sample_rate
+        try:
+            result = await self.transcriber.transcribe(segment, sample_rate)
+        except Exception as e:
+            logger.error(f"Transcription failed for {session_id}: {e}")
+            return
+        message = {
+            "type": "transcription",
+            "session_id": session_id,
+            "utterance_id": utterance_id,
+            "audio_duration": duration,
+            "timestamp": float(time.time()),
+            **result,
+        }
+        if result.get("text"):
+            session["transcriptions"] += 1
             try:
                 await voice_collection.insert_one({
                     "session_id": session_id,
                     "timestamp": datetime.utcnow(),
-                    "volume": volume or result.get("volume", 0),
-                    "audio_duration": chunk_dur,
-                    "recognition_result": result.get("text", ""),
+                    "audio_duration": duration,
+                    "recognition_result": result["text"],
                     "confidence": result.get("confidence", 0.0)
                 })
-            except: pass
-        return result
+            except Exception as e:
+                logger.warning(f"Failed to store transcription for {session_id}: {e}")
+        ws = session.get("websocket")
+        if ws is not None:
+            try:
+                await ws.send_json(message)
+            except Exception:
+                pass
 
     def get_status(self) -> dict:
         return {
@@ -144,12 +142,15 @@ class VoiceService:
             "last_activity": self.last_activity,
             "voice_recognition_enabled": HAS_SPEECH_RECOGNITION or HAS_WHISPER,
             "available_engines": {"speech_recognition": HAS_SPEECH_RECOGNITION, "whisper": HAS_WHISPER},
+            "transcriber": self.transcriber.get_status(),
             "session_details": [
                 {
                     "session_id": sid,
                     "duration": time.time() - s["start_time"],
                     "chunks_received": s["audio_chunks_received"],
-                    "total_duration": s["total_audio_duration"]
+                    "total_duration": s["total_audio_duration"],
+                    "utterances": s["utterances"],
+                    "transcriptions": s["transcriptions"],
                 } for sid, s in self.sessions.items()
             ]
         }
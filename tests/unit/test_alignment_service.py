@@ -0,0 +1,66 @@
+import csv
+
+import numpy as np
+import pytest
+
+from services.alignment_service import estimate_offset
+from services.fusion_service import FusionService
+
+
+def _bursts(t, centers):
+    return sum(np.exp(-(((t - c) / 0.15) ** 2)) for c in centers)
+
+
+def test_estimate_offset_recovers_shift_in_fusion_convention():
+    rng = np.random.default_rng(0)
+    centers = [4.0, 11.5, 17.0, 30.2]
+    cv_t = np.arange(0, 40, 1 / 30)
+    sensor_t = np.arange(0, 40, 1 / 50) + 1.0
+    # Sensor clock runs 320 ms behind CV: sensor_ts + 0.32 == cv_ts for the same motion
+    cv_v = _bursts(cv_t, centers) + 0.02 * rng.standard_normal(cv_t.size)
+    sensor_v = 9.8 + _bursts(sensor_t + 0.32, centers) + 0.02 * rng.standard_normal(sensor_t.size)
+
+    result = estimate_offset(cv_t, cv_v, sensor_t, sensor_v)
+
+    assert result["offset_ms"] == pytest.approx(320, abs=10)
+    assert result["confidence"] > 0.5
+
+
+def test_estimate_offset_reports_low_confidence_for_unrelated_signals():
+    rng = np.random.default_rng(1)
+    t = np.arange(0, 60, 1 / 50)
+
+    result = estimate_offset(t, rng.standard_normal(t.size), t, rng.standard_normal(t.size))
+
+    assert result["confidence"] < 0.2
+
+
+def test_estimate_offset_returns_empty_result_for_unrelated_epochs():
+    t = np.arange(0, 30, 1 / 50)
+    values = np.sin(t)
+
+    # Relative seconds vs unix time: no lag within the window can line them up
+    result = estimate_offset(t, values, t + 1.7e9, values)
+
+    assert result["offset_ms"] is None
+    assert result["confidence"] == 0.0
+
+
+def test_fusion_service_estimates_offset_from_library_csvs(tmp_path):
+    centers = [2.0, 6.5, 9.0]
+    cv_t = np.arange(0, 12, 1 / 30)
+    with open(tmp_path / "cv.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "L_exist", "L_x0", "L_y0", "L_z0"])
+        # Integrate the burst profile so wrist speed follows it
+        x = np.cumsum(_bursts(cv_t, centers)) / 30
+        writer.writerows([[t, 1, xi, 0, 0] for t, xi in zip(cv_t, x)])
+    s_t = np.arange(0, 12, 1 / 50)
+    with open(tmp_path / "sensor.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "ax", "ay", "az"])
+        writer.writerows([[t, 0, 0, 9.8 + a] for t, a in zip(s_t, _bursts(s_t - 0.2, centers))])
+
+    result = FusionService(tmp_path).estimate_offset("cv.csv", "sensor.csv", max_lag_ms=1000)
+
+    assert result["offset_ms"] == pytest.approx(-200, abs=15)
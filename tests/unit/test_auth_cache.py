@@ -0,0 +1,51 @@
+import time
+
+import pytest
+from jose import JWTError, jwt
+from jose.exceptions import ExpiredSignatureError
+
+import api.core.auth as core_auth
+from api.core.auth import TokenCache
+
+SECRET = "test-secret"
+
+
+def _token(exp_offset: float = 60, **claims):
+    return jwt.encode({"sub": "a@b.c", "exp": int(time.time() + exp_offset), **claims}, SECRET, algorithm="HS256")
+
+
+def test_token_cache_verifies_once(monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(core_auth.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+    cache = TokenCache(maxsize=2)
+    token = _token(role="admin")
+
+    assert cache.decode(token, SECRET, ["HS256"])["role"] == "admin"
+    assert cache.decode(token, SECRET, ["HS256"])["role"] == "admin"
+    assert len(calls) == 1
+
+    # A different secret is a different cache entry (and fails verification)
+    with pytest.raises(JWTError):
+        cache.decode(token, "other-secret", ["HS256"])
+
+
+def test_token_cache_honours_exp_and_bounds_size():
+    cache = TokenCache(maxsize=2)
+    token = _token(exp_offset=1)
+    cache.decode(token, SECRET, ["HS256"])
+    cache._entries[next(iter(cache._entries))]["exp"] = time.time() - 1
+    with pytest.raises(ExpiredSignatureError):
+        cache.decode(token, SECRET, ["HS256"])
+    assert len(cache._entries) == 0
+
+    for i in range(3):
+        cache.decode(_token(n=i), SECRET, ["HS256"])
+    assert len(cache._entries) == 2
+
+
+def test_default_users_hash_lazily():
+    assert all("hashed_password" not in user for user in core_auth.DEFAULT_USERS.values())
+    user = core_auth.get_user("viewer")
+    assert core_auth.verify_password("viewer123", user.hashed_password)
+    assert core_auth.authenticate_user("viewer", "wrong") is None
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api.utils.cache import ResponseCache
+
+
+def test_lru_size_cap_and_none_values():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", None, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get("b", "missing") == "missing"
+    assert cache.get("a", "missing") is None
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": len(calls)}
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_compute("f", "k", compute, ttl=60) for _ in range(10)))
+        results.append(await cache.get_or_compute("f", "k", compute, ttl=60))
+        return results
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == {"n": 1} for r in results)
+    stats = cache.stats()["functions"]["f"]
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 9, 1)
+
+
+def test_cancelled_leader_leaves_the_shared_computation_running():
+    cache = ResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("f", "k", compute, ttl=60))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("f", "k", compute, ttl=60))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(run()) == "value"
+    assert len(calls) == 1
+    assert cache.get("k") == "value"
+
+
+def test_stale_while_revalidate_and_negative_caching():
+    cache = ResponseCache()
+    values = iter([1, 2])
+    missing = []
+
+    async def compute():
+        return next(values)
+
+    async def not_found():
+        missing.append(1)
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async def run():
+        assert await cache.get_or_compute("f", "k", compute, ttl=0, stale_ttl=60) == 1
+        # Expired: the stale value is served while the refresh runs in the background
+        assert await cache.get_or_compute("f", "k", compute, ttl=0, stale_ttl=60) == 1
+        await asyncio.sleep(0)
+        assert cache._entries["k"].value == 2
+
+        for _ in range(3):
+            with pytest.raises(HTTPException):
+                await cache.get_or_compute("g", "missing", not_found, ttl=60, negative_ttl=60)
+
+    asyncio.run(run())
+    assert len(missing) == 1
+
+
+def test_tag_invalidation_and_overlapping_compute():
+    cache = ResponseCache()
+
+    async def value():
+        return "v"
+
+    async def slow():
+        await asyncio.sleep(0.01)
+        return "old"
+
+    async def run():
+        await cache.get_or_compute("f", "s1", value, ttl=600, tags=("session:1", "gesture_list"))
+        await cache.get_or_compute("f", "s2", value, ttl=600, tags=("session:2",))
+        assert await cache.invalidate("session:1") == 1
+        assert cache.get("s1") is None and cache.get("s2") == "v"
+        assert "session:1" not in cache._tags and "gesture_list" not in cache._tags
+
+        # A result computed across an invalidation is returned but not cached
+        pending = asyncio.create_task(cache.get_or_compute("f", "s3", slow, ttl=600, tags=("session:3",)))
+        await asyncio.sleep(0)
+        await cache.invalidate("session:3")
+        assert await pending == "old"
+        assert cache.get("s3") is None
+
+    asyncio.run(run())
+    assert cache.stats()["functions"]["f"]["invalidated"] == 1
+
+
+def test_publish_invalidation_reuses_its_redis_clients(monkeypatch):
+    import redis
+
+    from api.core.settings import settings
+    from api.utils import cache as cache_module
+
+    created = []
+
+    class FakeRedis:
+        def __init__(self, url):
+            self.url = url
+            self.published = []
+            created.append(self)
+
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            return cls(url)
+
+        def publish(self, channel, message):
+            self.published.append(message)
+
+        def smembers(self, name):
+            return {"k"}
+
+        def delete(self, *names):
+            pass
+
+    monkeypatch.setattr(redis, "Redis", FakeRedis)
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_PUBSUB", True)
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "redis")
+    cache_module._sync_redis.cache_clear()
+
+    cache_module.publish_invalidation("session:1")
+    cache_module.publish_invalidation("session:2")
+    cache_module._sync_redis.cache_clear()
+
+    assert len(created) == 2
+    assert len(created[0].published) == 2
@@ -0,0 +1,42 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api.core.settings import settings
+from services.datasets.dataset_service import DatasetService, fcntl
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    return DatasetService()
+
+
+def _register_many(service, prefix, count):
+    for i in range(count):
+        path = service.active_dir / f"{prefix}_{i}.csv"
+        path.write_text("a\n1\n")
+        service.register_content(f"{prefix}{i}", path)
+
+
+def test_concurrent_register_content_keeps_every_entry(service):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda prefix: _register_many(service, prefix, 25), ["t0", "t1", "t2", "t3"]))
+
+    content = service.load_content_index()["content"]
+    assert len(content) == 100
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-process locking needs fcntl")
+def test_register_content_is_safe_across_processes(service):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_register_many, args=(service, f"p{n}", 25)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    content = service.load_content_index()["content"]
+    assert len(content) == 100
@@ -0,0 +1,165 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import db.base
+from api.core.settings import settings
+from db.models import Dataset
+from services.datasets.dataset_service import DatasetService
+from workers.tasks import dataset_tasks
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    service = DatasetService()
+    monkeypatch.setattr(dataset_tasks, "dataset_service", service)
+    return service
+
+
+@pytest.fixture
+def job_updates(monkeypatch):
+    updates = []
+    monkeypatch.setattr(dataset_tasks, "_update_job_status", lambda job_id, status, **kw: updates.append((status, kw)))
+    monkeypatch.setattr(dataset_tasks, "_advance_job_progress", lambda job_id, delta: None)
+    return updates
+
+
+class FakeSession:
+    """Just enough of a SQLAlchemy session for DatasetService.upsert_dataset_records."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def query(self, model):
+        return self
+
+    def filter(self, clause):
+        paths = set(clause.right.value)
+        self.matched = [row for row in self.rows if row.storage_path in paths]
+        return self
+
+    def all(self):
+        return self.matched
+
+    def add(self, row):
+        self.rows.append(row)
+
+    def commit(self):
+        for row in self.rows:
+            row.id = row.id or uuid4()
+
+
+def _write_csv(path, rows=2):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("a,b\n" + "".join(f"{i},{i}\n" for i in range(rows)))
+    return path
+
+
+def test_library_scan_chunks_get_each_resolved_file_once(service, job_updates, monkeypatch):
+    active = _write_csv(service.active_dir / "a.csv")
+    archived = _write_csv(service.archive_dir / "a.csv", rows=5)
+    legacy = _write_csv(service.data_dir / "b.csv")
+    monkeypatch.setattr(dataset_tasks, "LIBRARY_SCAN_CHUNK_FILES", 2)
+    monkeypatch.setattr(dataset_tasks, "_get_job", lambda job_id: SimpleNamespace(user_id=uuid4()))
+    dispatched = []
+    monkeypatch.setattr(
+        dataset_tasks, "chord", lambda header: lambda callback: dispatched.append((header, callback, list(job_updates)))
+    )
+
+    result = dataset_tasks.scan_library_task.run(True)
+
+    assert result == {"status": "dispatched", "total": 3}
+    header, callback, updates_at_dispatch = dispatched[0]
+    # The initial progress is written before any chunk can advance it
+    assert updates_at_dispatch[-1] == ("running", {"progress": dataset_tasks.LIBRARY_SCAN_PROGRESS[0]})
+    assert job_updates == updates_at_dispatch
+    chunks = [task.args for task in header.tasks]
+    assert [(offset, total) for _, _, offset, total in chunks] == [(0, 3), (2, 3)]
+    files = sorted(pair for _, pairs, _, _ in chunks for pair in pairs)
+    assert files == sorted([
+        ("active", str(active.resolve())),
+        ("archive", str(archived.resolve())),
+        ("legacy", str(legacy.resolve())),
+    ])
+    assert callback.task == "finalize_library_scan_task"
+
+    # A name shared by the active and archive roots still scans the archived copy
+    entries = dataset_tasks.scan_library_chunk_task(None, [["archive", str(archived.resolve())]], 0, 1)
+    assert entries[0]["name"] == "a.csv" and entries[0]["path"] == str(archived.resolve())
+    assert entries[0]["results"]["row_count"] == 5
+
+
+def test_finalize_library_scan_upserts_changed_files_and_reports_failures(service, job_updates, monkeypatch):
+    changed = _write_csv(service.active_dir / "changed.csv")
+    unchanged = _write_csv(service.active_dir / "unchanged.csv")
+    scanned = [
+        {"name": "changed.csv", "path": str(changed), **dataset_tasks._scan_library_file(changed, "job")},
+        {"name": "unchanged.csv", "path": str(unchanged), "sha256": "u", "results": {},
+         "sidecar": {"dataset_id": "kept"}, "skipped": "unchanged"},
+    ]
+    upserts = []
+
+    def upsert(items, owner_id):
+        upserts.append(items)
+        return {str(path): "new-id" for path, _, _ in items}
+
+    monkeypatch.setattr(service, "upsert_dataset_records", upsert)
+
+    result = dataset_tasks.finalize_library_scan_task(
+        [scanned[:1], scanned[1:] + [{"name": "broken.csv", "error": "bad header"}]], "job", str(uuid4())
+    )
+
+    assert result["status"] == "success"
+    assert (result["total"], result["scanned"], result["unchanged"]) == (3, 1, 1)
+    assert result["failed"] == [{"name": "broken.csv", "error": "bad header"}]
+    assert [path for path, _, _ in upserts[0]] == [changed]
+    assert service.load_sidecar(changed)["dataset_id"] == "new-id"
+    assert service.load_sidecar(unchanged)["dataset_id"] == "kept"
+    assert set(service.load_content_index()["content"]) == {scanned[0]["sha256"], "u"}
+    assert job_updates[-1] == ("completed", {
+        "progress": 100,
+        "error": "broken.csv: bad header",
+        "result_location": str(service.library_dir),
+        "finished": True,
+    })
+
+
+def test_upsert_dataset_records_updates_existing_rows_in_one_session(service, monkeypatch):
+    first = _write_csv(service.active_dir / "first.csv")
+    second = _write_csv(service.active_dir / "second.csv", rows=4)
+    existing_id = uuid4()
+    rows = [Dataset(id=existing_id, name="first.csv", storage_path=str(first.resolve()), owner_id=uuid4())]
+    sessions = []
+
+    def session_factory():
+        sessions.append(FakeSession(rows))
+        return sessions[-1]
+
+    monkeypatch.setattr(db.base, "SessionLocal", session_factory)
+    owner = uuid4()
+
+    ids = service.upsert_dataset_records(
+        [
+            (first, {"modality": "cv", "hand_mode": "single", "row_count": 2}, {}),
+            (second, {"modality": "sensor", "row_count": 4}, {}),
+        ],
+        str(owner),
+    )
+
+    assert len(sessions) == 1 and len(rows) == 2
+    assert ids[str(first.resolve())] == str(existing_id)
+    created = rows[1]
+    assert ids[str(second.resolve())] == str(created.id)
+    assert (created.name, created.owner_id, created.modality, created.hand_mode, created.row_count) == (
+        "second.csv", owner, "sensor", "unknown", 4
+    )
+    assert rows[0].metadata_json["content_sha256"] == service.content_sha256(first.resolve(), {})
+    assert service.upsert_dataset_records([], owner) == {}
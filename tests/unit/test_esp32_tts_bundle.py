@@ -0,0 +1,59 @@
+import json
+import zipfile
+
+import services.esp32_tts_bundle as bundle_module
+import services.tts_service as tts_module
+from api.core.settings import settings
+from services.esp32_tts_bundle import ESP32BundleBuilder
+from services.tts_service import TTSService
+
+
+def _service(tmp_path, monkeypatch, calls):
+    class FakeGTTS:
+        def __init__(self, text, lang):
+            self.text = text
+
+        def save(self, path):
+            calls.append(self.text)
+            with open(path, "wb") as f:
+                f.write(self.text.encode())
+
+    class FakeModule:
+        gTTS = FakeGTTS
+
+    monkeypatch.setattr(settings, "TTS_PROVIDER", "gtts")
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(tts_module, "HAS_GTTS", True)
+    monkeypatch.setattr(tts_module, "optional_import", lambda name: FakeModule)
+    service = TTSService()
+    monkeypatch.setattr(bundle_module, "tts_service", service)
+    return service
+
+
+def test_build_renders_all_files_then_skips_unchanged(tmp_path, monkeypatch):
+    calls = []
+    _service(tmp_path, monkeypatch, calls)
+    builder = ESP32BundleBuilder(str(tmp_path / "bundles"), concurrency=3, keep=2)
+    progress = []
+
+    first = builder.build(progress_cb=lambda done, total: progress.append((done, total)))
+    total = len(builder.plan())
+    assert first["version"] == 1 and first["rendered"] == total and not first["failed"]
+    assert progress[-1] == (total, total)
+    with zipfile.ZipFile(first["bundle"]) as bundle:
+        manifest = json.loads(bundle.read("manifest.json"))
+        assert bundle.read("tts/fr/hello.mp3") == b"Bonjour"
+    assert len(manifest["files"]) == total
+
+    second = builder.build()
+    assert second["version"] == 1 and not second["changed"] and second["skipped"] == total
+
+    # A changed phrase re-renders only that file and bumps the bundle version
+    monkeypatch.setitem(tts_module.LANGUAGE_MAPPINGS["en"], "Class 0", "Hi there")
+    third = builder.build(["en"])
+    assert third["version"] == 2 and third["rendered"] == 1
+    assert builder.load_manifest()["version"] == 2
+    assert (tmp_path / "bundles" / "assets" / "tts" / "en" / "hello.mp3").read_bytes() == b"Hi there"
+    # Phrases shared between runs came from the TTS cache: one synthesis each
+    assert len(calls) == len(set(calls))
@@ -0,0 +1,32 @@
+import os
+
+from services import file_integrity
+from services.file_integrity import cached_sha256
+
+
+def test_cached_sha256_reuses_entry_while_fingerprint_matches(tmp_path, monkeypatch):
+    path = tmp_path / "data.csv"
+    path.write_text("timestamp,f1\n0,1\n")
+    entry = cached_sha256(path)
+
+    def _fail(_path):
+        raise AssertionError("file should not be re-read")
+
+    monkeypatch.setattr(file_integrity, "sha256_for_file", _fail)
+
+    assert cached_sha256(path, entry) is entry
+
+
+def test_cached_sha256_recomputes_after_change(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("timestamp,f1\n0,1\n")
+    entry = cached_sha256(path)
+
+    path.write_text("timestamp,f1\n0,2\n")
+    stats = path.stat()
+    os.utime(path, ns=(stats.st_atime_ns, entry["mtime_ns"] + 1_000_000))
+
+    updated = cached_sha256(path, entry)
+
+    assert updated["sha256"] != entry["sha256"]
+    assert updated["mtime_ns"] == entry["mtime_ns"] + 1_000_000
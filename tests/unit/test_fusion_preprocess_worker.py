@@ -0,0 +1,193 @@
+import importlib.util
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("cv2")
+
+APP_PATH = Path(__file__).resolve().parents[2] / "worker-fusion-preprocess" / "app.py"
+CSV = "timestamp_ms,capture_sensor_source,sensor_match_delta_ms\n0,usb,1\n10,usb,2\n20,,\n"
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """A fresh copy of the worker module (one pool thread, one queue slot) on a temporary JOB_DIR."""
+    monkeypatch.setenv("FUSION_PREPROCESS_JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setenv("FUSION_PREPROCESS_WORKERS", "1")
+    monkeypatch.setenv("FUSION_PREPROCESS_MAX_QUEUED", "1")
+    spec = importlib.util.spec_from_file_location(f"fusion_preprocess_app_{uuid4().hex}", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Pydantic resolves the request models' forward references through sys.modules
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    yield module
+    module._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _wait_for(client, job_id, *states, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/v1/jobs/{job_id}").json()
+        if job["status"] in states:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not reach {states}: {job}")
+
+
+def _blocking_analyze(worker, monkeypatch):
+    """Replaces _analyze with one that waits for `release`, honouring cancellation."""
+    release = threading.Event()
+    real_analyze = worker._analyze
+
+    def analyze(req, video_path=None, video_name=None, progress=None, cancel=None):
+        while not release.wait(0.01):
+            if cancel is not None and cancel.is_set():
+                raise worker.JobCancelled()
+        return real_analyze(req, progress=progress, cancel=cancel)
+
+    monkeypatch.setattr(worker, "_analyze", analyze)
+    return release
+
+
+def test_analyze_job_runs_in_the_background(worker):
+    with TestClient(worker.app) as client:
+        queued = client.post("/v1/jobs/analyze", json={"source_file": "a.csv", "csv_text": CSV})
+        assert queued.status_code == 202
+        assert queued.json()["owner"] == worker.OWNER_ID
+
+        job = _wait_for(client, queued.json()["job_id"], "completed", "failed")
+
+    assert job["status"] == "completed" and job["progress"] == 100
+    assert job["result"]["metadata"]["processed_summary"]["row_count"] == 2
+
+
+def test_full_queue_rejects_and_cancel_cleans_up_queued_uploads(worker, monkeypatch):
+    release = _blocking_analyze(worker, monkeypatch)
+    with TestClient(worker.app) as client:
+        running = client.post("/v1/jobs/analyze", json={"source_file": "a.csv", "csv_text": CSV}).json()
+        _wait_for(client, running["job_id"], "running")
+        queued = client.post(
+            "/v1/jobs/analyze-upload",
+            data={"source_file": "b.csv"},
+            files={"csv_file": ("b.csv", CSV), "video_file": ("b.webm", b"video")},
+        ).json()
+        assert [p.stem for p in worker.UPLOAD_DIR.iterdir()] == [queued["job_id"]]
+
+        rejected = client.post(
+            "/v1/jobs/analyze-upload",
+            data={"source_file": "c.csv"},
+            files={"csv_file": ("c.csv", CSV), "video_file": ("c.webm", b"video")},
+        )
+        assert rejected.status_code == 429
+        assert [p.stem for p in worker.UPLOAD_DIR.iterdir()] == [queued["job_id"]]
+
+        # Queued: dropped at once, its spooled video with it
+        assert client.post(f"/v1/jobs/{queued['job_id']}/cancel").json()["status"] == "cancelled"
+        assert list(worker.UPLOAD_DIR.iterdir()) == []
+        assert client.post(f"/v1/jobs/{queued['job_id']}/cancel").status_code == 409
+
+        # Running: stops at its next cancellation check
+        assert client.post(f"/v1/jobs/{running['job_id']}/cancel").json()["cancel_requested"] is True
+        assert _wait_for(client, running["job_id"], "cancelled", "completed")["status"] == "cancelled"
+        release.set()
+
+
+@pytest.mark.skipif(importlib.util.find_spec("fcntl") is None, reason="owner locks need fcntl")
+def test_restart_fails_only_jobs_of_dead_owners(worker):
+    import fcntl
+
+    live_owner = "other-host-1-live"
+    live_lock = (worker.OWNER_DIR / f"{live_owner}.lock").open("w")
+    fcntl.flock(live_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    (worker.OWNER_DIR / "old-host-1-dead.lock").touch()
+    jobs = {"live": live_owner, "dead": "old-host-1-dead", "legacy": None}
+    for name, owner in jobs.items():
+        worker._save_job(name, {"job_id": name, "owner": owner, "status": "running"})
+        (worker.UPLOAD_DIR / f"{name}.webm").write_bytes(b"video")
+    (worker.UPLOAD_DIR / "spooling.webm").write_bytes(b"video")
+
+    try:
+        with TestClient(worker.app):
+            statuses = {name: worker._load_job(name)["status"] for name in jobs}
+            uploads = sorted(p.stem for p in worker.UPLOAD_DIR.iterdir())
+    finally:
+        live_lock.close()
+
+    assert statuses == {"live": "running", "dead": "failed", "legacy": "failed"}
+    assert uploads == ["live", "spooling"]
+    # The dead owner's lock is recent, so it is left for a later start to remove
+    assert (worker.OWNER_DIR / "old-host-1-dead.lock").exists()
+    assert not (worker.OWNER_DIR / f"{worker.OWNER_ID}.lock").exists()
+
+
+def _write_video(path, worker, frames=120, fps=30.0, jerk_at=61):
+    """A square drifting 2px a frame that jerks across the frame once, at `jerk_at`."""
+    cv2 = worker.cv2
+    np = worker.np
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (640, 360))
+    background = np.tile((np.arange(640, dtype=np.uint8) // 4)[None, :, None], (360, 1, 3))
+    for i in range(frames):
+        frame = background.copy()
+        x = 40 + 2 * i + (300 if i >= jerk_at else 0)
+        frame[120:240, x:x + 120] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_fast_mode_finds_the_same_spike_as_full_mode(worker, tmp_path):
+    video = _write_video(tmp_path / "jerk.avi", worker)
+
+    full = worker._analyze_video(video, video.name, mode="full")
+    fast = worker._analyze_video(video, video.name, mode="fast")
+
+    assert full["analysis"]["frame_step"] == 1 and fast["analysis"]["frame_step"] == 2
+    assert full["spike_detected"] and fast["spike_detected"]
+    assert abs(fast["peak_frame_index"] - full["peak_frame_index"]) <= fast["analysis"]["frame_step"]
+    assert fast["motion_peak"] == pytest.approx(full["motion_peak"], rel=0.25)
+    # The drift between samples does not reach the threshold in either mode
+    assert fast["motion_mean"] < fast["motion_threshold"] / 2
+
+
+def _stalled_segment(video_path, start, stop, step, width):
+    """Stands in for _segment_motion in the spawned children: records its pid, never finishes."""
+    (Path(video_path).parent / f"segment-{os.getpid()}").touch()
+    time.sleep(120)
+
+
+def test_cancelling_a_multi_process_analysis_stops_its_segments(worker, tmp_path, monkeypatch):
+    video = _write_video(tmp_path / "long.avi", worker, frames=2 * worker.MIN_SEGMENT_FRAMES)
+    monkeypatch.setattr(worker, "VIDEO_PROCESSES", 2)
+    monkeypatch.setattr(worker, "_segment_motion", _stalled_segment)
+    cancel = threading.Event()
+    outcome = {}
+
+    def run():
+        try:
+            worker._analyze_video(video, video.name, cancel=cancel, mode="full")
+        except worker.JobCancelled:
+            outcome["cancelled_at"] = time.monotonic()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while len(list(tmp_path.glob("segment-*"))) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    pids = [int(p.name.split("-")[1]) for p in tmp_path.glob("segment-*")]
+    assert len(pids) == 2
+
+    cancel.set()
+    requested_at = time.monotonic()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert outcome["cancelled_at"] - requested_at < 10
+    for pid in pids:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
@@ -0,0 +1,99 @@
+import csv
+
+import numpy as np
+import pytest
+
+from services.fusion_service import FusionService, SensorChannels
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def test_align_interpolates_every_channel_and_skips_uncovered_cv_rows():
+    sensor = SensorChannels(
+        ["timestamp", "f1", "ax", "source"],
+        [["0.0", "0", "10", "glove"], ["1.0", "10", "20", "glove"], ["2.0", "20", "", "glove"]],
+    )
+    cv_ts = np.array([-0.5, 0.25, 1.0, 1.5, 2.5])
+
+    cv_idx, left, fused = FusionService(None).align(cv_ts, sensor, 0, (-1.0, 3.0))
+
+    assert cv_idx.tolist() == [1, 2, 3]
+    assert left.tolist() == [0, 0, 1]
+    # Empty cells read as 0, matching the row-wise implementation
+    assert fused.tolist() == [[2.5, 12.5], [10.0, 20.0], [15.0, 10.0]]
+
+
+def test_align_applies_offset_and_trim_window():
+    sensor = SensorChannels(["timestamp", "f1"], [[str(t), str(t * 2)] for t in range(11)])
+    cv_ts = np.arange(0.0, 10.5, 1.0)
+
+    service = FusionService(None)
+    cv_idx, _, fused = service.align(cv_ts, sensor, 500, service.trim_window(0.0, 10.0, 20, 80))
+
+    assert cv_ts[cv_idx].tolist() == [2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    # Sensor clock is shifted 0.5 s later, so t=2.0 reads the sensor sample at 1.5
+    assert fused[0, 0] == pytest.approx(3.0)
+
+
+def test_interpolate_sensor_data_keeps_text_channels_from_left_sample():
+    cv_rows = [{"timestamp": "0.5", "L_x0": "0.1"}]
+    sensor_rows = [
+        {"timestamp": "0", "f1": "1", "label": "hello"},
+        {"timestamp": "1", "f1": "3", "label": "bye"},
+    ]
+
+    fused = FusionService(None).interpolate_sensor_data(cv_rows, sensor_rows, 0, 0, 100, "single")
+
+    assert fused == [{"timestamp": "0.5", "L_x0": "0.1", "sensor_f1": 2.0, "sensor_label": "hello"}]
+
+
+def test_export_fusion_writes_dual_hand_channels(tmp_path):
+    _write_csv(tmp_path / "cv.csv", ["timestamp", "L_x0"], [[0.0, 0.1], [0.5, 0.2], [1.0, 0.3]])
+    _write_csv(
+        tmp_path / "sensor.csv",
+        ["timestamp", "left_flex_1", "right_flex_1"],
+        [[0.0, 0, 100], [1.0, 10, 200]],
+    )
+
+    name = FusionService(tmp_path).export_fusion(
+        {"cv_name": "cv.csv", "sensor_name": "sensor.csv", "mode": "dual"}
+    )
+
+    with open(tmp_path / name, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["timestamp", "L_x0", "sensor_left_flex_1", "sensor_right_flex_1"]
+    assert rows[2] == ["0.5", "0.2", "5.0", "150.0"]
+
+
+def test_export_fusion_streams_chunks_and_reports_progress(tmp_path, monkeypatch):
+    _write_csv(tmp_path / "cv.csv", ["timestamp", "L_x0"], [[t / 10, t] for t in range(25)])
+    _write_csv(tmp_path / "sensor.csv", ["timestamp", "f1"], [[0.0, 0], [10.0, 100]])
+    monkeypatch.setattr(FusionService, "CHUNK_ROWS", 10)
+    progress = []
+
+    name = FusionService(tmp_path).export_fusion(
+        {"cv_name": "cv.csv", "sensor_name": "sensor.csv", "trim_in_pct": 50},
+        progress_cb=lambda done, total: progress.append((done, total)),
+    )
+
+    with open(tmp_path / name, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert progress == [(10, 25), (20, 25), (25, 25)]
+    # Trim window spans the whole CV file, not each chunk
+    assert [r[0] for r in rows[1:3]] == ["1.2", "1.3"]
+    assert len(rows) == 1 + 13
+
+
+def test_export_fusion_raises_when_nothing_overlaps(tmp_path):
+    _write_csv(tmp_path / "cv.csv", ["timestamp", "L_x0"], [[0.0, 0.1], [1.0, 0.2]])
+    _write_csv(tmp_path / "sensor.csv", ["timestamp", "f1"], [[5.0, 1], [6.0, 2]])
+
+    with pytest.raises(ValueError):
+        FusionService(tmp_path).export_fusion({"cv_name": "cv.csv", "sensor_name": "sensor.csv"})
+    # No partial output is left behind in the library
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cv.csv", "sensor.csv"]
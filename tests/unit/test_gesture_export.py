@@ -0,0 +1,53 @@
+import asyncio
+import csv
+import gzip
+import io
+
+from api.routes import gestures_predict
+from api.routes.gestures_predict import iter_gesture_csv
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _collect(rows, compress=False):
+    async def run():
+        return [chunk async for chunk in iter_gesture_csv(rows, compress)]
+    return asyncio.run(run())
+
+
+DOCS = [
+    {"gesture_label": "hello", "source": "USB", "timestamp": "t0", "sensor_values": [[1] * 11, [2] * 11]},
+    {"label": "bye", "timestamp": "t1", "values": [3] * 11},
+]
+
+
+def test_iter_gesture_csv_flattens_batches_in_chunks(monkeypatch):
+    monkeypatch.setattr(gestures_predict, "EXPORT_CHUNK_CHARS", 1)
+
+    chunks = _collect(_Cursor(DOCS))
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    # One chunk per document; the header goes out with the first
+    assert len(chunks) == 2
+    assert rows[0][-3:] == ["label", "source", "timestamp"]
+    assert rows[2] == ["2"] * 11 + ["hello", "USB", "t0"]
+    assert rows[3] == ["3"] * 11 + ["bye", "", "t1"]
+
+
+def test_iter_gesture_csv_gzip_matches_plain_output():
+    plain = b"".join(_collect(_Cursor(DOCS)))
+
+    assert gzip.decompress(b"".join(_collect(_Cursor(DOCS), compress=True))) == plain
+
@@ -0,0 +1,36 @@
+from api.core.indexes import INDEX_SPECS, _hot_queries, _plan_stages
+from services.sensor_store import EXPORT_SORT
+
+
+def test_plan_stages_ignores_rejected_plans():
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            "rejectedPlans": [{"stage": "COLLSCAN"}],
+        }
+    }
+
+    assert _plan_stages(explain) == ["FETCH", "IXSCAN"]
+
+
+def test_plan_stages_finds_collscan_inside_aggregate_cursor():
+    explain = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {
+        "queryPlan": {"stage": "GROUP", "inputStage": {"stage": "COLLSCAN"}},
+    }}}}]}
+
+    assert "COLLSCAN" in _plan_stages(explain)
+
+
+def test_every_audited_sort_is_served_by_an_index():
+    for query in _hot_queries():
+        sort = list((query.get("sort") or {}).items())
+        if not sort or query["filter"]:
+            continue
+        reverse = [(field, -direction) for field, direction in sort]
+        keys = [list(spec_keys) for collection, spec_keys, _ in INDEX_SPECS if collection is query["collection"]]
+        assert any(k[: len(sort)] in (sort, reverse) for k in keys), query["name"]
+
+
+def test_export_sort_has_an_audit_entry():
+    exports = [q for q in _hot_queries() if q["name"] == "sensor_full_export"]
+    assert exports and list(exports[0]["sort"].items()) == EXPORT_SORT
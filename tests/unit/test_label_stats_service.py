@@ -0,0 +1,34 @@
+from services.label_stats_service import hll_estimate, hll_registers, sample_updates
+
+
+def test_hll_estimate_tracks_distinct_sessions():
+    assert hll_estimate({}) == 0
+    assert hll_estimate(hll_registers(["s1", "s1", "s2"])) == 2
+
+    estimate = hll_estimate(hll_registers(f"session-{i}" for i in range(5000)))
+    assert abs(estimate - 5000) / 5000 < 0.15
+
+
+def test_hll_registers_merge_like_max():
+    left = hll_registers(f"a{i}" for i in range(300))
+    right = hll_registers(f"b{i}" for i in range(300))
+    merged = {k: max(left.get(k, 0), right.get(k, 0)) for k in set(left) | set(right)}
+
+    assert merged == hll_registers([f"a{i}" for i in range(300)] + [f"b{i}" for i in range(300)])
+
+
+def test_sample_updates_groups_by_label():
+    docs = [
+        {"session_id": "s1", "gesture_label": "hello", "timestamp": "2025-06-27T12:00:00Z", "sensor_values": [[0] * 11] * 3},
+        {"session_id": "s2", "gesture_label": "hello", "timestamp": "2025-06-27T12:01:00Z", "sensor_values": [[0] * 11] * 2},
+        {"session_id": "s3", "label": "bye", "values": [1] * 11},
+    ]
+
+    updates = {u._filter["_id"]: u._doc for u in sample_updates(docs)}
+
+    assert set(updates) == {"samples|hello", "samples|bye"}
+    hello = updates["samples|hello"]
+    assert hello["$inc"] == {"sample_count": 5}
+    assert hello["$setOnInsert"] == {"kind": "samples", "label": "hello"}
+    assert hello["$max"]["last_updated"].minute == 1
+    assert sum(1 for k in hello["$max"] if k.startswith("hll.")) <= 2
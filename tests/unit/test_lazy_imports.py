@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from api.utils.lazy_imports import available, optional_import
+from scripts.importtime_report import HEAVY_MODULES
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_optional_import_handles_missing_modules():
+    assert available("json") and optional_import("json").dumps([]) == "[]"
+    assert not available("no_such_module_xyz")
+    assert optional_import("no_such_module_xyz") is None
+
+
+def test_api_import_defers_heavy_modules():
+    code = "import sys, api.main; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip().splitlines()[-1:] in ([], [""])
+
+
+def test_voice_service_import_does_not_load_whisper(tmp_path):
+    # Stub whisper that records being imported; the real one may not be installed
+    marker = tmp_path / "imported"
+    (tmp_path / "whisper.py").write_text(
+        f"open({str(marker)!r}, 'w').close()\n"
+        "def load_model(name):\n"
+        "    raise AssertionError('model loaded at import')\n"
+    )
+    code = (
+        "from services.voice.transcriber import HAS_WHISPER, transcriber\n"
+        "import services.voice.voice_service\n"
+        "print(HAS_WHISPER, transcriber.model_loaded)"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(tmp_path), str(ROOT)])}
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert proc.stdout.strip().splitlines()[-1] == "True False"
+    assert not marker.exists()
@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from api.core.error_handler import performance_monitor
+from api.core.middleware import RequestMiddleware
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestMiddleware)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def _get(path):
+    async def run():
+        async with _client() as client:
+            return await client.get(path)
+    return asyncio.run(run())
+
+
+def test_request_middleware_injects_headers_and_records_route_template():
+    response = _get("/items/42")
+
+    assert response.status_code == 200
+    assert response.headers["x-response-time"].endswith("s")
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "GET /items/{item_id}" in performance_monitor.get_performance_stats()
+
+
+def test_request_middleware_turns_exceptions_into_error_responses():
+    response = _get("/boom")
+
+    assert response.status_code == 500
+    assert response.json()["status"] == "error"
+    assert response.headers["x-content-type-options"] == "nosniff"
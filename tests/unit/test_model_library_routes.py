@@ -0,0 +1,66 @@
+import asyncio
+from uuid import uuid4
+
+from api.core.settings import settings
+from api.routes import model_library_routes
+from services.model_library_service import model_library_service
+from services.models.model_service import model_service
+
+
+def _registered_entry(tmp_path):
+    """A model as list_models returns it, with the integrity block register_model_from_tmp writes."""
+    model_path = tmp_path / "model.pt"
+    metadata_path = tmp_path / "metadata.json"
+    model_path.write_bytes(b"weights")
+    metadata_path.write_text('{"export_format": "torchscript"}')
+    artifact = model_service._sha256_for_file(model_path)
+    metadata = model_service._sha256_for_file(metadata_path)
+    return {
+        "id": str(uuid4()),
+        "name": "demo",
+        "model_path": str(model_path),
+        "artifact_path": str(model_path),
+        "metadata_path": str(metadata_path),
+        "metadata": {"export_format": "torchscript"},
+        "input_dim": 4,
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "integrity": {
+            "artifact_sha256": artifact.pop("sha256"),
+            "metadata_sha256": metadata.pop("sha256"),
+            "artifact_fingerprint": artifact,
+            "metadata_fingerprint": metadata,
+        },
+    }
+
+
+def test_activating_a_registry_synced_model_verifies_its_artifact(tmp_path, monkeypatch):
+    entry = _registered_entry(tmp_path)
+    stored = []
+
+    async def list_models():
+        return [entry]
+
+    async def update_model_runtime_status(model_id, runtime_status):
+        stored.append(runtime_status)
+        return None
+
+    monkeypatch.setattr(settings, "MODEL_LIBRARY_DIR", str(tmp_path / "library"))
+    monkeypatch.setattr(model_service, "list_models", list_models)
+    monkeypatch.setattr(model_service, "update_model_runtime_status", update_model_runtime_status)
+    monkeypatch.setattr(
+        model_library_service,
+        "perform_runtime_check",
+        lambda target: {"input_dim": 4, "output_dim": 2, "message": "ok"},
+    )
+    monkeypatch.setattr(model_library_service, "trigger_worker_reconcile", lambda reason: None)
+
+    result = asyncio.run(model_library_routes.activate_playground_model(entry["id"], _user=None))
+
+    assert result["active_model_id"] == entry["id"]
+    assert "artifact_path" not in result["model"]
+    assert stored[0]["integrity"] == {"artifact": True, "metadata": True, "ok": True}
+
+    # A modified artifact is reported, not hidden behind the cached digest
+    (tmp_path / "model.pt").write_bytes(b"tampered weights")
+    asyncio.run(model_library_routes.activate_playground_model(entry["id"], _user=None))
+    assert stored[1]["integrity"] == {"artifact": False, "metadata": True, "ok": False}
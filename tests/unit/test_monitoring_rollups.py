@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timezone
+
+from api.core.error_handler import PerformanceMonitor, sketch_index
+from services.dashboard.monitoring_rollups import (
+    MonitoringRollupService,
+    merge_buckets,
+    source_drift,
+    window_summary,
+)
+
+
+class FakeRollups:
+    def __init__(self, latest=None):
+        self.latest = latest
+        self.writes = []
+
+    async def find_one(self, query, sort=None):
+        return self.latest
+
+    async def bulk_write(self, updates, ordered=True):
+        self.writes.extend(updates)
+
+
+class FakeSamples:
+    def __init__(self):
+        self.starts = []
+        self.groups = []
+
+    async def aggregate(self, pipeline):
+        self.starts.append(pipeline[0]["$match"]["timestamp"]["$gte"])
+        for group in self.groups:
+            yield group
+
+
+def test_performance_monitor_counts_minutes_and_drains():
+    monitor = PerformanceMonitor()
+    monitor.rollup_exclude_paths.add("/dashboard/monitoring")
+
+    monitor.record_request("/gestures", "GET", 0.004, status_code=200)
+    monitor.record_request("/gestures", "GET", 0.3, status_code=500)
+    monitor.record_request("/dashboard/monitoring", "GET", 0.1, status_code=200)
+
+    drained = monitor.drain_minute_counters()
+    (counters,) = drained.values()
+    assert counters["requests"] == 2
+    assert counters["errors"] == 1
+    assert counters["latency"].counts == {sketch_index(4.0): 1, sketch_index(300.0): 1}
+    assert monitor.drain_minute_counters() == {}
+
+
+def test_merge_buckets_and_window_summary():
+    buckets = [
+        {"requests": 10, "errors": 1, "latency": {str(sketch_index(20.0)): 10},
+         "sensor": {"batches": 2, "samples": 20, "values_total": 220, "missing_values": 11, "schema_mismatches": 0},
+         "sources": {"USB": 2}},
+        {"sensor": {"batches": 1, "samples": 5, "values_total": 50, "missing_values": 0, "schema_mismatches": 1},
+         "sources": {"USB": 1, "csv_upload": 1}},
+    ]
+
+    summary = window_summary(merge_buckets(buckets), window_minutes=60)
+
+    assert summary["sensor_batches"] == 3
+    assert summary["missing_ratio"] == 11 / 270
+    assert summary["schema_mismatch_count"] == 1
+    assert summary["sources"] == {"USB": 3, "csv_upload": 1}
+    assert summary["error_rate_pct"] == 10.0
+    assert abs(summary["latency_p95_ms"] - 20.0) <= 0.2
+
+
+def test_source_drift_is_total_variation_distance():
+    assert source_drift({"USB": 5}, {"USB": 50})["global_score"] == 0.0
+
+    drift = source_drift({"USB": 1, "csv_upload": 1}, {"USB": 1})
+    assert drift["global_score"] == 0.5
+    assert {f["feature"] for f in drift["top_shifted_features"]} == {"source:USB", "source:csv_upload"}
+
+
+def test_sensor_rollup_resumes_from_latest_stored_bucket_after_restart():
+    latest = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+    now = datetime(2025, 6, 1, 12, 30, 15, tzinfo=timezone.utc)
+    samples = FakeSamples()
+    service = MonitoringRollupService(FakeRollups({"_id": latest, "sensor": {}}), samples)
+
+    asyncio.run(service.roll_up_sensor(now))
+    asyncio.run(service.roll_up_sensor(datetime(2025, 6, 1, 12, 31, tzinfo=timezone.utc)))
+
+    assert samples.starts[0] == datetime(2025, 6, 1, 11, 55, tzinfo=timezone.utc)
+    assert samples.starts[2] == datetime(2025, 6, 1, 12, 25, tzinfo=timezone.utc)
+
+    # Nothing stored yet: the first pass covers the retention window
+    fresh = FakeSamples()
+    asyncio.run(MonitoringRollupService(FakeRollups(), fresh).roll_up_sensor(now))
+    assert fresh.starts[0] == datetime(2025, 5, 17, 12, 25, tzinfo=timezone.utc)
@@ -0,0 +1,53 @@
+import random
+
+from api.core.error_handler import SKETCH_RELATIVE_ACCURACY, LatencySketch, PerformanceMonitor
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_percentiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1) for _ in range(20000)]
+    sketch = LatencySketch()
+    for v in values:
+        sketch.record(v)
+
+    for q in (0.5, 0.95, 0.99):
+        assert abs(sketch.percentile(q) - _exact(values, q)) <= SKETCH_RELATIVE_ACCURACY * _exact(values, q) * 1.01
+    assert sketch.percentile(0.0) == min(values)
+    assert sketch.percentile(1.0) == max(values)
+
+
+def test_sketch_merge_equals_single_sketch():
+    left, right, both = LatencySketch(), LatencySketch(), LatencySketch()
+    for i in range(1, 500):
+        (left if i % 2 else right).record(float(i))
+        both.record(float(i))
+
+    merged = LatencySketch().merge(left).merge(right)
+
+    assert merged.counts == both.counts
+    assert merged.percentile(0.95) == both.percentile(0.95)
+    assert LatencySketch.from_counts({str(k): v for k, v in both.counts.items()}).counts == both.counts
+
+
+def test_window_stats_per_route_and_status():
+    monitor = PerformanceMonitor()
+    for _ in range(9):
+        monitor.record_request("/gestures/{session_id}", "GET", 0.010, status_code=200)
+    monitor.record_request("/gestures/{session_id}", "GET", 0.500, status_code=503)
+    monitor.record_request("/dashboard/monitoring", "GET", 2.0, status_code=200)
+
+    stats = monitor.get_window_stats(60, {"/dashboard/monitoring"}, per_route=True)
+
+    assert stats["request_count"] == 10
+    assert stats["error_count"] == 1
+    assert stats["error_rate_pct"] == 10.0
+    route = stats["routes"]["GET /gestures/{session_id}"]
+    assert route["status"] == {"2xx": 9, "5xx": 1}
+    assert abs(route["p50_ms"] - 10.0) <= 0.1
+    assert route["max_ms"] == 500.0
+    assert monitor.get_performance_stats()["GET /dashboard/monitoring"]["request_count"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from api.core.middleware import RateLimitMiddleware
+from api.core.rate_limit import MemoryRateLimiter
+
+
+def test_memory_limiter_blocks_at_limit_within_window():
+    limiter = MemoryRateLimiter(window_seconds=60)
+
+    results = [limiter.hit_sync("ip:1", 3, now=10.0)[0] for _ in range(4)]
+
+    assert results == [True, True, True, False]
+    # Other keys are independent
+    assert limiter.hit_sync("ip:2", 3, now=10.0)[0]
+
+
+def test_memory_limiter_weights_previous_window():
+    limiter = MemoryRateLimiter(window_seconds=60)
+    for _ in range(10):
+        limiter.hit_sync("k", 10, now=50.0)
+
+    # 15s into the next window, 75% of the previous 10 requests still count (7.5)
+    allowed = [limiter.hit_sync("k", 10, now=75.0)[0] for _ in range(4)]
+    assert allowed == [True, True, True, False]
+    # Two windows later the old counts carry no weight
+    assert limiter.hit_sync("k", 10, now=185.0) == (True, 1)
+
+
+def test_memory_limiter_evicts_stale_and_excess_keys():
+    limiter = MemoryRateLimiter(window_seconds=60, max_keys=2)
+    limiter.hit_sync("a", 5, now=0.0)
+    limiter.hit_sync("b", 5, now=130.0)
+    assert len(limiter) == 1
+
+    limiter.hit_sync("c", 5, now=130.0)
+    limiter.hit_sync("d", 5, now=130.0)
+    assert len(limiter) == 2
+
+
+def test_middleware_applies_route_limits_separately():
+    app = FastAPI()
+
+    @app.get("/sensor-data")
+    async def sensor_route():
+        return {}
+
+    @app.get("/other")
+    async def other_route():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, requests_per_minute=1, route_limits={"/sensor-data": 3})
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            sensor = [(await client.get("/sensor-data")).status_code for _ in range(4)]
+            other = [(await client.get("/other")).status_code for _ in range(2)]
+            return sensor, other
+
+    sensor, other = asyncio.run(run())
+    assert sensor == [200, 200, 200, 429]
+    assert other == [200, 429]
+
+
+def test_rate_limit_maps_load_from_json_env(monkeypatch):
+    from api.core.settings import Settings
+
+    monkeypatch.setenv("RATE_LIMIT_ROLE_LIMITS", '{"editor": 5, "admin": 9}')
+
+    assert Settings().RATE_LIMIT_ROLE_LIMITS == {"editor": 5, "admin": 9}
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from services import sensor_ingest_service as ingest
+from services.sensor_ingest_service import SENSOR_COLUMNS, SensorIngestService, detect_format, parse_values_column
+
+
+def _write(path, header, rows):
+    pd.DataFrame(rows, columns=header).to_csv(path, index=False)
+
+
+def test_parse_values_column_rejects_wrong_length_and_text():
+    samples, valid = parse_values_column(pd.Series([
+        str([float(i) for i in range(11)]),
+        str(list(range(10))),
+        str(list(range(12))),
+        "[1, x, 3, 4, 5, 6, 7, 8, 9, 10, 11]",
+    ]))
+
+    assert valid.tolist() == [True, False, False, False]
+    assert samples[0].tolist() == [float(i) for i in range(11)]
+
+
+def test_iter_documents_groups_samples_per_session_and_label(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_SAMPLES_PER_DOCUMENT", 2)
+    path = tmp_path / "upload.csv"
+    header = ["session_id", "label", *SENSOR_COLUMNS]
+    _write(path, header, [
+        ["s1", "hello", *[1] * 11],
+        ["s2", "bye", *[2] * 11],
+        ["s1", "hello", *[3] * 11],
+        ["s1", "hello", *[4] * 11],
+        ["s1", "hello", *([5] * 10 + [None])],
+    ])
+    stats = {}
+
+    docs = list(SensorIngestService().iter_documents(path, "up1", "upload.csv", stats))
+
+    assert [(d["session_id"], d["gesture_label"], len(d["sensor_values"])) for d in docs] == [
+        ("s1", "hello", 2), ("s1", "hello", 1), ("s2", "bye", 1),
+    ]
+    assert docs[0]["sensor_values"][1] == [3.0] * 11
+    assert stats == {"rows_processed": 4, "rows_skipped": 1}
+
+
+def test_detect_format_requires_known_layout(tmp_path):
+    path = tmp_path / "bad.csv"
+    _write(path, ["session_id", "flex1"], [["s1", 1]])
+
+    with pytest.raises(ValueError):
+        detect_format(path)
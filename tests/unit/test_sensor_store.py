@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from services.sensor_store import as_datetime, samples_query, to_samples
+
+
+def test_to_samples_explodes_batches_with_shared_meta():
+    doc = {
+        "session_id": "s1",
+        "gesture_label": "hello",
+        "timestamp": "2025-06-27T12:00:00Z",
+        "sensor_values": [[0.1] * 11, [0.2] * 11],
+        "device_info": {"source": "USB", "device_id": "glove-01"},
+    }
+
+    samples = to_samples(doc)
+
+    assert [s["seq"] for s in samples] == [0, 1]
+    assert samples[1]["values"] == [0.2] * 11
+    assert samples[0]["timestamp"] == datetime(2025, 6, 27, 12, tzinfo=timezone.utc)
+    assert samples[0]["meta"] == {"session_id": "s1", "label": "hello", "source": "USB", "device_id": "glove-01"}
+
+
+def test_to_samples_reads_legacy_single_values_shape():
+    doc = {"session_id": "s2", "label": "bye", "values": [1] * 11, "timestamp_ms": 1_700_000_000_000}
+
+    samples = to_samples(doc, source_id="abc")
+
+    assert len(samples) == 1
+    assert samples[0]["meta"]["label"] == "bye"
+    assert samples[0]["source_id"] == "abc"
+    assert samples[0]["timestamp"] == as_datetime(1_700_000_000)
+
+
+def test_samples_query_targets_meta_fields():
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    assert samples_query(session_id="s1", label="hello", start=start) == {
+        "meta.session_id": "s1",
+        "meta.label": "hello",
+        "timestamp": {"$gte": start},
+    }
+
+
+def test_to_samples_keeps_upload_id_in_meta():
+    doc = {"session_id": "s3", "label": "hi", "values": [1] * 11, "upload_id": "job-1", "source": "csv_upload"}
+
+    samples = to_samples(doc)
+
+    assert samples[0]["meta"]["upload_id"] == "job-1"
+    assert "upload_id" not in to_samples({"values": [1] * 11})[0]["meta"]
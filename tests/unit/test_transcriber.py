@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import numpy as np
+
+import services.voice.transcriber as transcriber_module
+from services.voice.transcriber import Transcriber
+
+
+class FakeWhisper:
+    def __init__(self):
+        self.loads = 0
+        self.release = threading.Event()
+
+    def load_model(self, name):
+        self.loads += 1
+        whisper = self
+
+        class Model:
+            def transcribe(self, audio):
+                whisper.release.wait(1)
+                return {"text": f" {name} "}
+
+        return Model()
+
+
+def _patch(monkeypatch, whisper):
+    monkeypatch.setattr(transcriber_module, "HAS_SPEECH_RECOGNITION", False)
+    monkeypatch.setattr(transcriber_module, "HAS_WHISPER", True)
+    monkeypatch.setattr(transcriber_module, "optional_import", lambda name: whisper)
+
+
+def test_model_loads_once_and_queue_is_bounded(monkeypatch):
+    whisper = FakeWhisper()
+    _patch(monkeypatch, whisper)
+    transcriber = Transcriber(model_name="tiny", workers=2, max_queue=1, idle_unload_seconds=0)
+    audio = np.zeros(1600, dtype=np.float32)
+
+    async def run():
+        tasks = [asyncio.create_task(transcriber.transcribe(audio)) for _ in range(3)]
+        await asyncio.sleep(0)
+        busy = await transcriber.transcribe(audio)
+        whisper.release.set()
+        return busy, await asyncio.gather(*tasks)
+
+    assert not transcriber.model_loaded
+    busy, results = asyncio.run(run())
+    assert busy == {"status": "busy"}
+    assert all(r["text"] == "tiny" and r["recognition_service"] == "whisper" for r in results)
+    assert whisper.loads == 1
+    assert transcriber.get_status()["dropped"] == 1
+
+
+def test_idle_model_is_unloaded(monkeypatch):
+    whisper = FakeWhisper()
+    whisper.release.set()
+    _patch(monkeypatch, whisper)
+    transcriber = Transcriber(idle_unload_seconds=0.05)
+
+    async def run():
+        await transcriber.transcribe(np.zeros(160, dtype=np.float32))
+        assert transcriber.model_loaded
+        await asyncio.wait_for(transcriber._idle_task, timeout=5)
+
+    asyncio.run(run())
+    assert not transcriber.model_loaded
+
+
+def test_whisper_receives_16khz_audio(monkeypatch):
+    received = []
+
+    class RecordingWhisper:
+        def load_model(self, name):
+            class Model:
+                def transcribe(self, audio):
+                    received.append(audio)
+                    return {"text": "hello"}
+
+            return Model()
+
+    _patch(monkeypatch, RecordingWhisper())
+    transcriber = Transcriber(idle_unload_seconds=0)
+    # Half a second of 440 Hz at a browser's 48 kHz
+    tone = np.sin(2 * np.pi * 440 * np.arange(24000) / 48000).astype(np.float32)
+
+    assert asyncio.run(transcriber.transcribe(tone, sample_rate=48000))["text"] == "hello"
+    asyncio.run(transcriber.transcribe(tone[:8000], sample_rate=16000))
+
+    resampled, unchanged = received
+    assert resampled.dtype == np.float32 and len(resampled) == 8000
+    assert np.argmax(np.abs(np.fft.rfft(resampled))) * 16000 / len(resampled) == 440
+    assert np.array_equal(unchanged, tone[:8000])
@@ -0,0 +1,174 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import api.routes.auth_routes as auth_routes
+import services.tts_service as tts_module
+from api.core.settings import settings
+from services.tts_cache import TTSCache, cache_key
+from services.tts_service import TTSService
+
+
+def test_memory_and_disk_lru_eviction(tmp_path):
+    cache = TTSCache(str(tmp_path), max_disk_bytes=250, max_memory_bytes=150)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.get("a") == b"a" * 100  # memory: "b" evicted, disk: "a" now most recent
+    cache.put("c", b"c" * 100)
+
+    assert not os.path.exists(cache.path("b"))
+    assert os.path.exists(cache.path("a")) and os.path.exists(cache.path("c"))
+    stats = cache.stats()
+    assert stats["disk_bytes"] == 200 and stats["disk_evictions"] == 1
+    assert stats["memory_bytes"] <= 150
+
+    # Disk index survives a restart; reads promote into memory
+    reopened = TTSCache(str(tmp_path), max_disk_bytes=250, max_memory_bytes=150)
+    assert reopened.get("c") == b"c" * 100
+    assert reopened.get("b") is None
+    assert reopened.stats()["disk_hits"] == 1 and reopened.stats()["misses"] == 1
+
+
+def test_warmup_synthesizes_each_phrase_once_then_serves_from_memory(tmp_path, monkeypatch):
+    calls = []
+
+    class FakeGTTS:
+        def __init__(self, text, lang):
+            self.text = text
+
+        def save(self, path):
+            calls.append(self.text)
+            with open(path, "wb") as f:
+                f.write(self.text.encode())
+
+    class FakeModule:
+        gTTS = FakeGTTS
+
+    monkeypatch.setattr(settings, "TTS_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_PROVIDER", "gtts")
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(tts_module, "HAS_GTTS", True)
+    monkeypatch.setattr(tts_module, "optional_import", lambda name: FakeModule)
+    service = TTSService()
+
+    status = asyncio.run(service.warmup())
+    phrases = service.warmup_phrases()
+    assert status["state"] == "done" and status["failed"] == 0
+    assert sorted(calls) == sorted(text for text, _, _ in phrases)
+
+    audio = asyncio.run(service.get_audio("Hello"))
+    assert audio == b"Hello"
+    assert len(calls) == len(phrases)
+    assert service.get_cache_stats()["memory_hits"] >= 1
+    assert os.path.exists(service.get_cache_path("Hello", tts_module.GTTS_LANG))
+    assert service.cache.get(cache_key("Hello", tts_module.GTTS_LANG)) == b"Hello"
+    service.cleanup()
+
+
+def test_stream_yields_provider_chunks_and_caches_only_complete_streams(tmp_path, monkeypatch):
+    streams = []
+
+    class FakeCommunicate:
+        def __init__(self, text, voice):
+            self.text = text
+
+        async def stream(self):
+            streams.append(self.text)
+            for part in (b"one-", b"two-", b"three"):
+                yield {"type": "audio", "data": part}
+            yield {"type": "WordBoundary", "offset": 0}
+
+    class FakeModule:
+        Communicate = FakeCommunicate
+
+    monkeypatch.setattr(settings, "TTS_PROVIDER", "edge")
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(tts_module, "HAS_EDGE_TTS", True)
+    monkeypatch.setattr(tts_module, "optional_import", lambda name: FakeModule)
+    service = TTSService()
+
+    async def collect(text, limit=None):
+        chunks = []
+        stream = service.stream_audio(text, "test-voice")
+        async for chunk in stream:
+            chunks.append(chunk)
+            if limit and len(chunks) == limit:
+                await stream.aclose()
+                break
+        return chunks
+
+    assert asyncio.run(collect("Hello")) == [b"one-", b"two-", b"three"]
+    assert service.cache.get(cache_key("Hello", "test-voice")) == b"one-two-three"
+    assert asyncio.run(collect("Hello")) == [b"one-two-three"]
+    assert streams == ["Hello"]
+
+    asyncio.run(collect("Bye", limit=1))
+    assert service.text_cache.get(cache_key("Bye", "test-voice")) is None
+    service.cleanup()
+
+
+def test_free_text_is_cached_apart_from_gesture_phrases(tmp_path, monkeypatch):
+    class FakeCommunicate:
+        def __init__(self, text, voice):
+            self.text = text
+
+        async def stream(self):
+            yield {"type": "audio", "data": self.text.encode() * 10}
+
+    class FakeModule:
+        Communicate = FakeCommunicate
+
+    monkeypatch.setattr(settings, "TTS_PROVIDER", "edge")
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TTS_TEXT_CACHE_MAX_BYTES", 200)
+    monkeypatch.setattr(settings, "TTS_TEXT_CACHE_MEMORY_BYTES", 100)
+    monkeypatch.setattr(tts_module, "HAS_EDGE_TTS", True)
+    monkeypatch.setattr(tts_module, "optional_import", lambda name: FakeModule)
+    service = TTSService()
+
+    async def speak(text):
+        return [chunk async for chunk in service.stream_audio(text, "v")]
+
+    asyncio.run(speak("Hello"))
+    for i in range(20):
+        asyncio.run(speak(f"free text {i}"))
+
+    assert service.cache.get(cache_key("Hello", "v")) == b"Hello" * 10
+    assert service.cache.get(cache_key("free text 19", "v")) is None
+    assert service.text_cache.get(cache_key("free text 19", "v")) == b"free text 19" * 10
+    stats = service.get_cache_stats()
+    assert stats["text_tier"]["disk_bytes"] <= 200 and stats["text_tier"]["disk_evictions"] > 0
+    service.cleanup()
+
+
+def test_tts_websocket_requires_authentication(monkeypatch):
+    from api.routes.utils_routes import router
+
+    async def user_by_email(email):
+        return auth_routes.User(email=email, role="guest")
+
+    monkeypatch.setattr(auth_routes, "_cached_user_by_email", user_by_email)
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    for url in ("/utils/tts/ws", "/utils/tts/ws?token=not-a-jwt"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url):
+                pass
+        assert closed.value.code == 1008
+
+    token = auth_routes.create_access_token({"sub": "user@example.com"})
+    with client.websocket_connect(f"/utils/tts/ws?token={token}") as ws:
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+    with client.websocket_connect("/utils/tts/ws", headers={"Authorization": f"Bearer {token}"}) as ws:
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
@@ -0,0 +1,98 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes.voice_routes import router as voice_router
+from services.voice.vad import FRAME_MS, UtteranceSegmenter, parse_sample_rate, pcm16_to_float
+from services.voice.voice_service import VoiceService
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=0.3, freq=220.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _silence(seconds, amplitude=0.001, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(RATE * seconds)) * amplitude).astype(np.float32)
+
+
+def test_pcm16_to_float():
+    data = np.array([0, 16384, -32768], dtype="<i2").tobytes() + b"\x01"
+    assert pcm16_to_float(data).tolist() == [0.0, 0.5, -1.0]
+
+
+def test_segments_one_utterance_from_small_frames():
+    audio = np.concatenate([_silence(0.5), _tone(1.0), _silence(1.0, seed=1)])
+    segmenter = UtteranceSegmenter(RATE)
+    segments = []
+    for start in range(0, len(audio), 320):  # 20 ms frames, not aligned with the VAD frame
+        segments += segmenter.push(audio[start:start + 320])
+
+    assert len(segments) == 1
+    # Speech plus pre-roll, without the trailing hangover silence
+    assert 1.0 <= len(segments[0]) / RATE < 1.5
+    assert not segmenter.in_speech
+
+
+def test_short_blips_are_dropped():
+    segmenter = UtteranceSegmenter(RATE)
+    blip = _tone(FRAME_MS * 5 / 1000)
+    assert segmenter.push(np.concatenate([_silence(0.3), blip, _silence(1.0)])) == []
+
+
+class FakeTranscriber:
+    enabled = True
+
+    def __init__(self):
+        self.calls = []
+
+    async def transcribe(self, audio, sample_rate=16000):
+        self.calls.append(len(audio))
+        return {}
+
+    def get_status(self):
+        return {}
+
+
+def test_voice_service_transcribes_once_per_utterance():
+    transcriber = FakeTranscriber()
+    service = VoiceService(transcriber=transcriber)
+    audio = np.concatenate([_silence(0.3), _tone(0.8), _silence(0.8, seed=2), _tone(0.6), _silence(0.8, seed=3)])
+
+    async def run():
+        session_id = service.create_session(session_type="test")
+        for start in range(0, len(audio), 512):
+            await service.handle_audio_frame(session_id, audio[start:start + 512], RATE)
+        await asyncio.gather(*service._tasks)
+        return service.sessions[session_id]
+
+    session = asyncio.run(run())
+    assert session["audio_chunks_received"] > 50
+    assert session["utterances"] == 2
+    assert len(transcriber.calls) == 2
+
+
+def test_parse_sample_rate_rejects_out_of_range_values():
+    assert parse_sample_rate("44100") == 44100
+    for value in (0, 7999, 48001, 10**9, "fast", None):
+        with pytest.raises(ValueError):
+            parse_sample_rate(value)
+
+
+def test_voice_websocket_answers_invalid_sample_rate_with_error_frame():
+    app = FastAPI()
+    app.include_router(voice_router)
+
+    with TestClient(app).websocket_connect("/api/voice/voice") as ws:
+        assert ws.receive_json()["type"] == "connection_established"
+        ws.send_json({"type": "config", "sample_rate": 0})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "voice_data", "audio_data": [0] * 160, "sample_rate": 10**9})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "config", "sample_rate": 8000})
+        assert ws.receive_json() == {"type": "config_ack", "sample_rate": 8000}
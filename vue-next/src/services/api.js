@@ -168,6 +168,7 @@ export default {
       })
     },
     getJob: (jobId) => api.get(`/fusion-preprocess/jobs/${jobId}`),
+    cancelJob: (jobId) => api.post(`/fusion-preprocess/jobs/${jobId}/cancel`),
     saveJobOutput: (jobId, payload = {}) => api.post(`/fusion-preprocess/jobs/${jobId}/save`, payload)
   },
 
@@ -206,8 +207,12 @@ export default {
         api.get('/admin/csv-library/insights'),
       getFullData: (name) =>
         api.get(`/admin/csv-library/files/${name}/full-data`),
+      fusionOffset: (payload) =>
+        api.post('/admin/csv-library/fusion-offset', payload),
       fusionExport: (payload) =>
-        api.post('/admin/csv-library/fusion-export', payload)
+        api.post('/admin/csv-library/fusion-export', payload),
+      getJob: (jobId) =>
+        api.get(`/admin/csv-library/jobs/${jobId}`)
     }
   },
 
@@ -1,28 +1,89 @@
 from __future__ import annotations
 
 import csv
+import functools
 import io
 import json
 import logging
+import multiprocessing
 import os
-import tempfile
+import shutil
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from uuid import uuid4
 
 import cv2
 import numpy as np
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
+try:
+    import fcntl
+except ImportError:  # Windows: no owner locks, see _owner_alive
+    fcntl = None
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
 logger = logging.getLogger("worker-fusion-preprocess")
 
 JOB_DIR = Path(os.getenv("FUSION_PREPROCESS_JOB_DIR", "/app/data/fusion_preprocess_jobs")).resolve()
 JOB_DIR.mkdir(parents=True, exist_ok=True)
-
-app = FastAPI(title="SilentVoix Fusion Preprocess Worker", version="1.0")
+UPLOAD_DIR = JOB_DIR / "uploads"
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Several worker processes may share JOB_DIR. Each holds an exclusive lock on
+# OWNER_DIR/<OWNER_ID>.lock while alive and stamps its jobs with OWNER_ID, so a starting
+# process only fails the jobs (and removes the uploads) of owners that are gone.
+OWNER_DIR = JOB_DIR / "owners"
+OWNER_DIR.mkdir(parents=True, exist_ok=True)
+OWNER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+# Uploads and lock files younger than this may belong to a process that is still starting
+# or spooling, and are left alone by the startup cleanup
+ORPHAN_GRACE_SECONDS = 60
+
+# Analyses run concurrently in the pool; beyond MAX_QUEUED waiting jobs, new ones get 429
+MAX_WORKERS = max(int(os.getenv("FUSION_PREPROCESS_WORKERS", "2")), 1)
+MAX_QUEUED = max(int(os.getenv("FUSION_PREPROCESS_MAX_QUEUED", "32")), 0)
+TERMINAL_STATES = {"completed", "failed", "cancelled"}
+
+# Video motion analysis. "full" diffs every frame at source resolution; "fast" samples
+# ~VIDEO_ANALYSIS_FPS frames per second (the rest are grab()bed, not retrieved) downscaled
+# to VIDEO_ANALYSIS_WIDTH. With VIDEO_PROCESSES > 1, long videos are split into segments analysed
+# in separate processes.
+VIDEO_MODE = os.getenv("FUSION_PREPROCESS_VIDEO_MODE", "full").strip().lower()
+VIDEO_ANALYSIS_FPS = float(os.getenv("FUSION_PREPROCESS_VIDEO_FPS", "15"))
+VIDEO_ANALYSIS_WIDTH = int(os.getenv("FUSION_PREPROCESS_VIDEO_WIDTH", "320"))
+VIDEO_PROCESSES = max(int(os.getenv("FUSION_PREPROCESS_VIDEO_PROCESSES", "1")), 1)
+# Shorter segments cost more in process start-up and seeking than they save
+MIN_SEGMENT_FRAMES = 300
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="preprocess")
+# job_id -> (future, cancel flag) for jobs this process has not finished
+_active: Dict[str, tuple[Future, threading.Event]] = {}
+_active_lock = threading.Lock()
+_state_lock = threading.Lock()
+_owner_lock: Optional[Any] = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _claim_owner()
+    _fail_interrupted_jobs()
+    yield
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _release_owner()
+
+
+app = FastAPI(title="SilentVoix Fusion Preprocess Worker", version="1.0", lifespan=lifespan)
 
 
 class AnalyzeOptions(BaseModel):
@@ -166,15 +227,146 @@ def _evaluate_status(max_abs_delta_ms: Optional[float], sensor_match_ratio: floa
     return status, reasons
 
 
-def _analyze_video(video_bytes: bytes, filename: str) -> Dict[str, Any]:
-    suffix = Path(filename or "capture.webm").suffix or ".webm"
-    tmp_path: Optional[Path] = None
+def _motion_frame(frame: np.ndarray, width: int) -> np.ndarray:
+    if width and frame.shape[1] > width:
+        height = max(round(frame.shape[0] * width / frame.shape[1]), 1)
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # INTER_AREA already averages; a 5x5 kernel here would smooth far more than at source size
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.GaussianBlur(gray, (5, 5), 0)
+
+
+def _motion_scores(
+    capture: Any,
+    start: int,
+    stop: Optional[int],
+    step: int,
+    width: int,
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[list[float], list[int], int]:
+    """
+    (scores, frame indices, frames read) for source frames [start, stop), every `step`-th
+    frame analysed. A score is the mean absolute difference to the previous analysed frame.
+    It is not divided by `step`: a cut or jerk that happens between two source frames shows
+    up in full in the sampled pair, and dividing would shrink it below the spike threshold.
+    """
+    scores: list[float] = []
+    indices: list[int] = []
+    prev_gray: Optional[np.ndarray] = None
+    frames_read = 0
+    frame_index = start
+    while stop is None or frame_index < stop:
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled()
+        analysed = (frame_index - start) % step == 0
+        if analysed:
+            ok, frame = capture.read()
+        else:
+            ok, frame = capture.grab(), None
+        if not ok:
+            break
+        frames_read += 1
+        if progress is not None and frames_read % 30 == 0:
+            progress(frames_read)
+        if analysed:
+            gray = _motion_frame(frame, width)
+            if prev_gray is not None:
+                scores.append(float(np.mean(cv2.absdiff(gray, prev_gray))))
+                indices.append(frame_index)
+            prev_gray = gray
+        frame_index += 1
+    return scores, indices, frames_read
+
+
+def _segment_motion(video_path: str, start: int, stop: int, step: int, width: int) -> tuple[list[float], list[int], int]:
+    """_motion_scores for one segment, in a separate process."""
+    capture = cv2.VideoCapture(video_path)
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(video_bytes)
-            tmp_path = Path(tmp.name)
+        if start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        return _motion_scores(capture, start, stop, step, width)
+    finally:
+        capture.release()
 
-        capture = cv2.VideoCapture(str(tmp_path))
+
+def _terminate_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops queued segments and kills running ones instead of letting them finish."""
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+def _parallel_motion_scores(
+    video_path: Path,
+    frame_count: int,
+    step: int,
+    width: int,
+    processes: int,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[list[float], list[int], int]:
+    # Boundaries fall on analysed frames; each later segment starts one analysed frame early
+    # so the pair spanning the boundary is scored exactly once
+    size = -(-frame_count // processes)
+    size += -size % step
+    bounds = list(range(0, frame_count, size)) + [frame_count]
+    segments = [
+        (bounds[i] - step if i else 0, bounds[i + 1])
+        for i in range(len(bounds) - 1)
+    ]
+    results: Dict[int, tuple[list[float], list[int], int]] = {}
+    # spawn: forking this threaded server (and OpenCV's own threads) can deadlock children.
+    # Not a `with` block: its exit waits for every segment to decode to the end.
+    pool = ProcessPoolExecutor(max_workers=len(segments), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {
+            pool.submit(_segment_motion, str(video_path), seg_start, seg_stop, step, width): i
+            for i, (seg_start, seg_stop) in enumerate(segments)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            if cancel is not None and cancel.is_set():
+                raise JobCancelled()
+            for future in done:
+                results[futures[future]] = future.result()
+            if progress is not None and done:
+                progress(len(results) / len(segments))
+    except BaseException:
+        _terminate_pool(pool)
+        raise
+    pool.shutdown()
+
+    scores: list[float] = []
+    indices: list[int] = []
+    frames_read = 0
+    for i in range(len(segments)):
+        seg_scores, seg_indices, seg_frames = results[i]
+        scores.extend(seg_scores)
+        indices.extend(seg_indices)
+        frames_read += seg_frames - (step if i else 0)
+    return scores, indices, max(frames_read, 0)
+
+
+def _analyze_video(
+    video_path: Path,
+    filename: str,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Motion summary of a video file; `progress` receives the fraction of frames read.
+    `mode` ("full" or "fast") defaults to VIDEO_MODE.
+    """
+    capture = cv2.VideoCapture(str(video_path))
+    try:
         if not capture.isOpened():
             raise HTTPException(status_code=400, detail="OpenCV could not open the uploaded video.")
 
@@ -185,27 +377,35 @@ def _analyze_video(video_bytes: bytes, filename: str) -> Dict[str, Any]:
         width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
         height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
 
-        motion_scores: list[float] = []
-        prev_gray: Optional[np.ndarray] = None
-        frames_read = 0
-
-        while True:
-            ok, frame = capture.read()
-            if not ok:
-                break
-            frames_read += 1
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (5, 5), 0)
-            if prev_gray is None:
-                prev_gray = gray
-                continue
-            diff = cv2.absdiff(gray, prev_gray)
-            motion_scores.append(float(np.mean(diff)))
-            prev_gray = gray
-
-        capture.release()
+        fast = (mode or VIDEO_MODE) == "fast"
+        step = max(round(fps / VIDEO_ANALYSIS_FPS), 1) if fast and VIDEO_ANALYSIS_FPS > 0 else 1
+        analysis_width = VIDEO_ANALYSIS_WIDTH if fast else 0
+        # Container frame counts can be missing (0) or estimates; only split when known
+        processes = min(VIDEO_PROCESSES, frame_count // MIN_SEGMENT_FRAMES) if frame_count > 0 else 1
+        analysis = {
+            "mode": "fast" if fast else "full",
+            "frame_step": step,
+            "analysis_width": analysis_width or width,
+            "processes": max(processes, 1),
+        }
 
-        if frames_read <= 1:
+        if processes > 1:
+            capture.release()
+            motion_scores, motion_indices, frames_read = _parallel_motion_scores(
+                video_path, frame_count, step, analysis_width, processes, progress=progress, cancel=cancel
+            )
+        else:
+            motion_scores, motion_indices, frames_read = _motion_scores(
+                capture,
+                0,
+                None,
+                step,
+                analysis_width,
+                progress=(lambda read: progress(min(read / frame_count, 1.0))) if progress and frame_count > 0 else None,
+                cancel=cancel,
+            )
+
+        if frames_read <= 1 or not motion_scores:
             return {
                 "provided": True,
                 "filename": filename,
@@ -220,6 +420,7 @@ def _analyze_video(video_bytes: bytes, filename: str) -> Dict[str, Any]:
                 "spike_detected": False,
                 "peak_frame_index": None,
                 "peak_time_ms": None,
+                "analysis": analysis,
                 "reasons": ["video has too few frames for OpenCV motion analysis"],
             }
 
@@ -227,7 +428,7 @@ def _analyze_video(video_bytes: bytes, filename: str) -> Dict[str, Any]:
         motion_mean = float(np.mean(motion_array))
         motion_std = float(np.std(motion_array))
         motion_peak = float(np.max(motion_array))
-        peak_index = int(np.argmax(motion_array)) + 1
+        peak_index = motion_indices[int(np.argmax(motion_array))]
         dynamic_threshold = max(6.0, motion_mean + (2.0 * motion_std))
         spike_detected = bool(motion_peak >= dynamic_threshold)
         reasons = []
@@ -251,18 +452,28 @@ def _analyze_video(video_bytes: bytes, filename: str) -> Dict[str, Any]:
             "spike_detected": spike_detected,
             "peak_frame_index": peak_index,
             "peak_time_ms": round((peak_index / fps) * 1000) if fps > 0 else None,
+            "analysis": analysis,
             "reasons": reasons,
         }
     finally:
-        if tmp_path and tmp_path.exists():
-            try:
-                tmp_path.unlink()
-            except OSError:
-                logger.warning("Failed to remove temp video file %s", tmp_path)
+        capture.release()
 
 
-def _analyze(req: AnalyzeRequest, video_bytes: Optional[bytes] = None, video_name: Optional[str] = None) -> Dict[str, Any]:
+def _analyze(
+    req: AnalyzeRequest,
+    video_path: Optional[Path] = None,
+    video_name: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    def _step(percent: int) -> None:
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            progress(percent)
+
     header, rows = _read_csv(req.csv_text)
+    _step(10)
     schema_id = _infer_schema_id(header)
     ts_key = _first_present(header, "timestamp_ms", "timestamp")
     delta_key = _first_present(header, "sensor_match_delta_ms")
@@ -313,9 +524,16 @@ def _analyze(req: AnalyzeRequest, video_bytes: Optional[bytes] = None, video_nam
         sensor_match_ratio,
         missing_frame_ratio,
     )
+    _step(30)
     opencv_summary = None
-    if video_bytes:
-        opencv_summary = _analyze_video(video_bytes, video_name or "capture.webm")
+    if video_path is not None:
+        opencv_summary = _analyze_video(
+            video_path,
+            video_name or "capture.webm",
+            progress=(lambda fraction: progress(30 + int(65 * fraction))) if progress else None,
+            cancel=cancel,
+        )
+        _step(95)
         if not opencv_summary.get("spike_detected"):
             if status == "pass":
                 status = "warning"
@@ -372,7 +590,10 @@ def _analyze(req: AnalyzeRequest, video_bytes: Optional[bytes] = None, video_nam
 
 
 def _save_job(job_id: str, payload: Dict[str, Any]) -> None:
-    _job_path(job_id).write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
+    path = _job_path(job_id)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
 
 
 def _load_job(job_id: str) -> Dict[str, Any]:
@@ -382,34 +603,182 @@ def _load_job(job_id: str) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _update_job(job_id: str, **fields: Any) -> Dict[str, Any]:
+    """Read-modify-write of a job file; terminal states are never overwritten."""
+    with _state_lock:
+        job = _load_job(job_id)
+        if job.get("status") in TERMINAL_STATES:
+            return job
+        job.update(fields)
+        _save_job(job_id, job)
+        return job
+
+
+def _claim_owner() -> None:
+    global _owner_lock
+    _owner_lock = (OWNER_DIR / f"{OWNER_ID}.lock").open("w")
+    if fcntl is not None:
+        fcntl.flock(_owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _release_owner() -> None:
+    global _owner_lock
+    if _owner_lock is not None:
+        (OWNER_DIR / f"{OWNER_ID}.lock").unlink(missing_ok=True)
+        _owner_lock.close()
+        _owner_lock = None
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the process that queued a job still runs. Without fcntl only this process counts."""
+    if owner == OWNER_ID:
+        return True
+    if not owner or fcntl is None:
+        return False
+    try:
+        handle = (OWNER_DIR / f"{owner}.lock").open("r")
+    except FileNotFoundError:
+        return False
+    with handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def _is_stale(path: Path) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime > ORPHAN_GRACE_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def _remove_upload(video_path: Optional[Path]) -> None:
+    if video_path is None:
+        return
+    try:
+        video_path.unlink(missing_ok=True)
+    except OSError:
+        logger.warning("Failed to remove uploaded video file %s", video_path)
+
+
+def _fail_interrupted_jobs() -> None:
+    """
+    Jobs left queued/running by a process that is gone will never finish: mark them
+    failed and remove their uploads. Jobs of live processes sharing JOB_DIR are kept.
+    """
+    live_jobs = set()
+    for path in JOB_DIR.glob("*.json"):
+        try:
+            job = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if job.get("status") not in ("queued", "running"):
+            continue
+        if _owner_alive(job.get("owner")):
+            live_jobs.add(path.stem)
+            continue
+        job.update(status="failed", error="Interrupted by a worker restart.", completed_at=_utc_now())
+        _save_job(path.stem, job)
+        logger.info("Marked interrupted fusion preprocess job %s as failed", path.stem)
+    for path in UPLOAD_DIR.iterdir():
+        # Named <job_id><suffix>; a fresh one without a job file is still being spooled
+        if path.stem not in live_jobs and (_job_path(path.stem).exists() or _is_stale(path)):
+            _remove_upload(path)
+    for path in OWNER_DIR.glob("*.lock"):
+        if path.stem != OWNER_ID and _is_stale(path) and not _owner_alive(path.stem):
+            path.unlink(missing_ok=True)
+
+
+def _run_job(job_id: str, req: AnalyzeRequest, video_path: Optional[Path], video_name: Optional[str], cancel: threading.Event) -> None:
+    last_reported = 0
+
+    def _progress(percent: int) -> None:
+        nonlocal last_reported
+        if percent - last_reported >= 5:
+            last_reported = percent
+            _update_job(job_id, progress=percent)
+
+    try:
+        if cancel.is_set():
+            raise JobCancelled()
+        _update_job(job_id, status="running", started_at=_utc_now())
+        logger.info("Running fusion preprocess job %s for %s", job_id, req.source_file)
+        result = _analyze(req, video_path=video_path, video_name=video_name, progress=_progress, cancel=cancel)
+        _update_job(job_id, status="completed", progress=100, completed_at=_utc_now(), result=result)
+    except JobCancelled:
+        _update_job(job_id, status="cancelled", completed_at=_utc_now())
+        logger.info("Fusion preprocess job %s cancelled", job_id)
+    except HTTPException as exc:
+        _update_job(job_id, status="failed", completed_at=_utc_now(), error=str(exc.detail))
+    except Exception as exc:
+        logger.exception("Fusion preprocess job %s failed", job_id)
+        _update_job(job_id, status="failed", completed_at=_utc_now(), error=str(exc))
+    finally:
+        _remove_upload(video_path)
+        with _active_lock:
+            _active.pop(job_id, None)
+
+
+def _discard_cancelled(job_id: str, video_path: Optional[Path], future: Future) -> None:
+    """Done callback: a job cancelled before it started never reaches _run_job's cleanup."""
+    if not future.cancelled():
+        return
+    _remove_upload(video_path)
+    with _active_lock:
+        _active.pop(job_id, None)
+
+
+def _submit_job(job_id: str, req: AnalyzeRequest, video_path: Optional[Path] = None, video_name: Optional[str] = None) -> Dict[str, Any]:
+    with _active_lock:
+        if len(_active) >= MAX_WORKERS + MAX_QUEUED:
+            _remove_upload(video_path)
+            raise HTTPException(status_code=429, detail="Fusion preprocess queue is full; retry later.")
+        payload = {
+            "job_id": job_id,
+            "owner": OWNER_ID,
+            "status": "queued",
+            "progress": 0,
+            "source_file": req.source_file,
+            "created_at": _utc_now(),
+            "started_at": None,
+            "completed_at": None,
+            "error": None,
+            "result": None,
+        }
+        _save_job(job_id, payload)
+        cancel = threading.Event()
+        future = _executor.submit(_run_job, job_id, req, video_path, video_name, cancel)
+        future.add_done_callback(functools.partial(_discard_cancelled, job_id, video_path))
+        _active[job_id] = (future, cancel)
+    logger.info("Queued fusion preprocess job %s for %s", job_id, req.source_file)
+    return payload
+
+
 @app.get("/health")
 def health() -> Dict[str, Any]:
+    with _active_lock:
+        running = sum(1 for future, _ in _active.values() if future.running())
+        pending = len(_active)
     return {
         "status": "ok",
         "service": "worker-fusion-preprocess",
         "version": "1.0",
         "job_dir": str(JOB_DIR),
+        "workers": MAX_WORKERS,
+        "running_jobs": running,
+        "queued_jobs": pending - running,
+        "max_queued": MAX_QUEUED,
     }
 
 
-@app.post("/v1/jobs/analyze")
+@app.post("/v1/jobs/analyze", status_code=202)
 def create_analyze_job(req: AnalyzeRequest) -> Dict[str, Any]:
-    job_id = str(uuid4())
-    created_at = _utc_now()
-    logger.info("Starting fusion preprocess job %s for %s", job_id, req.source_file)
-    result = _analyze(req)
-    payload = {
-        "job_id": job_id,
-        "status": "completed",
-        "created_at": created_at,
-        "completed_at": _utc_now(),
-        "result": result,
-    }
-    _save_job(job_id, payload)
-    return payload
+    return _submit_job(str(uuid4()), req)
 
 
-@app.post("/v1/jobs/analyze-upload")
+@app.post("/v1/jobs/analyze-upload", status_code=202)
 async def create_analyze_upload_job(
     source_file: str = Form(...),
     trim_start_ms: Optional[int] = Form(None),
@@ -422,7 +791,6 @@ async def create_analyze_upload_job(
     video_file: Optional[UploadFile] = File(None),
 ) -> Dict[str, Any]:
     csv_text = (await csv_file.read()).decode("utf-8", errors="ignore")
-    video_bytes = await video_file.read() if video_file else None
     req = AnalyzeRequest(
         source_file=source_file,
         csv_text=csv_text,
@@ -437,20 +805,51 @@ async def create_analyze_upload_job(
     )
 
     job_id = str(uuid4())
-    created_at = _utc_now()
-    logger.info("Starting fusion preprocess upload job %s for %s", job_id, source_file)
-    result = _analyze(req, video_bytes=video_bytes, video_name=video_file.filename if video_file else None)
-    payload = {
-        "job_id": job_id,
-        "status": "completed",
-        "created_at": created_at,
-        "completed_at": _utc_now(),
-        "result": result,
-    }
-    _save_job(job_id, payload)
-    return payload
+    video_path: Optional[Path] = None
+    if video_file:
+        # Spooled to disk for the job; the request ends as soon as it is queued
+        suffix = Path(video_file.filename or "capture.webm").suffix or ".webm"
+        video_path = UPLOAD_DIR / f"{job_id}{suffix}"
+        with video_path.open("wb") as target:
+            await run_in_threadpool(shutil.copyfileobj, video_file.file, target, 1 << 20)
+        if video_path.stat().st_size == 0:
+            video_path.unlink()
+            video_path = None
+    return _submit_job(job_id, req, video_path=video_path, video_name=video_file.filename if video_file else None)
 
 
 @app.get("/v1/jobs/{job_id}")
 def get_job(job_id: str) -> Dict[str, Any]:
     return _load_job(job_id)
+
+
+@app.post("/v1/jobs/{job_id}/cancel")
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Queued jobs are dropped at once; running ones stop at their next progress check."""
+    job = _load_job(job_id)
+    if job.get("status") in TERMINAL_STATES:
+        raise HTTPException(status_code=409, detail=f"Preprocess job already {job['status']}: {job_id}")
+    with _active_lock:
+        entry = _active.get(job_id)
+    if entry is not None:
+        future, cancel = entry
+        cancel.set()
+        if not future.cancel():
+            # Running: _run_job records the cancellation when the analysis notices it
+            return _update_job(job_id, cancel_requested=True)
+        # Never started: _discard_cancelled has removed the upload
+    return _update_job(job_id, status="cancelled", completed_at=_utc_now())
+
+
+if __name__ == "__main__":
+    # python app.py <video>: times "full" against the configured mode on one file
+    import sys
+
+    for mode in dict.fromkeys(("full", VIDEO_MODE)):
+        started = time.perf_counter()
+        summary = _analyze_video(Path(sys.argv[1]), Path(sys.argv[1]).name, mode=mode)
+        print(
+            f"{mode:>5}: {time.perf_counter() - started:6.2f}s "
+            f"peak={summary['motion_peak']} threshold={summary.get('motion_threshold')} "
+            f"peak_time_ms={summary['peak_time_ms']} spike={summary['spike_detected']} {summary['analysis']}"
+        )
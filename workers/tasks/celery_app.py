@@ -14,7 +14,7 @@ celery_app = Celery(
     "signglove_v3",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["workers.tasks.dataset_tasks"]
+    include=["workers.tasks.dataset_tasks", "workers.tasks.sensor_tasks", "workers.tasks.tts_tasks"]
 )
 
 # Optional configuration
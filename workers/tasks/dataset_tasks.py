@@ -3,7 +3,9 @@ import csv
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
+from celery import chord, group
 from celery.utils.log import get_task_logger
+from sqlalchemy import update
 
 from workers.tasks.celery_app import celery_app
 # We need to import the helper functions or duplicate them for the worker.
@@ -16,6 +18,10 @@ from db.models import JobRecord
 
 logger = get_task_logger(__name__)
 
+# Files per chunk task in a library scan, and the progress range the chunks cover
+LIBRARY_SCAN_CHUNK_FILES = 20
+LIBRARY_SCAN_PROGRESS = (10, 90)
+
 def _update_job_status(job_id: str, status: str, progress: int = None, error: str = None, result_location: str = None, finished: bool = False):
     """Helper to update JobRecord in Postgres."""
     with get_sync_db() as db:
@@ -42,6 +48,59 @@ def _get_job(job_id: str) -> Optional[JobRecord]:
     with get_sync_db() as db:
         return db.query(JobRecord).filter(JobRecord.id == job_id).first()
 
+def _advance_job_progress(job_id: str, delta: int):
+    """Atomically bumps JobRecord.progress; safe when several chunk tasks report at once."""
+    if delta <= 0:
+        return
+    with get_sync_db() as db:
+        db.execute(
+            update(JobRecord)
+            .where(JobRecord.id == job_id)
+            .values(progress=JobRecord.progress + delta)
+        )
+        db.commit()
+
+
+def _scan_library_file(path: Path, job_id: str) -> Dict[str, Any]:
+    """
+    Scans one library CSV without touching Postgres. The returned sidecar is
+    updated in memory; callers upsert the Dataset row and save it.
+    """
+    sidecar = dataset_service.load_sidecar(path)
+    sha256 = dataset_service.content_sha256(path, sidecar)
+
+    # Unchanged since the last completed scan: nothing to do
+    if (
+        sidecar.get("status") == "completed"
+        and sidecar.get("validated_sha256") == sha256
+        and sidecar.get("validation")
+        and sidecar.get("dataset_id")
+    ):
+        return {"sha256": sha256, "sidecar": sidecar, "results": sidecar["validation"], "skipped": "unchanged"}
+
+    duplicate = dataset_service.find_duplicate(sha256, exclude=path)
+    duplicate_validation = dataset_service.load_sidecar(duplicate).get("validation") if duplicate else None
+    # Identical content already scanned elsewhere in the library
+    results = duplicate_validation or dataset_service.scan_csv_file(path)
+
+    sidecar.update({
+        "validation": results,
+        "validated_sha256": sha256,
+        "duplicate_of": dataset_service.library_name(duplicate) if duplicate else None,
+        "processed_at": datetime.now(timezone.utc).isoformat(),
+        "job_id": job_id,
+        "status": "completed"
+    })
+
+    # Append to health flags if unknown schema
+    if results.get("schema_id") == "unknown":
+        flags = set(sidecar.get("health_flags", []))
+        flags.add("worker_scan_unknown_schema")
+        sidecar["health_flags"] = sorted(list(flags))
+
+    return {"sha256": sha256, "sidecar": sidecar, "results": results, "skipped": None}
+
+
 @celery_app.task(name="scan_dataset_task", bind=True)
 def scan_dataset_task(self, csv_name: str, include_archived: bool = True):
     """
@@ -56,35 +115,26 @@ def scan_dataset_task(self, csv_name: str, include_archived: bool = True):
         job = _get_job(job_id)
         if not job:
             raise RuntimeError(f"JobRecord not found for task {job_id}")
-        
+
         _update_job_status(job_id, "running", progress=30)
         self.update_state(state="PROGRESS", meta={"status": "scanning", "file": safe_name})
-        results = dataset_service.scan_csv_file(path)
-        
-        _update_job_status(job_id, "running", progress=80)
-        # Update sidecar metadata with worker scan results
-        sidecar = dataset_service.load_sidecar(path)
-        sidecar.update({
-            "validation": results,
-            "processed_at": datetime.now(timezone.utc).isoformat(),
-            "job_id": job_id,
-            "status": "completed"
-        })
-        
-        # Append to health flags if unknown schema
-        if results.get("schema_id") == "unknown":
-            flags = set(sidecar.get("health_flags", []))
-            flags.add("worker_scan_unknown_schema")
-            sidecar["health_flags"] = sorted(list(flags))
-            
-        dataset_id = dataset_service.upsert_dataset_record(
-            csv_path=path,
-            owner_id=job.user_id,
-            validation=results,
-            sidecar=sidecar,
-        )
-        sidecar["dataset_id"] = dataset_id
+        scanned = _scan_library_file(path, job_id)
+        sidecar = scanned["sidecar"]
+        results = scanned["results"]
+
+        if scanned["skipped"]:
+            dataset_id = sidecar["dataset_id"]
+        else:
+            _update_job_status(job_id, "running", progress=80)
+            dataset_id = dataset_service.upsert_dataset_record(
+                csv_path=path,
+                owner_id=job.user_id,
+                validation=results,
+                sidecar=sidecar,
+            )
+            sidecar["dataset_id"] = dataset_id
         dataset_service.save_sidecar(path, sidecar)
+        dataset_service.register_content(scanned["sha256"], path)
         
         _update_job_status(
             job_id,
@@ -94,12 +144,15 @@ def scan_dataset_task(self, csv_name: str, include_archived: bool = True):
             finished=True,
         )
         
-        return {
+        response = {
             "status": "success",
             "name": safe_name,
             "dataset_id": dataset_id,
             "results": results
         }
+        if scanned["skipped"]:
+            response["skipped"] = scanned["skipped"]
+        return response
     except Exception as e:
         logger.error(f"Error scanning dataset {csv_name}: {e}")
         _update_job_status(job_id, "failed", error=str(e), finished=True)
@@ -107,3 +160,205 @@ def scan_dataset_task(self, csv_name: str, include_archived: bool = True):
             "status": "error",
             "message": str(e)
         }
+
+
+@celery_app.task(name="scan_library_task", bind=True)
+def scan_library_task(self, include_archived: bool = True):
+    """
+    Background task to scan the whole CSV library. Files are split into chunks
+    scanned in parallel by a Celery chord; the callback upserts every Dataset
+    row in one transaction.
+    """
+    job_id = self.request.id
+    _update_job_status(job_id, "running", progress=0)
+
+    try:
+        job = _get_job(job_id)
+        if not job:
+            raise RuntimeError(f"JobRecord not found for task {job_id}")
+
+        files = dataset_service.library_files(include_archived)
+        if not files:
+            _update_job_status(job_id, "completed", progress=100, finished=True)
+            return {"status": "success", "total": 0, "scanned": 0, "unchanged": 0, "failed": []}
+
+        step = LIBRARY_SCAN_CHUNK_FILES
+        header = group(
+            scan_library_chunk_task.s(job_id, files[i:i + step], i, len(files))
+            for i in range(0, len(files), step)
+        )
+        callback = finalize_library_scan_task.s(job_id, str(job.user_id)).on_error(
+            fail_library_scan_task.s(job_id)
+        )
+        # Before dispatch: chunks advance progress, and the callback may finish the job, at once
+        _update_job_status(job_id, "running", progress=LIBRARY_SCAN_PROGRESS[0])
+        chord(header)(callback)
+        return {"status": "dispatched", "total": len(files)}
+    except Exception as e:
+        logger.error(f"Error dispatching library scan: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@celery_app.task(name="scan_library_chunk_task")
+def scan_library_chunk_task(job_id: str, files: List[List[str]], offset: int, total: int):
+    """
+    Scans a slice of the library, given as (scope, resolved path) pairs. Per-file
+    errors are returned, never raised, so the chord completes.
+    """
+    entries = []
+    for scope, file_path in files:
+        path = Path(file_path)
+        name = dataset_service.library_name(path)
+        try:
+            entry = _scan_library_file(path, job_id)
+            entries.append({"name": name, "scope": scope, "path": str(path), **entry})
+        except Exception as e:
+            logger.error(f"Error scanning dataset {scope}/{name}: {e}")
+            entries.append({"name": name, "scope": scope, "error": str(e)})
+
+    # Telescoping share of the chunk range so concurrent chunks sum to exactly the span
+    lo, hi = LIBRARY_SCAN_PROGRESS
+    span = hi - lo
+    _advance_job_progress(job_id, (span * (offset + len(files))) // total - (span * offset) // total)
+    return entries
+
+
+@celery_app.task(name="finalize_library_scan_task")
+def finalize_library_scan_task(chunk_results: List[List[Dict[str, Any]]], job_id: str, owner_id: str):
+    """Chord callback: batches Dataset upserts, saves sidecars and updates the content index."""
+    try:
+        entries = [entry for chunk in chunk_results for entry in chunk]
+        failed = [e for e in entries if e.get("error")]
+        scanned = [e for e in entries if not e.get("error")]
+        changed = [e for e in scanned if not e["skipped"]]
+
+        ids = dataset_service.upsert_dataset_records(
+            [(Path(e["path"]), e["results"], e["sidecar"]) for e in changed],
+            owner_id,
+        )
+        for e in changed:
+            e["sidecar"]["dataset_id"] = ids[e["path"]]
+        for e in scanned:
+            dataset_service.save_sidecar(Path(e["path"]), e["sidecar"])
+        dataset_service.register_contents([(e["sha256"], Path(e["path"])) for e in scanned])
+
+        _update_job_status(
+            job_id,
+            "completed",
+            progress=100,
+            error="\n".join(f"{e['name']}: {e['error']}" for e in failed) or None,
+            result_location=str(dataset_service.library_dir),
+            finished=True,
+        )
+        return {
+            "status": "success",
+            "total": len(entries),
+            "scanned": len(changed),
+            "unchanged": len(scanned) - len(changed),
+            "failed": [{"name": e["name"], "error": e["error"]} for e in failed],
+        }
+    except Exception as e:
+        logger.error(f"Error finalizing library scan {job_id}: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@celery_app.task(name="fail_library_scan_task")
+def fail_library_scan_task(request, exc, traceback, job_id: str):
+    """Chord errback: a chunk task crashed outright (e.g. worker lost)."""
+    logger.error(f"Library scan {job_id} failed: {exc}")
+    _update_job_status(job_id, "failed", error=str(exc), finished=True)
+
+
+@celery_app.task(name="export_fusion_task", bind=True)
+def export_fusion_task(self, params: Dict[str, Any]):
+    """
+    Background task to merge a CV and a sensor CSV into a fused library dataset,
+    then queue a scan of the result.
+    """
+    from services.fusion_service import fusion_service
+
+    job_id = self.request.id
+    _update_job_status(job_id, "running", progress=0)
+    last_reported = 0
+
+    def _report(done: int, total: int):
+        nonlocal last_reported
+        # Scale to 5..90 and only hit Postgres on 5% steps
+        pct = 5 + int(85 * done / max(total, 1))
+        if pct - last_reported >= 5:
+            last_reported = pct
+            _update_job_status(job_id, "running", progress=pct)
+            self.update_state(state="PROGRESS", meta={"status": "merging", "rows_done": done, "rows_total": total})
+
+    try:
+        job = _get_job(job_id)
+        if not job:
+            raise RuntimeError(f"JobRecord not found for task {job_id}")
+
+        fusion_key = dataset_service.fusion_export_key(params)
+        existing = dataset_service.find_fusion_export(fusion_key)
+        if existing is not None:
+            # Same inputs and parameters were already merged into the library
+            export_name = dataset_service.library_name(existing)
+            _update_job_status(job_id, "completed", progress=100, result_location=str(existing), finished=True)
+            return {"status": "success", "export_name": export_name, "skipped": "already_exported"}
+
+        alignment = None
+        if params.get("offset_ms") is None:
+            self.update_state(state="PROGRESS", meta={"status": "estimating_offset"})
+            alignment = fusion_service.estimate_offset(params["cv_name"], params["sensor_name"])
+            if alignment["offset_ms"] is None:
+                # Exporting with a made-up offset would silently misalign the pair
+                raise ValueError(
+                    "Could not estimate offset_ms: the recordings do not overlap enough "
+                    f"(confidence {alignment.get('confidence') or 0.0:.2f}); pass offset_ms explicitly"
+                )
+            params = {**params, "offset_ms": alignment["offset_ms"]}
+
+        export_name = fusion_service.export_fusion(params, progress_cb=_report)
+        export_path = fusion_service.csv_dir / export_name
+        _update_job_status(job_id, "running", progress=95)
+
+        sidecar = dataset_service.load_sidecar(export_path)
+        sha256 = dataset_service.content_sha256(export_path, sidecar)
+        duplicate = dataset_service.find_duplicate(sha256, exclude=export_path)
+        scan_job_id = None
+        if duplicate is not None:
+            # Identical fused output already in the library: keep the existing file
+            export_path.unlink(missing_ok=True)
+            export_path = duplicate
+            export_name = dataset_service.library_name(duplicate)
+        else:
+            dataset_service.save_sidecar(export_path, sidecar)
+            scan_job_id = dataset_service.trigger_scan(export_name, user_id=job.user_id)
+        dataset_service.register_content(sha256, export_path, fusion_key=fusion_key)
+
+        _update_job_status(
+            job_id,
+            "completed",
+            progress=100,
+            result_location=str(export_path),
+            finished=True,
+        )
+        return {
+            "status": "success",
+            "export_name": export_name,
+            "offset_ms": params["offset_ms"],
+            "alignment": alignment,
+            "scan_job_id": scan_job_id,
+        }
+    except Exception as e:
+        logger.error(f"Fusion export failed for {params.get('cv_name')} + {params.get('sensor_name')}: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
@@ -0,0 +1,121 @@
+from pathlib import Path
+
+from celery.utils.log import get_task_logger
+
+from workers.tasks.celery_app import celery_app
+from workers.tasks.dataset_tasks import _update_job_status
+from api.utils.cache import publish_invalidation
+from services.sensor_ingest_service import sensor_ingest_service
+from services.sensor_store import (
+    LEGACY_ARCHIVE_COLLECTION,
+    SAMPLES_COLLECTION,
+    SENSOR_DATA_TAG,
+    migrate_legacy,
+    sync_database,
+)
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task(name="ingest_sensor_csv_task", bind=True)
+def ingest_sensor_csv_task(self, staged_path: str, filename: str):
+    """
+    Background task to bulk-ingest a staged raw sensor CSV into the sensor samples collection.
+    """
+    job_id = self.request.id
+    path = Path(staged_path)
+    _update_job_status(job_id, "running", progress=0)
+    last_reported = 0
+
+    def _report(done: int, total: int):
+        nonlocal last_reported
+        # Parsing and inserting interleave, so rows parsed tracks overall progress
+        pct = 5 + int(90 * done / max(total, 1))
+        if pct - last_reported >= 5:
+            last_reported = pct
+            _update_job_status(job_id, "running", progress=pct)
+            self.update_state(state="PROGRESS", meta={"status": "ingesting", "rows_done": done, "rows_total": total})
+
+    try:
+        stats = {}
+        documents = sensor_ingest_service.iter_documents(
+            path, upload_id=job_id, filename=filename, stats=stats, progress_cb=_report
+        )
+        inserted = sensor_ingest_service.insert_documents(
+            sensor_ingest_service.sync_collection(),
+            documents,
+            stats_collection=sensor_ingest_service.sync_stats_collection(),
+        )
+        if not stats["rows_processed"]:
+            raise ValueError("No valid sensor data found in CSV")
+
+        _update_job_status(
+            job_id,
+            "completed",
+            progress=100,
+            result_location=f"mongo:sensor_samples#upload:{filename}",
+            finished=True,
+        )
+        logger.info(f"Ingested {stats['rows_processed']} sensor rows from {filename} ({inserted} samples written)")
+        return {
+            "status": "success",
+            "filename": filename,
+            "rows_processed": stats["rows_processed"],
+            "rows_skipped": stats["rows_skipped"],
+            "samples_inserted": inserted,
+        }
+    except Exception as e:
+        logger.error(f"Sensor CSV ingest failed for {filename}: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    finally:
+        path.unlink(missing_ok=True)
+        # Also after failures: earlier chunks may have been written
+        publish_invalidation(SENSOR_DATA_TAG)
+
+
+@celery_app.task(name="migrate_sensor_timeseries_task", bind=True)
+def migrate_sensor_timeseries_task(self):
+    """
+    Background task to move legacy sensor_data documents into the time-series collection.
+    """
+    job_id = self.request.id
+    _update_job_status(job_id, "running", progress=0)
+    last_reported = 0
+
+    def _report(done: int, total: int):
+        nonlocal last_reported
+        pct = int(99 * done / max(total, 1))
+        if pct - last_reported >= 5:
+            last_reported = pct
+            _update_job_status(job_id, "running", progress=pct)
+            self.update_state(state="PROGRESS", meta={"status": "migrating", "docs_done": done, "docs_total": total})
+
+    try:
+        database = sync_database()
+        result = migrate_legacy(
+            database["sensor_data"],
+            database[SAMPLES_COLLECTION],
+            database[LEGACY_ARCHIVE_COLLECTION],
+            progress_cb=_report,
+        )
+        publish_invalidation(SENSOR_DATA_TAG)
+        _update_job_status(
+            job_id,
+            "completed",
+            progress=100,
+            result_location=f"mongo:{SAMPLES_COLLECTION}",
+            finished=True,
+        )
+        logger.info(f"Migrated {result['documents']} sensor documents into {result['samples']} samples")
+        return {"status": "success", **result}
+    except Exception as e:
+        logger.error(f"Sensor time-series migration failed: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }
@@ -0,0 +1,52 @@
+from typing import List, Optional
+
+from celery.utils.log import get_task_logger
+
+from workers.tasks.celery_app import celery_app
+from workers.tasks.dataset_tasks import _update_job_status
+from services.esp32_tts_bundle import esp32_bundle_builder
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task(name="generate_esp32_tts_bundle_task", bind=True)
+def generate_esp32_tts_bundle_task(self, languages: Optional[List[str]] = None, voice: Optional[str] = None):
+    """
+    Background task to render the ESP32 SD card TTS files and pack a versioned bundle.
+    """
+    job_id = self.request.id
+    _update_job_status(job_id, "running", progress=0)
+    last_reported = 0
+
+    def _report(done: int, total: int):
+        nonlocal last_reported
+        pct = int(95 * done / max(total, 1))
+        if pct - last_reported >= 5:
+            last_reported = pct
+            _update_job_status(job_id, "running", progress=pct)
+            self.update_state(state="PROGRESS", meta={"status": "rendering", "files_done": done, "files_total": total})
+
+    try:
+        summary = esp32_bundle_builder.build(languages, voice=voice, progress_cb=_report)
+        if summary["failed"] and not summary["version"]:
+            raise RuntimeError(f"All {len(summary['failed'])} TTS files failed: {summary['failed'][0]['error']}")
+        _update_job_status(
+            job_id,
+            "completed",
+            progress=100,
+            error="; ".join(f"{item['path']}: {item['error']}" for item in summary["failed"]) or None,
+            result_location=summary["bundle"],
+            finished=True,
+        )
+        logger.info(
+            f"ESP32 TTS bundle v{summary['version']}: {summary['rendered']} rendered, "
+            f"{summary['skipped']} unchanged, {len(summary['failed'])} failed"
+        )
+        return {"status": "success", **summary}
+    except Exception as e:
+        logger.error(f"ESP32 TTS bundle generation failed: {e}")
+        _update_job_status(job_id, "failed", error=str(e), finished=True)
+        return {
+            "status": "error",
+            "message": str(e)
+        }